@@ -25,7 +25,8 @@ target_metadata = db.metadata
 
 
 def get_url():
-    return settings.SQLALCHEMY_DATABASE_URI
+    # Tests migrate their template database through config.attributes.
+    return config.attributes.get("url") or settings.SQLALCHEMY_DATABASE_URI
 
 
 def run_migrations_offline():
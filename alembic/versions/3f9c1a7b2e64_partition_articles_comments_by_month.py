@@ -0,0 +1,243 @@
+"""Partition articles, comments by month of created_at
+
+Revision ID: 3f9c1a7b2e64
+Revises: d060eeb7e9d1
+Create Date: 2026-10-19 09:12:41.218533
+
+Both tables become range partitioned by created_at, one partition per month
+plus a default partition. Postgres requires the partition key in every
+unique constraint of a partitioned table, so:
+
+-   primary keys become (id, created_at), ids still come from the old
+    sequences;
+-   slug uniqueness is enforced through the article_slugs table, kept in
+    sync by a trigger;
+-   foreign keys to articles.id (from comments and favoriter_assoc) are
+    dropped.
+
+``create_monthly_partitions(parent, from, to)`` creates the missing monthly
+partitions in a date range; the app calls it on startup for the months
+ahead (see ``app.crud.crud_partition``).
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f9c1a7b2e64"
+down_revision = "d060eeb7e9d1"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+CREATE_MONTHLY_PARTITIONS = """
+CREATE OR REPLACE FUNCTION create_monthly_partitions(
+    parent regclass, from_date date, to_date date
+) RETURNS integer AS $$
+DECLARE
+    month date := date_trunc('month', from_date)::date;
+    partition text;
+    created integer := 0;
+BEGIN
+    WHILE month <= to_date LOOP
+        partition := format('%s_%s', parent::text, to_char(month, 'YYYY_MM'));
+        IF to_regclass(partition) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                partition, parent, month, (month + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month := (month + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$ LANGUAGE plpgsql
+"""
+
+ARTICLES_SLUG_UNIQUE = """
+CREATE OR REPLACE FUNCTION articles_slug_unique() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.slug IS NOT NULL THEN
+        DELETE FROM article_slugs WHERE slug = OLD.slug;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.slug IS NOT NULL THEN
+        INSERT INTO article_slugs (slug, article_id) VALUES (NEW.slug, NEW.id);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def create_partitions(table: str) -> None:
+    op.execute(
+        f"""
+        SELECT create_monthly_partitions(
+            '{table}',
+            coalesce((SELECT min(created_at) FROM {table}_unpartitioned), now())::date,
+            (now() + interval '{MONTHS_AHEAD} months')::date
+        )
+        """
+    )
+
+
+def rename_table(old: str, new: str) -> None:
+    """Rename a table and its primary key, freeing the name for a new table."""
+    op.rename_table(old, new)
+    op.execute(f"ALTER TABLE {new} RENAME CONSTRAINT {old}_pkey TO {new}_pkey")
+
+
+def upgrade():
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+    op.drop_constraint(
+        "favoriter_assoc_article_id_fkey", "favoriter_assoc", type_="foreignkey"
+    )
+    op.drop_constraint("comments_article_id_fkey", "comments", type_="foreignkey")
+
+    rename_table("articles", "articles_unpartitioned")
+    op.execute("ALTER SEQUENCE articles_id_seq OWNED BY NONE")
+    op.execute(
+        """
+        CREATE TABLE articles (
+            id integer NOT NULL DEFAULT nextval('articles_id_seq'),
+            slug varchar,
+            title varchar,
+            description varchar,
+            body varchar,
+            author_id integer REFERENCES users (id),
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("CREATE TABLE articles_default PARTITION OF articles DEFAULT")
+    create_partitions("articles")
+    op.execute(
+        """
+        INSERT INTO articles
+            (id, slug, title, description, body, author_id, created_at, updated_at)
+        SELECT id, slug, title, description, body, author_id, created_at, updated_at
+        FROM articles_unpartitioned
+        """
+    )
+    op.drop_table("articles_unpartitioned")
+    op.execute("ALTER SEQUENCE articles_id_seq OWNED BY articles.id")
+    op.create_index("ix_articles_id", "articles", ["id"])
+    op.create_index("ix_articles_slug", "articles", ["slug"])
+    op.create_index("ix_articles_created_at", "articles", ["created_at"])
+    op.create_index(
+        "ix_articles_author_id_created_at", "articles", ["author_id", "created_at"]
+    )
+
+    op.create_table(
+        "article_slugs",
+        sa.Column("slug", sa.String(), nullable=False),
+        sa.Column("article_id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("slug"),
+    )
+    op.execute(
+        "INSERT INTO article_slugs (slug, article_id) "
+        "SELECT slug, id FROM articles WHERE slug IS NOT NULL"
+    )
+    op.execute(ARTICLES_SLUG_UNIQUE)
+    op.execute(
+        """
+        CREATE TRIGGER articles_slug_unique
+        AFTER INSERT OR DELETE OR UPDATE OF slug ON articles
+        FOR EACH ROW EXECUTE FUNCTION articles_slug_unique()
+        """
+    )
+
+    rename_table("comments", "comments_unpartitioned")
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY NONE")
+    op.execute(
+        """
+        CREATE TABLE comments (
+            id integer NOT NULL DEFAULT nextval('comments_id_seq'),
+            body varchar,
+            author_id integer REFERENCES users (id),
+            article_id integer,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("CREATE TABLE comments_default PARTITION OF comments DEFAULT")
+    create_partitions("comments")
+    op.execute(
+        """
+        INSERT INTO comments
+            (id, body, author_id, article_id, created_at, updated_at)
+        SELECT id, body, author_id, article_id, created_at, updated_at
+        FROM comments_unpartitioned
+        """
+    )
+    op.drop_table("comments_unpartitioned")
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY comments.id")
+    op.create_index("ix_comments_id", "comments", ["id"])
+    op.create_index(
+        "ix_comments_article_id_created_at", "comments", ["article_id", "created_at"]
+    )
+
+
+def downgrade():
+    rename_table("comments", "comments_partitioned")
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY NONE")
+    op.execute(
+        """
+        CREATE TABLE comments (
+            id integer NOT NULL DEFAULT nextval('comments_id_seq'),
+            body varchar,
+            author_id integer REFERENCES users (id),
+            article_id integer,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("INSERT INTO comments SELECT * FROM comments_partitioned")
+    op.execute("DROP TABLE comments_partitioned")
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY comments.id")
+    op.create_index("ix_comments_id", "comments", ["id"])
+
+    op.execute("DROP TRIGGER articles_slug_unique ON articles")
+    op.execute("DROP FUNCTION articles_slug_unique()")
+    op.drop_table("article_slugs")
+    rename_table("articles", "articles_partitioned")
+    op.execute("ALTER SEQUENCE articles_id_seq OWNED BY NONE")
+    op.execute(
+        """
+        CREATE TABLE articles (
+            id integer NOT NULL DEFAULT nextval('articles_id_seq'),
+            slug varchar UNIQUE,
+            title varchar,
+            description varchar,
+            body varchar,
+            author_id integer REFERENCES users (id),
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("INSERT INTO articles SELECT * FROM articles_partitioned")
+    op.execute("DROP TABLE articles_partitioned")
+    op.execute("ALTER SEQUENCE articles_id_seq OWNED BY articles.id")
+    op.create_index("ix_articles_id", "articles", ["id"])
+
+    op.create_foreign_key(
+        "comments_article_id_fkey", "comments", "articles", ["article_id"], ["id"]
+    )
+    op.create_foreign_key(
+        "favoriter_assoc_article_id_fkey",
+        "favoriter_assoc",
+        "articles",
+        ["article_id"],
+        ["id"],
+    )
+    op.execute("DROP FUNCTION create_monthly_partitions(regclass, date, date)")
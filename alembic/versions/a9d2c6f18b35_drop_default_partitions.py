@@ -0,0 +1,142 @@
+"""Drop the default partitions of articles and comments
+
+Revision ID: a9d2c6f18b35
+Revises: e5d8b3a1f047
+Create Date: 2026-10-19 21:14:08.301652
+
+A default partition keeps Postgres from reading the monthly partitions in
+order: ``ORDER BY created_at DESC LIMIT n`` then probes every partition
+through a Merge Append instead of stopping in the newest ones. The app
+creates the partitions of the months ahead on startup, so the default
+partitions only ever caught rows of months without a partition; rows in
+them are moved to monthly partitions, and rows of a month without a
+partition are now rejected.
+
+``create_monthly_partitions`` keeps its advisory lock and no longer moves
+rows out of the default partition.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a9d2c6f18b35"
+down_revision = "e5d8b3a1f047"
+branch_labels = None
+depends_on = None
+
+PARTITIONED_TABLES = ("articles", "comments")
+
+CREATE_MONTHLY_PARTITIONS = """
+CREATE OR REPLACE FUNCTION create_monthly_partitions(
+    parent regclass, from_date date, to_date date
+) RETURNS integer AS $$
+DECLARE
+    month date := date_trunc('month', from_date)::date;
+    partition text;
+    created integer := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('create_monthly_partitions'));
+    WHILE month <= to_date LOOP
+        partition := format('%s_%s', parent::text, to_char(month, 'YYYY_MM'));
+        IF to_regclass(partition) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                partition, parent, month, (month + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month := (month + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$ LANGUAGE plpgsql
+"""
+
+PREVIOUS_CREATE_MONTHLY_PARTITIONS = """
+CREATE OR REPLACE FUNCTION create_monthly_partitions(
+    parent regclass, from_date date, to_date date
+) RETURNS integer AS $$
+DECLARE
+    month date := date_trunc('month', from_date)::date;
+    next_month date;
+    partition text;
+    default_partition text := parent::text || '_default';
+    in_default boolean;
+    created integer := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('create_monthly_partitions'));
+    WHILE month <= to_date LOOP
+        next_month := (month + interval '1 month')::date;
+        partition := format('%s_%s', parent::text, to_char(month, 'YYYY_MM'));
+        IF to_regclass(partition) IS NULL THEN
+            EXECUTE format(
+                'SELECT EXISTS (SELECT FROM %I '
+                'WHERE created_at >= %L AND created_at < %L)',
+                default_partition, month, next_month
+            ) INTO in_default;
+            IF in_default THEN
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE %s INCLUDING DEFAULTS)',
+                    partition, parent
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I DISABLE TRIGGER USER', default_partition
+                );
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I '
+                    'WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved',
+                    default_partition, month, next_month, partition
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I ENABLE TRIGGER USER', default_partition
+                );
+                EXECUTE format(
+                    'ALTER TABLE %s ATTACH PARTITION %I '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    parent, partition, month, next_month
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF %s '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    partition, parent, month, next_month
+                );
+            END IF;
+            created := created + 1;
+        END IF;
+        month := next_month;
+    END LOOP;
+    RETURN created;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    for table in PARTITIONED_TABLES:
+        # The previous create_monthly_partitions moves the rows of the months
+        # it creates out of the default partition, which must not be in use by
+        # the calling statement: read the bounds first.
+        op.execute(
+            f"""
+            DO $$
+            DECLARE
+                from_date date;
+                to_date date;
+            BEGIN
+                SELECT min(created_at)::date, max(created_at)::date
+                INTO from_date, to_date
+                FROM {table}_default;
+                PERFORM create_monthly_partitions('{table}', from_date, to_date);
+            END
+            $$
+            """
+        )
+        op.execute(f"DROP TABLE {table}_default")
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+
+
+def downgrade():
+    op.execute(PREVIOUS_CREATE_MONTHLY_PARTITIONS)
+    for table in PARTITIONED_TABLES:
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
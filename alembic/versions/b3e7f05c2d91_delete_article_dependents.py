@@ -0,0 +1,70 @@
+"""Delete the comments, tags, favorites and summary of a deleted article
+
+Revision ID: b3e7f05c2d91
+Revises: a9d2c6f18b35
+Create Date: 2026-10-19 21:47:30.118204
+
+The primary key of the partitioned articles table is (id, created_at), so
+comments, tag_assoc, favoriter_assoc and article_summaries cannot have a
+foreign key to articles.id. A trigger deletes them with the article instead,
+whatever the delete path, and the orphans left so far are deleted.
+
+Changing created_at would move the row to another partition, which Postgres
+runs as a delete (firing the trigger) and an insert: created_at is made
+immutable.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b3e7f05c2d91"
+down_revision = "a9d2c6f18b35"
+branch_labels = None
+depends_on = None
+
+DEPENDENTS = {
+    "comments": "article_id",
+    "tag_assoc": "article_id",
+    "favoriter_assoc": "article_id",
+    "article_summaries": "id",
+}
+
+ARTICLES_DELETE_DEPENDENTS = """
+CREATE OR REPLACE FUNCTION articles_delete_dependents() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.created_at IS DISTINCT FROM OLD.created_at THEN
+            RAISE EXCEPTION 'created_at of article % cannot change', OLD.id;
+        END IF;
+        RETURN NEW;
+    END IF;
+    DELETE FROM comments WHERE article_id = OLD.id;
+    DELETE FROM tag_assoc WHERE article_id = OLD.id;
+    DELETE FROM favoriter_assoc WHERE article_id = OLD.id;
+    DELETE FROM article_summaries WHERE id = OLD.id;
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    for table, column in DEPENDENTS.items():
+        op.execute(
+            f"""
+            DELETE FROM {table} d
+            WHERE NOT EXISTS (SELECT FROM articles a WHERE a.id = d.{column})
+            """
+        )
+    op.execute(ARTICLES_DELETE_DEPENDENTS)
+    op.execute(
+        """
+        CREATE TRIGGER articles_delete_dependents
+        BEFORE DELETE OR UPDATE OF created_at ON articles
+        FOR EACH ROW EXECUTE FUNCTION articles_delete_dependents()
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER articles_delete_dependents ON articles")
+    op.execute("DROP FUNCTION articles_delete_dependents()")
@@ -0,0 +1,80 @@
+"""Create article_summaries table
+
+Revision ID: b81e4d2a9c57
+Revises: 3f9c1a7b2e64
+Create Date: 2026-10-19 10:02:17.481106
+
+Denormalized read model of articles: article columns, author profile, tags
+and favorite/comment counts, one row per article. Kept up to date by the
+crud write paths (``app.crud.crud_article_summary``); rebuild and check it
+with ``python -m app.scripts.article_summaries``.
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b81e4d2a9c57"
+down_revision = "3f9c1a7b2e64"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "article_summaries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("slug", sa.String(), nullable=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("body", sa.String(), nullable=True),
+        sa.Column("author_id", sa.Integer(), nullable=True),
+        sa.Column("author_username", sa.String(), nullable=True),
+        sa.Column("author_bio", sa.String(), nullable=True),
+        sa.Column("author_image", sa.String(), nullable=True),
+        sa.Column(
+            "tag_list",
+            postgresql.ARRAY(sa.String()),
+            server_default="{}",
+            nullable=False,
+        ),
+        sa.Column("favorites_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("comments_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_article_summaries_slug", "article_summaries", ["slug"], unique=True
+    )
+    op.create_index(
+        "ix_article_summaries_created_at", "article_summaries", ["created_at"]
+    )
+    op.create_index(
+        "ix_article_summaries_author_id_created_at",
+        "article_summaries",
+        ["author_id", "created_at"],
+    )
+    op.execute(
+        """
+        INSERT INTO article_summaries
+        SELECT a.id, a.slug, a.title, a.description, a.body, a.author_id,
+               u.username, u.bio, u.image,
+               ARRAY(SELECT t.tag FROM tag_assoc t WHERE t.article_id = a.id),
+               (SELECT count(*) FROM favoriter_assoc f WHERE f.article_id = a.id),
+               (SELECT count(*) FROM comments c
+                WHERE c.article_id = a.id AND c.created_at >= a.created_at),
+               a.created_at, a.updated_at
+        FROM articles a JOIN users u ON u.id = a.author_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_article_summaries_author_id_created_at", table_name="article_summaries"
+    )
+    op.drop_index("ix_article_summaries_created_at", table_name="article_summaries")
+    op.drop_index("ix_article_summaries_slug", table_name="article_summaries")
+    op.drop_table("article_summaries")
@@ -0,0 +1,30 @@
+"""Index article_summaries.tag_list with GIN
+
+Revision ID: c4a7e19d5f32
+Revises: b81e4d2a9c57
+Create Date: 2026-10-19 17:25:08.913402
+
+Article lists filter on several tags with the array operators ``@>`` (all
+of them) and ``&&`` (any of them) on the denormalized ``tag_list``, which
+a GIN index serves instead of one ``tag_assoc`` join per tag.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4a7e19d5f32"
+down_revision = "b81e4d2a9c57"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_article_summaries_tag_list",
+        "article_summaries",
+        ["tag_list"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade():
+    op.drop_index("ix_article_summaries_tag_list", table_name="article_summaries")
@@ -0,0 +1,25 @@
+"""Index favoriter_assoc.article_id
+
+Revision ID: d2f6a8c41e07
+Revises: b3e7f05c2d91
+Create Date: 2026-10-19 22:20:51.604913
+
+Flushes of the buffered favorite counts recount the favorites of each
+changed article; the primary key (user_id, article_id) cannot serve a lookup
+by article.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d2f6a8c41e07"
+down_revision = "b3e7f05c2d91"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_favoriter_assoc_article_id", "favoriter_assoc", ["article_id"])
+
+
+def downgrade():
+    op.drop_index("ix_favoriter_assoc_article_id", table_name="favoriter_assoc")
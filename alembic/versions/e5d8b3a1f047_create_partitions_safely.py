@@ -0,0 +1,116 @@
+"""Create monthly partitions under a lock, moving rows out of the default
+
+Revision ID: e5d8b3a1f047
+Revises: c4a7e19d5f32
+Create Date: 2026-10-19 19:02:17.540126
+
+``create_monthly_partitions`` runs on the startup of every worker, so:
+
+-   it takes a transaction-level advisory lock, workers starting together
+    create a partition one after another instead of racing on it;
+-   rows of a month without a partition landed in the default partition,
+    where Postgres refuses to create an overlapping partition; they are
+    moved to the new partition before it is attached. Triggers of the
+    default partition are disabled for the move, it is neither a delete nor
+    an insert of the rows (``article_slugs`` keeps their slugs).
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5d8b3a1f047"
+down_revision = "c4a7e19d5f32"
+branch_labels = None
+depends_on = None
+
+CREATE_MONTHLY_PARTITIONS = """
+CREATE OR REPLACE FUNCTION create_monthly_partitions(
+    parent regclass, from_date date, to_date date
+) RETURNS integer AS $$
+DECLARE
+    month date := date_trunc('month', from_date)::date;
+    next_month date;
+    partition text;
+    default_partition text := parent::text || '_default';
+    in_default boolean;
+    created integer := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('create_monthly_partitions'));
+    WHILE month <= to_date LOOP
+        next_month := (month + interval '1 month')::date;
+        partition := format('%s_%s', parent::text, to_char(month, 'YYYY_MM'));
+        IF to_regclass(partition) IS NULL THEN
+            EXECUTE format(
+                'SELECT EXISTS (SELECT FROM %I '
+                'WHERE created_at >= %L AND created_at < %L)',
+                default_partition, month, next_month
+            ) INTO in_default;
+            IF in_default THEN
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE %s INCLUDING DEFAULTS)',
+                    partition, parent
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I DISABLE TRIGGER USER', default_partition
+                );
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM %I '
+                    'WHERE created_at >= %L AND created_at < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved',
+                    default_partition, month, next_month, partition
+                );
+                EXECUTE format(
+                    'ALTER TABLE %I ENABLE TRIGGER USER', default_partition
+                );
+                EXECUTE format(
+                    'ALTER TABLE %s ATTACH PARTITION %I '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    parent, partition, month, next_month
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF %s '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    partition, parent, month, next_month
+                );
+            END IF;
+            created := created + 1;
+        END IF;
+        month := next_month;
+    END LOOP;
+    RETURN created;
+END
+$$ LANGUAGE plpgsql
+"""
+
+PREVIOUS_CREATE_MONTHLY_PARTITIONS = """
+CREATE OR REPLACE FUNCTION create_monthly_partitions(
+    parent regclass, from_date date, to_date date
+) RETURNS integer AS $$
+DECLARE
+    month date := date_trunc('month', from_date)::date;
+    partition text;
+    created integer := 0;
+BEGIN
+    WHILE month <= to_date LOOP
+        partition := format('%s_%s', parent::text, to_char(month, 'YYYY_MM'));
+        IF to_regclass(partition) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF %s FOR VALUES FROM (%L) TO (%L)',
+                partition, parent, month, (month + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month := (month + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def upgrade():
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+
+
+def downgrade():
+    op.execute(PREVIOUS_CREATE_MONTHLY_PARTITIONS)
@@ -1,6 +1,15 @@
 from fastapi import APIRouter
 
-from app.api.routers import articles, authentication, comments, profiles, tags, users
+from app.api.routers import (
+    articles,
+    authentication,
+    batch,
+    comments,
+    metrics,
+    profiles,
+    tags,
+    users,
+)
 
 api_router = APIRouter()
 
@@ -16,3 +25,5 @@ api_router.include_router(articles.router, tags=["Articles"], prefix="/articles"
 api_router.include_router(
     comments.router, tags=["Comments"], prefix="/articles/{slug}/comments"
 )
+api_router.include_router(batch.router, tags=["Batch"], prefix="/batch")
+api_router.include_router(metrics.router, tags=["Metrics"], prefix="/metrics")
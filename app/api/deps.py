@@ -1,15 +1,18 @@
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import APIKeyHeader
 from starlette import status
 
 from app import schemas
 from app.core import security
-from app.crud import crud_user
+from app.crud.repository import repository
 
 JWT_PREFIX = "Token"
 
+# Request state key of a user already resolved, e.g. by a batch request.
+CURRENT_USER = "current_user"
+
 
 def authorization_heder_token_required(
     api_key: str = Depends(APIKeyHeader(name="Authorization")),
@@ -51,23 +54,36 @@ def authorization_heder_token(required: bool = True) -> Callable:  # type: ignor
     )
 
 
+def resolved_user(request: Request) -> Tuple[bool, Optional[schemas.UserDB]]:
+    state = request.scope.get("state", {})
+    return CURRENT_USER in state, state.get(CURRENT_USER)
+
+
 async def get_current_user_required(
+    request: Request,
     token: str = Depends(authorization_heder_token()),
 ) -> schemas.UserDB:
+    resolved, user_db = resolved_user(request)
+    if resolved and user_db is not None:
+        return user_db
     user_id = security.get_user_id_from_token(token=token)
-    user_db = await crud_user.get(int(user_id))
+    user_db = await repository.users.get(int(user_id))
     if not user_db:
         raise HTTPException(status_code=404, detail="User not found")
     return user_db
 
 
 async def get_current_user_required_optional(
+    request: Request,
     token: str = Depends(authorization_heder_token(required=False)),
 ) -> Optional[schemas.UserDB]:
     if token is None:
         return None
+    resolved, user_db = resolved_user(request)
+    if resolved:
+        return user_db
     user_id = security.get_user_id_from_token(token=token)
-    return await crud_user.get(int(user_id))
+    return await repository.users.get(int(user_id))
 
 
 def get_current_user(required: bool = True) -> Callable:  # type: ignore
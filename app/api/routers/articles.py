@@ -1,16 +1,46 @@
-from typing import List, Optional
+import base64
+import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from starlette import status
 
 from app import schemas
 from app.api import deps
-from app.crud import crud_article, crud_profile
+from app.crud.repository import repository
 
 SLUG_NOT_FOUND = "article with this slug not found"
 
 AUTHOR_NOT_EXISTED = "This article's author not existed"
 
+# Fields of an article in a list, and the summary columns they are read from.
+LIST_FIELDS: Dict[str, List[str]] = {
+    "slug": ["slug"],
+    "title": ["title"],
+    "description": ["description"],
+    "body": ["body"],
+    "author": ["author_username", "author_bio", "author_image"],
+    "createdAt": ["created_at"],
+    "updatedAt": ["updated_at"],
+    "tagList": ["tag_list"],
+    "favorited": [],
+    "favoritesCount": ["favorites_count"],
+}
+
+INVALID_CURSOR = "invalid cursor"
+
+CURSOR_DESCRIPTION = "nextCursor of the previous page, to read the articles after it"
+
+TAG_DESCRIPTION = (
+    "Comma-separated tags, e.g. python,async: articles with all of them, "
+    "or any of them with tag_match=any"
+)
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated article fields to return, e.g. slug,title,description. "
+    "All fields by default"
+)
+
 router = APIRouter()
 
 
@@ -24,22 +54,10 @@ async def create_article(
     article_in: schemas.ArticleInCreate = Body(..., embed=True, alias="article"),
     current_user: schemas.UserDB = Depends(deps.get_current_user()),
 ) -> schemas.ArticleInResponse:
-    article_id = await crud_article.create(article_in, author_id=current_user.id)
-    article = await crud_article.get(article_id)
-    profile = await crud_profile.get_profile_by_user_id(
-        article.author_id, requested_user=current_user  # type: ignore
-    )
-    tags = await crud_article.get_article_tags(article_id)
-    favorited = await crud_article.is_article_favorited_by_user(
-        article_id, current_user.id
-    )
-    favorites_count = await crud_article.count_article_favorites(article_id)
-    return gen_article_in_response(
-        article=article,  # type: ignore
-        favorited=favorited,
-        favorites_count=favorites_count,
-        profile=profile,  # type: ignore
-        tags=tags,
+    article_id = await repository.articles.create(article_in, author_id=current_user.id)
+    article = await repository.summaries.get(article_id)
+    return schemas.ArticleInResponse(
+        article=await article_for_response(article, current_user)  # type: ignore
     )
 
 
@@ -47,96 +65,195 @@ async def create_article(
     "/feed",
     name="Get recent articles from users you follow",
     description="Get most recent articles from users you follow. "
-    "Use query parameters to limit. Auth is required",
+    "Use query parameters to limit, and nextCursor to get the next page. "
+    "Auth is required",
     response_model=schemas.MultipleArticlesInResponse,
+    response_model_exclude_unset=True,
 )
 async def feed_articles(
     current_user: schemas.UserDB = Depends(deps.get_current_user()),
     limit: int = 20,
     offset: int = 0,
+    cursor: Optional[str] = Query(None, description=CURSOR_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_body: bool = True,
 ) -> schemas.MultipleArticlesInResponse:
-    article_dbs = await crud_article.feed(
-        limit=limit, offset=offset, follow_by=current_user.id
+    wanted = list_fields(fields, include_body)
+    article_dbs, count, approximate = await repository.articles.feed_with_count(
+        limit=limit,
+        offset=offset,
+        follow_by=current_user.id,
+        columns=list_columns(wanted),
+        before=decode_cursor(cursor) if cursor else None,
     )
-    articles = []
-    for article_db in article_dbs:
-        profile = await crud_profile.get_profile_by_user_id(
-            article_db.author_id, requested_user=current_user
-        )
-        tags = await crud_article.get_article_tags(article_db.id)
-        favorited = await crud_article.is_article_favorited_by_user(
-            article_db.id, current_user.id
-        )
-        favorites_count = await crud_article.count_article_favorites(article_db.id)
-        article_for_reponse = schemas.ArticleForResponse(
-            slug=article_db.slug,
-            title=article_db.title,
-            description=article_db.description,
-            body=article_db.body,
-            createdAt=article_db.created_at,
-            updatedAt=article_db.updated_at,
-            author=profile,  # type: ignore
-            tagList=tags,
-            favorited=favorited,
-            favoritesCount=favorites_count,
-        )
-        articles.append(article_for_reponse)
-
+    articles = await articles_in_list(article_dbs, current_user, wanted)
+    next_cursor = None
+    if article_dbs and len(article_dbs) == limit:
+        next_cursor = encode_cursor(article_dbs[-1].created_at, article_dbs[-1].id)
     return schemas.MultipleArticlesInResponse(
-        articles=articles, articlesCount=len(articles)
+        articles=articles,
+        articlesCount=count,
+        articlesCountApproximate=approximate,
+        nextCursor=next_cursor,
     )
 
 
+def encode_cursor(created_at: datetime.datetime, article_id: int) -> str:
+    position = f"{created_at.isoformat()},{article_id}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    try:
+        created_at, article_id = base64.urlsafe_b64decode(cursor).decode().split(",")
+        return datetime.datetime.fromisoformat(created_at), int(article_id)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=INVALID_CURSOR
+        ) from exc
+
+
 async def get_article_response_by_slug(
-    slug: str, current_user: schemas.UserDB
+    slug: str, current_user: Optional[schemas.UserDB]
 ) -> schemas.ArticleInResponse:
-    article = await crud_article.get_article_by_sluq(slug=slug)
+    article = await repository.summaries.get_by_slug(slug=slug)
     if article is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=SLUG_NOT_FOUND,
         )
-    profile = await crud_profile.get_profile_by_user_id(
-        article.author_id, requested_user=current_user
+    return schemas.ArticleInResponse(
+        article=await article_for_response(article, current_user)
     )
-    tags = await crud_article.get_article_tags(article.id)
-    if current_user:
-        favorited = await crud_article.is_article_favorited_by_user(
-            article.id, current_user.id
-        )
-    else:
-        favorited = False
-    favorites_count = await crud_article.count_article_favorites(article.id)
-    return gen_article_in_response(
-        article=article,
+
+
+async def article_for_response(
+    article: schemas.ArticleSummary, current_user: Optional[schemas.UserDB]
+) -> schemas.ArticleForResponse:
+    """Render a summary row, adding what depends on the current user."""
+    following, favorited = await viewer_lookups(article, current_user)
+    return schemas.ArticleForResponse(
+        slug=article.slug,
+        title=article.title,
+        description=article.description,
+        body=article.body,
+        createdAt=article.created_at,
+        updatedAt=article.updated_at,
+        author=author_for_response(article, following),
+        tagList=article.tag_list,
         favorited=favorited,
-        favorites_count=favorites_count,
-        profile=profile,  # type: ignore
-        tags=tags,
+        favoritesCount=article.favorites_count,
     )
 
 
-def gen_article_in_response(
-    article: schemas.ArticleDB,
-    favorited: bool,
-    favorites_count: int,
-    profile: schemas.Profile,
-    tags: List[str],
-) -> schemas.ArticleInResponse:
-    return schemas.ArticleInResponse(
-        article=schemas.ArticleForResponse(
-            slug=article.slug,
-            title=article.title,
-            description=article.description,
-            body=article.body,
-            createdAt=article.created_at,
-            updatedAt=article.updated_at,
-            author=profile,
-            tagList=tags,
-            favorited=favorited,
-            favoritesCount=favorites_count,
+async def viewer_lookups(
+    article: schemas.ArticleSummary, current_user: Optional[schemas.UserDB]
+) -> List[bool]:
+    """Whether the current user follows the author, and favorited the article.
+
+    They are independent reads, so a signed-in user's are run concurrently;
+    an anonymous user's need no query.
+    """
+    if current_user is None:
+        return [False, False]
+    return await repository.gather(
+        repository.profiles.is_following_user_id(article.author_id, current_user),
+        is_favorited(article, current_user),
+    )
+
+
+def author_for_response(
+    article: schemas.ArticleSummary, following: bool
+) -> schemas.Profile:
+    """The author's public profile comes with the summary row."""
+    return schemas.Profile(
+        username=article.author_username,
+        bio=article.author_bio,
+        image=article.author_image,
+        following=following,
+    )
+
+
+async def is_favorited(
+    article: schemas.ArticleSummary, current_user: Optional[schemas.UserDB]
+) -> bool:
+    if current_user is None:
+        return False
+    return await repository.articles.is_article_favorited_by_user(
+        article.id, current_user.id
+    )
+
+
+def list_fields(fields: Optional[str], include_body: bool) -> Optional[List[str]]:
+    """Article fields asked for by a list request, ``None`` for all of them."""
+    if fields is None and include_body:
+        return None
+    if fields is None:
+        names = list(LIST_FIELDS)
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(names) - LIST_FIELDS.keys())
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"unknown article fields: {', '.join(unknown)}",
         )
+    if not include_body:
+        names = [name for name in names if name != "body"]
+    return names
+
+
+def list_tags(tag: Optional[str]) -> Optional[List[str]]:
+    if tag is None:
+        return None
+    return list(dict.fromkeys(name.strip() for name in tag.split(",") if name.strip()))
+
+
+def list_columns(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """Summary columns to select for ``fields``, ``None`` for all of them."""
+    if fields is None:
+        return None
+    return [column for field in fields for column in LIST_FIELDS[field]]
+
+
+async def articles_in_list(
+    articles: List[schemas.ArticleSummary],
+    current_user: Optional[schemas.UserDB],
+    fields: Optional[List[str]],
+) -> List[schemas.ArticleInList]:
+    """Render the ``fields`` of summary rows. Fields left out are not set,
+    so they are left out of the response, and not looked up; the followed
+    authors and the favorited articles of the page are one query each."""
+    author_ids: Set[int] = set()
+    article_ids: List[int] = []
+    if fields is None or "author" in fields:
+        author_ids = {article.author_id for article in articles}
+    if fields is None or "favorited" in fields:
+        article_ids = [article.id for article in articles]
+    following, favorited = await repository.gather(
+        repository.profiles.following_ids(author_ids, current_user),
+        repository.articles.favorited_ids(article_ids, current_user),
     )
+    return [
+        article_in_list(article, fields, following, favorited) for article in articles
+    ]
+
+
+def article_in_list(
+    article: schemas.ArticleSummary,
+    fields: Optional[List[str]],
+    following: Set[int],
+    favorited: Set[int],
+) -> schemas.ArticleInList:
+    values: Dict[str, Any] = {}
+    for field in LIST_FIELDS if fields is None else fields:
+        if field == "author":
+            values[field] = author_for_response(article, article.author_id in following)
+        elif field == "favorited":
+            values[field] = article.id in favorited
+        else:
+            values[field] = getattr(article, LIST_FIELDS[field][0])
+    return schemas.ArticleInList(**values)
 
 
 @router.get(
@@ -163,13 +280,13 @@ async def update_article(
     article_in: schemas.ArticleInUpdate = Body(..., embed=True, alias="article"),
     current_user: schemas.UserDB = Depends(deps.get_current_user()),
 ) -> schemas.ArticleInResponse:
-    article_db = await crud_article.get_article_by_sluq(slug)
+    article_db = await repository.articles.get_article_by_sluq(slug)
     if article_db is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=SLUG_NOT_FOUND,
         )
-    await crud_article.update(article_db, payload=article_in)
+    await repository.articles.update(article_db, payload=article_in)
 
     return await get_article_response_by_slug(slug=slug, current_user=current_user)
 
@@ -183,7 +300,7 @@ async def delete_article(
     slug: str,
     current_user: schemas.UserDB = Depends(deps.get_current_user(required=False)),
 ) -> None:
-    article_db = await crud_article.get_article_by_sluq(slug=slug)
+    article_db = await repository.articles.get_article_by_sluq(slug=slug)
     if article_db is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -194,7 +311,7 @@ async def delete_article(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="can not delete an article owner by other user",
         )
-    await crud_article.delete(article_db)
+    await repository.articles.delete(article_db)
 
 
 @router.get(
@@ -203,47 +320,32 @@ async def delete_article(
     description="Get most recent articles globally. "
     "Use query parameters to filter results. Auth is optional",
     response_model=schemas.MultipleArticlesInResponse,
+    response_model_exclude_unset=True,
 )
 async def list_articles(
     current_user: schemas.UserDB = Depends(deps.get_current_user(required=False)),
     limit: int = 20,
     offset: int = 0,
-    tag: Optional[str] = None,
+    tag: Optional[str] = Query(None, description=TAG_DESCRIPTION),
+    tag_match: str = Query("all", regex="^(all|any)$"),
     author: Optional[str] = None,
     favorited: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include_body: bool = True,
 ) -> schemas.MultipleArticlesInResponse:
-    article_dbs = await crud_article.get_all(
-        limit=limit, offset=offset, tag=tag, author=author, favorited=favorited
+    wanted = list_fields(fields, include_body)
+    article_dbs, count, approximate = await repository.articles.get_all_with_count(
+        limit=limit,
+        offset=offset,
+        tags=list_tags(tag),
+        any_tag=tag_match == "any",
+        author=author,
+        favorited=favorited,
+        columns=list_columns(wanted),
     )
-    articles = []
-    for article_db in article_dbs:
-        profile = await crud_profile.get_profile_by_user_id(
-            article_db.author_id, requested_user=current_user
-        )
-        tags = await crud_article.get_article_tags(article_db.id)
-        if current_user:
-            is_favorited = await crud_article.is_article_favorited_by_user(
-                article_db.id, current_user.id
-            )
-        else:
-            is_favorited = False
-        favorites_count = await crud_article.count_article_favorites(article_db.id)
-        article_for_reponse = schemas.ArticleForResponse(
-            slug=article_db.slug,
-            title=article_db.title,
-            description=article_db.description,
-            body=article_db.body,
-            createdAt=article_db.created_at,
-            updatedAt=article_db.updated_at,
-            author=profile,  # type: ignore
-            tagList=tags,
-            favorited=is_favorited,
-            favoritesCount=favorites_count,
-        )
-        articles.append(article_for_reponse)
-
+    articles = await articles_in_list(article_dbs, current_user, wanted)
     return schemas.MultipleArticlesInResponse(
-        articles=articles, articlesCount=len(articles)
+        articles=articles, articlesCount=count, articlesCountApproximate=approximate
     )
 
 
@@ -257,13 +359,13 @@ async def favorite_article(
     slug: str,
     current_user: schemas.UserDB = Depends(deps.get_current_user()),
 ) -> schemas.ArticleInResponse:
-    article = await crud_article.get_article_by_sluq(slug=slug)
+    article = await repository.articles.get_article_by_sluq(slug=slug)
     if article is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=SLUG_NOT_FOUND,
         )
-    await crud_article.favorite(article_id=article.id, user_id=current_user.id)
+    await repository.articles.favorite(article_id=article.id, user_id=current_user.id)
     return await get_article_response_by_slug(slug=slug, current_user=current_user)
 
 
@@ -277,11 +379,11 @@ async def unfavorite_article(
     slug: str,
     current_user: schemas.UserDB = Depends(deps.get_current_user()),
 ) -> schemas.ArticleInResponse:
-    article = await crud_article.get_article_by_sluq(slug=slug)
+    article = await repository.articles.get_article_by_sluq(slug=slug)
     if article is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=SLUG_NOT_FOUND,
         )
-    await crud_article.unfavorite(article_id=article.id, user_id=current_user.id)
+    await repository.articles.unfavorite(article_id=article.id, user_id=current_user.id)
     return await get_article_response_by_slug(slug=slug, current_user=current_user)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Body, HTTPException
 
 from app import schemas
 from app.core import security
-from app.crud import crud_user
+from app.crud.repository import repository
 
 router = APIRouter()
 
@@ -16,13 +16,13 @@ router = APIRouter()
 async def register(
     user_in: schemas.UserCreate = Body(..., embed=True, alias="user"),
 ) -> schemas.UserResponse:
-    user_db = await crud_user.get_user_by_email(email=user_in.email)
+    user_db = await repository.users.get_user_by_email(email=user_in.email)
     if user_db:
         raise HTTPException(
             status_code=400,
             detail="The user with this username already exists in the system.",
         )
-    user_id = await crud_user.create(user_in)
+    user_id = await repository.users.create(user_in)
 
     token = security.create_access_token(user_id)
     return schemas.UserResponse(
@@ -47,7 +47,7 @@ async def login(
         ..., embed=True, alias="user", name="Credentials to use"
     ),
 ) -> schemas.UserResponse:
-    user = await crud_user.authenticate(
+    user = await repository.users.authenticate(
         email=user_login.email, password=user_login.password
     )
     if not user:
@@ -0,0 +1,101 @@
+import asyncio
+import json
+from typing import Any, List, Optional
+from urllib.parse import urlsplit
+
+from fastapi import APIRouter, Body, Depends, Request
+from loguru import logger
+from starlette import status
+
+from app import schemas
+from app.api import deps
+from app.core.admission import EXEMPT_SCOPE_KEY
+from app.core.config import settings
+from app.db import database
+
+# Headers of the batch request passed on to its sub-requests.
+FORWARDED_HEADERS = {b"authorization", b"accept", b"user-agent"}
+
+# Scope keys of the batch request that sub-requests share.
+SHARED_SCOPE_KEYS = ("type", "asgi", "http_version", "scheme", "server", "client")
+
+router = APIRouter()
+
+
+@router.post(
+    "",
+    name="Run several requests at once",
+    description="Run GET sub-requests concurrently, with the authentication "
+    "of the batch request, and return their statuses and bodies in order. "
+    "Auth is optional",
+    response_model=schemas.BatchResponse,
+)
+async def batch(
+    request: Request,
+    batch_in: schemas.BatchRequest = Body(...),
+    current_user: Optional[schemas.UserDB] = Depends(
+        deps.get_current_user(required=False)
+    ),
+) -> schemas.BatchResponse:
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+    async def bounded(sub_request: schemas.SubRequest) -> schemas.SubResponse:
+        async with semaphore:
+            return await dispatch(request, sub_request.path, current_user)
+
+    responses = await asyncio.gather(*map(bounded, batch_in.requests))
+    return schemas.BatchResponse(responses=responses)
+
+
+async def dispatch(
+    request: Request, path: str, current_user: Optional[schemas.UserDB]
+) -> schemas.SubResponse:
+    """Run a GET sub-request through the whole app, middlewares included.
+
+    The user resolved for the batch is handed over in the request state, and
+    the sub-request runs in the batch's admission slot.
+    """
+    # Sub-requests run in tasks of their own: let them query concurrently.
+    database.use_new_connection()
+    url = urlsplit(path)
+    scope = {
+        **{
+            key: request.scope[key] for key in SHARED_SCOPE_KEYS if key in request.scope
+        },
+        "root_path": request.scope.get("root_path", ""),
+        "method": "GET",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": [
+            (name, value)
+            for name, value in request.scope["headers"]
+            if name in FORWARDED_HEADERS
+        ],
+        "state": {deps.CURRENT_USER: current_user},
+        EXEMPT_SCOPE_KEY: True,
+    }
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    chunks: List[bytes] = []
+
+    async def receive() -> Any:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Any) -> None:
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app(scope, receive, send)
+    except Exception:
+        # The app already sent its 500 response.
+        logger.exception("Batch sub-request GET {} failed", path)
+    body = b"".join(chunks)
+    try:
+        content = json.loads(body) if body else None
+    except ValueError:
+        content = body.decode(errors="replace")
+    return schemas.SubResponse(status=status_code, body=content)
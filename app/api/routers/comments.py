@@ -3,7 +3,7 @@ from starlette import status
 
 from app import schemas
 from app.api import deps
-from app.crud import crud_article, crud_comment, crud_profile
+from app.crud.repository import repository
 
 SLUG_NOT_FOUND = "article with this slug not found"
 
@@ -21,17 +21,17 @@ async def create_article_comment(
     comment_in: schemas.CommentInCreate = Body(..., embed=True, alias="comment"),
     current_user: schemas.UserDB = Depends(deps.get_current_user()),
 ) -> schemas.CommentInResponse:
-    article_db = await crud_article.get_article_by_sluq(slug=slug)
+    article_db = await repository.articles.get_article_by_sluq(slug=slug)
     if article_db is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=SLUG_NOT_FOUND,
         )
-    comment_id = await crud_comment.create(
+    comment_id = await repository.comments.create(
         payload=comment_in, article_id=article_db.id, author_id=current_user.id
     )
-    comment_db = await crud_comment.get(comment_id)  # type: ignore
-    profile = await crud_profile.get_profile_by_user_id(
+    comment_db = await repository.comments.get(comment_id)  # type: ignore
+    profile = await repository.profiles.get_profile_by_user_id(
         comment_db.author_id, requested_user=current_user  # type: ignore
     )
     return schemas.CommentInResponse(
@@ -55,29 +55,35 @@ async def get_comments_from_an_article(
     slug: str,
     current_user: schemas.UserDB = Depends(deps.get_current_user(required=False)),
 ) -> schemas.MultipleCommentsInResponse:
-    article_db = await crud_article.get_article_by_sluq(slug=slug)
+    article_db = await repository.articles.get_article_by_sluq(slug=slug)
     if article_db is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="article with this slug not found",
         )
-    comment_dbs = await crud_comment.get_comments_from_an_article(
-        article_id=article_db.id
+    comment_dbs = await repository.comments.get_comments_from_an_article(
+        article_id=article_db.id, since=article_db.created_at
     )
-    comments = []
-    for comment_db in comment_dbs:
-        profile = await crud_profile.get_profile_by_user_id(
-            comment_db.author_id, requested_user=current_user
-        )
-        comments.append(
-            schemas.CommentForResponse(
-                id=comment_db.id,
-                body=comment_db.body,
-                createdAt=comment_db.created_at,
-                updatedAt=comment_db.updated_at,
-                author=profile,  # type: ignore
-            )
+    # Authors' public profiles are shared by every viewer (and cached), the
+    # viewer only adds whom they follow among them.
+    author_ids = {comment_db.author_id for comment_db in comment_dbs}
+    profiles, following = await repository.gather(
+        repository.profiles.get_public_profiles(author_ids),
+        repository.profiles.following_ids(author_ids, current_user),
+    )
+    comments = [
+        schemas.CommentForResponse(
+            id=comment_db.id,
+            body=comment_db.body,
+            createdAt=comment_db.created_at,
+            updatedAt=comment_db.updated_at,
+            author=schemas.Profile(
+                **profiles[comment_db.author_id].dict(),
+                following=comment_db.author_id in following,
+            ),
         )
+        for comment_db in comment_dbs
+    ]
     return schemas.MultipleCommentsInResponse(comments=comments)
 
 
@@ -91,13 +97,13 @@ async def delete_comment_for_article(
     comment_id: int,
     current_user: schemas.UserDB = Depends(deps.get_current_user()),
 ) -> None:
-    article_db = await crud_article.get_article_by_sluq(slug=slug)
+    article_db = await repository.articles.get_article_by_sluq(slug=slug)
     if article_db is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=SLUG_NOT_FOUND,
         )
-    comment_db = await crud_comment.get(comment_id)
+    comment_db = await repository.comments.get(comment_id)
     if comment_db is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -113,4 +119,4 @@ async def delete_comment_for_article(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can not delete a comment is not belong to yourself",
         )
-    await crud_comment.delete(comment_id)
+    await repository.comments.delete(comment_id)
@@ -0,0 +1,46 @@
+from typing import Any, Dict, List
+
+from fastapi import APIRouter
+
+from app.core import query_budget, security
+from app.core.admission import admission
+from app.core.compression import compressor
+from app.core.invalidation import bus
+from app.core.slow_queries import slow_queries
+from app.core.tasks import worker
+from app.crud import crud_article_summary, crud_user
+
+router = APIRouter()
+
+
+@router.get(
+    "",
+    name="Get runtime metrics",
+    description="Get in-process runtime counters of this worker. Auth not required",
+    response_model=Dict[str, Any],
+)
+async def get_metrics() -> Dict[str, Any]:
+    return {
+        "tasks": worker.stats(),
+        "admission": admission.stats(),
+        "queries": query_budget.stats(),
+        "compression": compressor.stats(),
+        "invalidation": bus.stats(),
+        "slow_queries": slow_queries.stats(),
+        "verified_tokens": security.verified_tokens.stats(),
+        "users": crud_user.users_cache.stats(),
+        "counters": {
+            "favorites": crud_article_summary.favorites_counter.stats(),
+        },
+    }
+
+
+@router.get(
+    "/slow-queries",
+    name="Get slow queries",
+    description="Get the slow query shapes seen by this worker, slowest first, "
+    "with their EXPLAIN ANALYZE plan when captured. Auth not required",
+    response_model=List[Dict[str, Any]],
+)
+async def get_slow_queries() -> List[Dict[str, Any]]:
+    return slow_queries.queries()
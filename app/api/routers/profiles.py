@@ -1,9 +1,11 @@
+from typing import Optional, Tuple
+
 from fastapi import APIRouter, Depends, HTTPException
 from starlette import status
 
 from app import schemas
 from app.api import deps
-from app.crud import crud_profile, crud_user
+from app.crud.repository import repository
 
 FOLLOW_SOMETHING_WRONG = "you cannot follow this user because something wrong"
 
@@ -13,7 +15,7 @@ router = APIRouter()
 async def get_profile_response(
     username: str, requested_user: schemas.UserDB
 ) -> schemas.ProfileResponse:
-    profile = await crud_profile.get_profile_by_username(
+    profile = await repository.profiles.get_profile_by_username(
         username, requested_user=requested_user
     )
     if profile is None:
@@ -47,33 +49,34 @@ async def follow_user(
     username: str,
     requested_user: schemas.UserDB = Depends(deps.get_current_user()),
 ) -> schemas.ProfileResponse:
-    follower_user = await get_follow_user(
-        requested_user=requested_user, username=username
+    result = await repository.profiles.follow_by_username(username, requested_user)
+    _, profile, followed = check_follow_result(
+        result, requested_user=requested_user, action="follow"
     )
-    if await crud_profile.is_following(follower_user, requested_user):
+    if not followed:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="you follow this user already",
         )
-    await crud_profile.follow(follower_user, requested_user)
-    return await get_profile_response(requested_user=requested_user, username=username)
+    return schemas.ProfileResponse(profile=profile)
 
 
-async def get_follow_user(
-    username: str, requested_user: schemas.UserDB
-) -> schemas.UserDB:
-    follower_user = await crud_user.get_user_by_username(username=username)
-    if follower_user is None:
+def check_follow_result(
+    result: Optional[Tuple[int, schemas.Profile, bool]],
+    requested_user: schemas.UserDB,
+    action: str,
+) -> Tuple[int, schemas.Profile, bool]:
+    if result is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="user with this username is not existed",
         )
-    if follower_user.id == requested_user.id:
+    if result[0] == requested_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="cannot follow yourself",
+            detail=f"cannot {action} yourself",
         )
-    return follower_user
+    return result
 
 
 @router.delete(
@@ -86,22 +89,13 @@ async def unfollow_user(
     username: str,
     requested_user: schemas.UserDB = Depends(deps.get_current_user()),
 ) -> schemas.ProfileResponse:
-    follower_user = await crud_user.get_user_by_username(username=username)
-    if follower_user is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="user with this username is not existed",
-        )
-    if follower_user.id == requested_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="cannot unfollow yourself",
-        )
-    if not await crud_profile.is_following(follower_user, requested_user):
+    result = await repository.profiles.unfollow_by_username(username, requested_user)
+    _, profile, unfollowed = check_follow_result(
+        result, requested_user=requested_user, action="unfollow"
+    )
+    if not unfollowed:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="you don't follow this user already",
         )
-    await crud_profile.unfollow(follower_user, requested_user)
-    profile = await crud_profile.get_profile_by_username(username, requested_user)
-    return schemas.ProfileResponse(profile=profile)  # type: ignore
+    return schemas.ProfileResponse(profile=profile)
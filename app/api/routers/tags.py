@@ -2,7 +2,7 @@ from typing import Dict, List
 
 from fastapi import APIRouter
 
-from app.crud import crud_tag
+from app.crud.repository import repository
 
 router = APIRouter()
 
@@ -14,5 +14,5 @@ router = APIRouter()
     response_model=Dict[str, List[str]],
 )
 async def list_all_tags() -> Dict[str, List[str]]:
-    tags = await crud_tag.get_all_tags()
+    tags = await repository.tags.get_all_tags()
     return {"tags": tags}  # type: ignore
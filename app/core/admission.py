@@ -0,0 +1,187 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from loguru import logger
+from starlette import status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+OVERLOADED = "server is overloaded, retry later"
+
+AUTH_ROUTES = {("POST", "/api/users"), ("POST", "/api/users/login")}
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+READ_ROUTES = {("POST", "/api/batch")}
+
+EXEMPT_PATHS = {"/api/metrics", "/api/metrics/slow-queries"}
+
+# Set in the scope of sub-requests, which run in their batch's slot.
+EXEMPT_SCOPE_KEY = "admission.exempt"
+
+
+class Limiter:
+    """Cap in-flight requests, with a bounded FIFO queue of waiters.
+
+    A request is shed (``acquire`` returns False) when the queue is full,
+    when its expected wait, estimated from the moving average of service
+    times, is longer than ``timeout``, or when it actually waited that long.
+    """
+
+    def __init__(self, name: str, max_inflight: int, max_queue: int) -> None:
+        self.name = name
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.inflight = 0
+        self.waiters: Deque["asyncio.Future[None]"] = deque()
+        self.service_time = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+
+    def expected_wait(self) -> float:
+        return self.service_time * (len(self.waiters) + 1) / self.max_inflight
+
+    async def acquire(self, timeout: float) -> bool:
+        if self.inflight < self.max_inflight and not self.waiters:
+            self.inflight += 1
+            self.admitted += 1
+            return True
+        if len(self.waiters) >= self.max_queue or self.expected_wait() > timeout:
+            self.shed += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait([waiter], timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            self.shed += 1
+            return False
+        # release() handed its slot over, inflight is unchanged.
+        self.admitted += 1
+        return True
+
+    def release(self, elapsed: Optional[float] = None) -> None:
+        if elapsed is not None:
+            self.service_time = 0.9 * self.service_time + 0.1 * elapsed
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.inflight -= 1
+
+    def _abandon(self, waiter: "asyncio.Future[None]") -> None:
+        if waiter.done() and not waiter.cancelled():
+            # Got a slot while being cancelled: pass it on.
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "inflight": self.inflight,
+            "waiting": len(self.waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+            "service_time": round(self.service_time, 6),
+        }
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_inflight: int = settings.ADMISSION_MAX_INFLIGHT,
+        max_inflight_auth: int = settings.ADMISSION_MAX_INFLIGHT_AUTH,
+        max_inflight_read: int = settings.ADMISSION_MAX_INFLIGHT_READ,
+        max_inflight_write: int = settings.ADMISSION_MAX_INFLIGHT_WRITE,
+        max_queue: int = settings.ADMISSION_MAX_QUEUE,
+        timeout: float = settings.ADMISSION_QUEUE_TIMEOUT,
+    ) -> None:
+        self.timeout = timeout
+        self.total = Limiter("total", max_inflight, max_queue)
+        self.limiters = {
+            "auth": Limiter("auth", max_inflight_auth, max_queue),
+            "read": Limiter("read", max_inflight_read, max_queue),
+            "write": Limiter("write", max_inflight_write, max_queue),
+        }
+
+    @staticmethod
+    def route_class(method: str, path: str) -> str:
+        if (method, path.rstrip("/")) in AUTH_ROUTES:
+            return "auth"
+        if method in READ_METHODS or (method, path.rstrip("/")) in READ_ROUTES:
+            return "read"
+        return "write"
+
+    async def admit(self, method: str, path: str) -> Optional[Limiter]:
+        """Take a slot of the route class and of the global limit.
+
+        Return the route class limiter to release, or None if shed.
+        """
+        limiter = self.limiters[self.route_class(method, path)]
+        deadline = time.monotonic() + self.timeout
+        if not await limiter.acquire(self.timeout):
+            return None
+        if not await self.total.acquire(max(deadline - time.monotonic(), 0)):
+            limiter.release()
+            return None
+        return limiter
+
+    def release(self, limiter: Limiter, elapsed: float) -> None:
+        self.total.release(elapsed)
+        limiter.release(elapsed)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {name: limiter.stats() for name, limiter in self.limiters.items()}
+        stats["total"] = self.total.stats()
+        return stats
+
+
+class AdmissionControlMiddleware:
+    """Fail fast with 503 and ``Retry-After`` instead of queueing unboundedly."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] in EXEMPT_PATHS
+            or scope.get(EXEMPT_SCOPE_KEY)
+        ):
+            await self.app(scope, receive, send)
+            return
+        limiter = await self.controller.admit(scope["method"], scope["path"])
+        if limiter is None:
+            logger.warning("Shed {} {}", scope["method"], scope["path"])
+            response = JSONResponse(
+                {"detail": OVERLOADED},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(limiter, time.monotonic() - start)
+
+
+admission = AdmissionController()
@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Size-bounded LRU cache with an optional TTL and hit/miss counters.
+
+    ``version`` grows on every invalidation: a value read from storage may
+    only be cached if the version did not change meanwhile, see
+    ``set_if_unchanged``. Not thread-safe; meant to be used from a single
+    event loop.
+    """
+
+    def __init__(self, max_size: int, ttl: Optional[float] = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.version = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, count=False) is not None
+
+    def get(self, key: Hashable, count: bool = True) -> Optional[V]:
+        item = self._data.get(key)
+        if item is not None and self.ttl is not None and item[0] < time.monotonic():
+            del self._data[key]
+            item = None
+        if item is None:
+            if count:
+                self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        if count:
+            self.hits += 1
+        return item[1]
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else float("inf")
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def set_if_unchanged(self, key: Hashable, value: V, version: int) -> None:
+        """Cache ``value``, read when the cache was at ``version``, unless an
+        invalidation happened since: it may predate the change."""
+        if version == self.version:
+            self.set(key, value)
+
+    def delete(self, key: Hashable) -> None:
+        self.version += 1
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self.version += 1
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+from typing import Callable, Dict, List, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def get_compressors(level: int) -> Dict[str, Callable[[bytes], bytes]]:
+    """Available encodings, in order of preference."""
+    compressors: Dict[str, Callable[[bytes], bytes]] = {}
+    if brotli is not None and settings.COMPRESSION_BROTLI:
+        compressors["br"] = lambda body: brotli.compress(body, quality=min(level, 11))
+    compressors["gzip"] = lambda body: gzip.compress(body, compresslevel=level, mtime=0)
+    return compressors
+
+
+class Compressor:
+    """Compress bodies with brotli or gzip, caching the result.
+
+    Compressed bodies are kept in an LRU keyed by the digest of the
+    uncompressed body, so popular pages are compressed once and only hashed
+    afterwards.
+    """
+
+    def __init__(
+        self,
+        level: int = settings.COMPRESSION_LEVEL,
+        cache_size: int = settings.COMPRESSION_CACHE_SIZE,
+    ) -> None:
+        self.compressors = get_compressors(level)
+        self.cache: LRUCache[bytes] = LRUCache(max_size=cache_size)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = {
+            part.split(";")[0].strip()
+            for part in accept_encoding.lower().split(",")
+            if not part.replace(" ", "").endswith("q=0")
+        }
+        for encoding in self.compressors:
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = self.compressors[encoding](body)
+            self.cache.set(key, compressed)
+        self.bytes_in += len(body)
+        self.bytes_out += len(compressed)
+        return compressed
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.cache.stats(),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+
+class CompressionMiddleware:
+    """Compress single-body responses of the configured content types that
+    are at least ``minimum_size`` bytes."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        compressor: Compressor,
+        minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE,
+        content_types: Sequence[str] = settings.COMPRESSION_CONTENT_TYPES,
+    ) -> None:
+        self.app = app
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+        self.content_types = tuple(content_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.compressor.choose_encoding(
+            Headers(scope=scope).get("accept-encoding", "")
+        )
+        start: List[Message] = []
+
+        async def send_compressed(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.append(message)
+                return
+            if message["type"] != "http.response.body" or not start:
+                await send(message)
+                return
+            start_message = start.pop()
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if "content-encoding" in headers or not headers.get(
+                "content-type", ""
+            ).startswith(self.content_types):
+                await send(start_message)
+                await send(message)
+                return
+            # Compressed or not, the response depends on Accept-Encoding.
+            headers.add_vary_header("Accept-Encoding")
+            if (
+                encoding is None
+                or message.get("more_body", False)
+                or len(body) < self.minimum_size
+            ):
+                await send(start_message)
+                await send(message)
+                return
+            body = self.compressor.compress(encoding, body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+compressor = Compressor()
@@ -1,5 +1,5 @@
 import secrets
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseSettings, PostgresDsn, validator
 
@@ -10,24 +10,129 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # "jose" (python-jose), or "pyjwt" when the pyjwt extra is installed
+    JWT_BACKEND: str = "jose"
+    # Verified access tokens kept per worker, until they expire
+    TOKEN_CACHE_SIZE: int = 10000
+    # Password hashing: new hashes use the first scheme; hashes in the other
+    # schemes, or below the current cost, are upgraded on login
+    PASSWORD_HASH_SCHEMES: List[str] = ["bcrypt"]
+    # Cost (rounds) of new hashes; unset, it is calibrated on startup to the
+    # highest one hashing within the target time, never below the minimum
+    # (passlib's default cost when unset)
+    PASSWORD_HASH_ROUNDS: Optional[int] = None
+    PASSWORD_HASH_TARGET_MS: float = 250.0
+    PASSWORD_HASH_MIN_ROUNDS: Optional[int] = None
     POSTGRES_SERVER: str = "127.0.0.1"
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "realworld"
+    # Appended to the test database name, e.g. "_gw0" per pytest-xdist worker
+    TEST_DB_SUFFIX: str = ""
     SQLALCHEMY_DATABASE_URI: Optional[PostgresDsn] = None
+    # "postgres", or "memory" to benchmark the API layer without a database
+    STORAGE_BACKEND: str = "postgres"
+    # Database time limits, in milliseconds
+    STATEMENT_TIMEOUT_MS: int = 5000
+    # Overrides per crud function, e.g. {"crud_article.get_all": 2000}
+    STATEMENT_TIMEOUTS: Dict[str, int] = {
+        "crud_article.get_all": 2000,
+        "crud_article.feed": 2000,
+    }
+    REQUEST_DB_BUDGET_MS: int = 10000
+    # Pooled connections a request may use at once for independent reads
+    REQUEST_DB_CONCURRENCY: int = 3
+    # Slow query log; SLOW_QUERY_EXPLAIN also EXPLAIN ANALYZEs the first query
+    # of each shape (never in production: it runs the query a second time)
+    SLOW_QUERY_MS: int = 200
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_MAX_SHAPES: int = 500
+    # Response compression
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 6
+    COMPRESSION_BROTLI: bool = True  # used when the brotli package is installed
+    COMPRESSION_CONTENT_TYPES: List[str] = ["application/json", "text/"]
+    COMPRESSION_CACHE_SIZE: int = 256
+    # Article list totals: exact up to the limit, cached/estimated above it
+    ARTICLE_COUNT_EXACT_LIMIT: int = 1000
+    ARTICLE_COUNT_CACHE_SIZE: int = 10000
+    ARTICLE_COUNT_CACHE_TTL: float = 60.0
+    # Feeds of users following at least this many authors merge each author's
+    # newest articles (LATERAL) instead of sorting all of their articles
+    FEED_MERGE_MIN_FOLLOWS: int = 100
+    # User rows cached per worker, by id and by username
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: float = 60.0
+    # Public profiles (username, bio, image) cached per worker
+    PROFILE_CACHE_SIZE: int = 10000
+    PROFILE_CACHE_TTL: float = 300.0
+    # Cross-worker cache invalidation (LISTEN/NOTIFY)
+    INVALIDATION_CHANNEL: str = "cache_invalidation"
+    INVALIDATION_RECONNECT_DELAY: float = 1.0
+    # Favorite counts: buffered increments, flushed every interval (seconds)
+    # or once this many are pending
+    COUNTER_FLUSH_INTERVAL: float = 0.5
+    COUNTER_FLUSH_THRESHOLD: int = 1000
+    # POST /api/batch: GET sub-requests per batch, and how many run at once
+    BATCH_MAX_REQUESTS: int = 20
+    BATCH_CONCURRENCY: int = 4
+    # Monthly partitions of articles and comments created ahead on startup
+    PARTITION_MONTHS_AHEAD: int = 3
+    # Background task worker
+    TASK_QUEUE_MAXSIZE: int = 1000
+    TASK_QUEUE_CONCURRENCY: int = 2
+    TASK_MAX_RETRIES: int = 3
+    TASK_RETRY_DELAY: float = 0.1
+    TASK_SHUTDOWN_TIMEOUT: float = 10.0
+    # Admission control: in-flight caps per route class and overall
+    ADMISSION_MAX_INFLIGHT: int = 100
+    ADMISSION_MAX_INFLIGHT_AUTH: int = 10
+    ADMISSION_MAX_INFLIGHT_READ: int = 80
+    ADMISSION_MAX_INFLIGHT_WRITE: int = 20
+    ADMISSION_MAX_QUEUE: int = 200
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+    ADMISSION_RETRY_AFTER: int = 1
+    # Production server, see app/gunicorn_conf.py
+    SERVER_HOST: str = "0.0.0.0"  # nosec
+    SERVER_PORT: int = 80
+    WEB_CONCURRENCY: Optional[int] = None
+    WORKERS_PER_CORE: float = 1.0
+    MAX_WORKERS: Optional[int] = None
+    SERVER_LOOP: str = "auto"  # auto picks uvloop when installed
+    SERVER_HTTP: str = "auto"  # auto picks httptools when installed
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE: int = 5
+    SERVER_TIMEOUT: int = 60
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_MAX_REQUESTS: int = 10000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
 
     @validator("SQLALCHEMY_DATABASE_URI", pre=True)
     def assemble_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
         if isinstance(v, str):
             return v
-        db_prefix = "test_" if values.get("TESTING") else ""
+        db_name = values.get("POSTGRES_DB") or ""
+        if values.get("TESTING"):
+            db_name = f"test_{db_name}{values.get('TEST_DB_SUFFIX') or ''}"
         return PostgresDsn.build(
             scheme="postgresql",
             user=values.get("POSTGRES_USER"),
             password=values.get("POSTGRES_PASSWORD"),
             host=values.get("POSTGRES_SERVER"),
-            path=f"/{db_prefix}{values.get('POSTGRES_DB') or ''}",
+            path=f"/{db_name}",
         )
 
+    @validator(
+        "ADMISSION_MAX_INFLIGHT",
+        "ADMISSION_MAX_INFLIGHT_AUTH",
+        "ADMISSION_MAX_INFLIGHT_READ",
+        "ADMISSION_MAX_INFLIGHT_WRITE",
+    )
+    def positive_inflight(cls, v: int) -> int:
+        # A cap of 0 would admit nothing and divide Retry-After by zero.
+        if v < 1:
+            raise ValueError("must be at least 1")
+        return v
+
 
 settings = Settings()
@@ -0,0 +1,134 @@
+import asyncio
+from typing import Dict, Iterable, Optional
+
+from loguru import logger
+from sqlalchemy import Column, Integer, Table, cast, column, literal
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.sql.expression import Update, values  # type: ignore[attr-defined]
+
+from app.core.config import settings
+from app.db import database
+
+
+class CounterBuffer:
+    """Coalesce increments of an integer column, keyed by the table's ``id``.
+
+    ``add`` accumulates deltas in memory; they are written in one
+    ``UPDATE ... FROM (VALUES ...)`` statement every ``interval`` seconds, or
+    as soon as ``threshold`` increments are pending. ``pending`` lets reads
+    include what this worker has not written yet, or is still writing. Until
+    ``start`` (scripts, tests) every increment is written at once.
+
+    With ``source``, the counter's true value for a row of ``table`` (a
+    correlated subquery), a flush recomputes the changed rows from it instead
+    of adding the deltas: flushes are idempotent, so a row recomputed
+    meanwhile (by a rebuild, or another worker's flush) is not counted twice.
+    """
+
+    def __init__(
+        self,
+        table: Table,
+        counter: "Column[int]",
+        source: "Optional[ColumnElement[int]]" = None,
+        interval: float = settings.COUNTER_FLUSH_INTERVAL,
+        threshold: int = settings.COUNTER_FLUSH_THRESHOLD,
+    ) -> None:
+        self.table = table
+        self.counter = counter
+        self.source = source
+        self.interval = interval
+        self.threshold = threshold
+        self.deltas: Dict[int, int] = {}
+        # Deltas of the flush being written, still pending until it succeeds.
+        self.in_flight: Dict[int, int] = {}
+        self.increments = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+        self._lock = asyncio.Lock()
+        self._flusher: Optional["asyncio.Task[None]"] = None
+
+    def pending(self, key: int) -> int:
+        return self.deltas.get(key, 0) + self.in_flight.get(key, 0)
+
+    def discard(self, keys: Iterable[int]) -> None:
+        """Forget pending deltas of rows that were just recomputed."""
+        for key in keys:
+            self.deltas.pop(key, None)
+            self.in_flight.pop(key, None)
+
+    async def add(self, key: int, delta: int = 1) -> None:
+        self.deltas[key] = self.deltas.get(key, 0) + delta
+        self.increments += 1
+        if self._flusher is None or self.increments >= self.threshold:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            deltas = {key: delta for key, delta in self.deltas.items() if delta}
+            self.in_flight = deltas
+            self.deltas = {}
+            self.increments = 0
+            if not deltas:
+                return
+            try:
+                await database.execute(query=self._update(deltas))
+            except Exception:
+                # Keep the increments for the next flush.
+                for key, delta in self.in_flight.items():
+                    self.deltas[key] = self.deltas.get(key, 0) + delta
+                self.failures += 1
+                raise
+            finally:
+                self.in_flight = {}
+            self.flushes += 1
+            self.rows_written += len(deltas)
+
+    def _update(self, deltas: Dict[int, int]) -> Update:
+        if self.source is not None:
+            return (
+                self.table.update()
+                .where(self.table.c.id.in_(list(deltas)))
+                .values({self.counter: self.source})
+            )
+        rows = values(
+            column("id", Integer), column("delta", Integer), name="deltas"
+        ).data(
+            [
+                (cast(literal(key), Integer), cast(literal(delta), Integer))
+                for key, delta in deltas.items()
+            ]
+        )
+        return (
+            self.table.update()
+            .where(self.table.c.id == rows.c.id)
+            .values({self.counter: self.counter + rows.c.delta})
+        )
+
+    async def start(self) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Failed to flush {}", self.counter)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending_rows": len(self.deltas),
+            "pending_increments": self.increments,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failures": self.failures,
+        }
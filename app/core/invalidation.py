@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Dict, Hashable, List, Optional
+
+import asyncpg
+from loguru import logger
+from sqlalchemy import Integer, String, Text, cast, func, literal
+from sqlalchemy.sql.expression import ColumnElement
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db import database
+
+# Cache names published by the crud write paths, and their keys:
+#   "articles": article id, "users" and "profiles": user id and username,
+#   "follows": follower id, "favorites": (article id, user id)
+
+# NOTIFY payloads must stay under 8000 bytes, envelope included.
+MAX_KEYS_SIZE = 7500
+
+
+def _sql_value(value: Any) -> ColumnElement[Any]:
+    """A key as a typed SQL expression (json_build_array needs types)."""
+    if isinstance(value, ColumnElement):
+        return value
+    if isinstance(value, tuple):
+        return func.json_build_array(*map(_sql_value, value))
+    if isinstance(value, int):
+        return cast(literal(value), Integer)
+    return cast(literal(value), String)
+
+
+def _decode_key(key: Any) -> Hashable:
+    if isinstance(key, list):
+        return tuple(_decode_key(part) for part in key)
+    return key
+
+
+class InvalidationBus:
+    """Invalidate in-process caches of every worker through LISTEN/NOTIFY.
+
+    Caches are registered under a name. ``publish`` drops keys from the local
+    cache at once and sends them with ``pg_notify``, inside the current
+    transaction if any, so other workers drop them after commit; ``notify``
+    sends them with the write statement itself. Each worker listens over a
+    dedicated connection. Notifications sent while it is disconnected are
+    lost, so every (re)connect clears all registered caches.
+    """
+
+    def __init__(
+        self,
+        channel: str = settings.INVALIDATION_CHANNEL,
+        reconnect_delay: float = settings.INVALIDATION_RECONNECT_DELAY,
+    ) -> None:
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.caches: Dict[str, LRUCache[Any]] = {}
+        self.connected = False
+        self.published = 0
+        self.received = 0
+        self.flushes = 0
+        self.reconnects = 0
+        self._listener: Optional["asyncio.Task[None]"] = None
+        self._started = asyncio.Event()
+
+    def register(self, name: str, cache: LRUCache[Any]) -> LRUCache[Any]:
+        self.caches[name] = cache
+        return cache
+
+    async def publish(self, name: str, *keys: Hashable) -> None:
+        if name not in self.caches:
+            # Every worker runs the same code: nobody caches this.
+            return
+        self.drop(name, *keys)
+        for payload in self._payloads(name, list(keys)):
+            await database.execute(
+                query="SELECT pg_notify(:channel, :payload)",
+                values={"channel": self.channel, "payload": payload},
+            )
+            self.published += 1
+
+    def notify(self, name: str, *keys: Any) -> List[ColumnElement[Any]]:
+        """``pg_notify`` calls publishing ``keys``, to add to the RETURNING
+        clause of the write itself instead of a round trip of their own.
+
+        Keys are values or columns of the written row, a handful of them:
+        no payload splitting. Drop the keys from the local cache with
+        ``drop`` once the write returned.
+        """
+        if name not in self.caches:
+            return []
+        self.published += 1
+        notify = func.pg_notify(
+            _sql_value(self.channel), self._sql_payload(name, list(keys))
+        )
+        return [notify.label(f"notify_{name}")]
+
+    def drop(self, name: str, *keys: Hashable) -> None:
+        """Drop keys from the local cache only."""
+        cache = self.caches.get(name)
+        if cache is None:
+            return
+        for key in keys:
+            cache.delete(key)
+
+    def _payloads(self, name: str, keys: List[Hashable]) -> List[str]:
+        """Split keys into payloads that fit NOTIFY, or ask for a flush."""
+        batches: List[List[Hashable]] = [[]]
+        size = 0
+        for key in keys:
+            key_size = len(json.dumps(key)) + 2
+            if key_size > MAX_KEYS_SIZE:
+                return [self._payload(name, flush=True)]
+            if size + key_size > MAX_KEYS_SIZE:
+                batches.append([])
+                size = 0
+            batches[-1].append(key)
+            size += key_size
+        return [self._payload(name, keys=batch) for batch in batches]
+
+    def _payload(self, name: str, **message: Any) -> str:
+        return json.dumps({"origin": self.origin, "cache": name, **message})
+
+    def _sql_payload(self, name: str, keys: List[Any]) -> ColumnElement[Any]:
+        """``_payload`` built by Postgres, for keys that are columns."""
+        payload = func.json_build_object(
+            _sql_value("origin"),
+            _sql_value(self.origin),
+            _sql_value("cache"),
+            _sql_value(name),
+            _sql_value("keys"),
+            func.json_build_array(*map(_sql_value, keys)),
+        )
+        return cast(payload, Text)
+
+    def handle(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Invalid invalidation payload: {}", payload)
+            return
+        if message.get("origin") == self.origin:
+            return
+        self.received += 1
+        cache = self.caches.get(message.get("cache"))
+        if cache is None:
+            return
+        if message.get("flush"):
+            cache.clear()
+            return
+        for key in message.get("keys", []):
+            cache.delete(_decode_key(key))
+
+    def flush(self) -> None:
+        for cache in self.caches.values():
+            cache.clear()
+        self.flushes += 1
+
+    async def start(self) -> None:
+        """Start listening; return once the first connection attempt is over,
+        so that its flush cannot clear caches filled by the first requests."""
+        if self._listener is None:
+            self._started = asyncio.Event()
+            self._listener = asyncio.create_task(self._listen())
+            await self._started.wait()
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                await self._listen_once()
+                logger.warning("Invalidation listener connection lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Invalidation listener failed: {}", exc)
+            self._started.set()
+            self.reconnects += 1
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _listen_once(self) -> None:
+        """Listen until the connection is lost."""
+        connection = await asyncpg.connect(str(settings.SQLALCHEMY_DATABASE_URI))
+        closed: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+
+        def on_close(_connection: Any) -> None:
+            if not closed.done():
+                closed.set_result(None)
+
+        connection.add_termination_listener(on_close)
+        try:
+            await connection.add_listener(
+                self.channel, lambda *args: self.handle(args[-1])
+            )
+            self.connected = True
+            # Anything published before this point may have been missed.
+            self.flush()
+            self._started.set()
+            await closed
+        finally:
+            self.connected = False
+            if not connection.is_closed():
+                await connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "caches": sorted(self.caches),
+            "published": self.published,
+            "received": self.received,
+            "flushes": self.flushes,
+            "reconnects": self.reconnects,
+        }
+
+
+bus = InvalidationBus()
@@ -0,0 +1,98 @@
+import sys
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+
+BUDGET_EXCEEDED = "request exceeded its database time budget"
+
+QUERY_TIMED_OUT = "database query timed out"
+
+CRUD_PACKAGE = "app.crud."
+
+_current_budget: ContextVar[Optional["QueryBudget"]] = ContextVar(
+    "query_budget", default=None
+)
+
+timeouts: "Counter[str]" = Counter()
+budgets_exceeded: "Counter[str]" = Counter()
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, spent: float, budget: float) -> None:
+        super().__init__(f"spent {spent * 1000:.0f} ms of {budget * 1000:.0f} ms")
+        self.spent = spent
+        self.budget = budget
+
+
+class QueryBudget:
+    """Cumulative time a request may spend waiting on the database."""
+
+    def __init__(self, budget_ms: int, path: str = "") -> None:
+        self.budget = budget_ms / 1000
+        self.path = path
+        self.spent = 0.0
+        self.queries = 0
+
+    def check(self) -> None:
+        if self.spent > self.budget:
+            budgets_exceeded[self.path] += 1
+            raise QueryBudgetExceeded(self.spent, self.budget)
+
+    def add(self, elapsed: float) -> None:
+        self.spent += elapsed
+        self.queries += 1
+
+
+def current_budget() -> Optional[QueryBudget]:
+    return _current_budget.get()
+
+
+def crud_caller() -> Optional[str]:
+    """Name of the nearest ``app.crud`` function on the stack, e.g.
+    ``crud_article.get_all``."""
+    frame: Any = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(CRUD_PACKAGE):
+            return f"{module[len(CRUD_PACKAGE):]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def statement_timeout(caller: Optional[str]) -> Optional[int]:
+    """Per crud function override of the connection's statement_timeout."""
+    if caller is None:
+        return None
+    return settings.STATEMENT_TIMEOUTS.get(caller)
+
+
+def record_timeout(caller: Optional[str], query: Any) -> None:
+    timeouts[caller or "unknown"] += 1
+    logger.warning("Query timed out in {}: {}", caller, str(query).replace("\n", " "))
+
+
+def stats() -> Dict[str, Dict[str, int]]:
+    return {"timeouts": dict(timeouts), "budgets_exceeded": dict(budgets_exceeded)}
+
+
+class QueryBudgetMiddleware:
+    """Give every HTTP request a fresh database time budget."""
+
+    def __init__(self, app: ASGIApp, budget_ms: int) -> None:
+        self.app = app
+        self.budget_ms = budget_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_budget.set(QueryBudget(self.budget_ms, scope["path"]))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_budget.reset(token)
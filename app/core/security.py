@@ -1,18 +1,146 @@
+import hashlib
+import math
+import secrets
+import statistics
+import time
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional, Protocol, Type, Union
 
 from fastapi import HTTPException
-from jose import jwt
-from passlib.context import CryptContext
 from pydantic import SecretStr, ValidationError
 from starlette import status
 
+from app.core.cache import LRUCache
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
 
 ALGORITHM = "HS256"
 
+# User ids of verified access tokens, keyed by the token's digest.
+verified_tokens: LRUCache[str] = LRUCache(max_size=settings.TOKEN_CACHE_SIZE)
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class JWTBackend(Protocol):
+    def encode(self, claims: Dict[str, Any], key: str) -> str:
+        ...
+
+    def decode(self, token: str, key: str) -> Dict[str, Any]:
+        """Verified claims of ``token``; raises ``InvalidToken``."""
+        ...
+
+
+# python-jose, pyjwt and passlib are imported on first use to keep app
+# startup fast.
+class JoseBackend:
+    def encode(self, claims: Dict[str, Any], key: str) -> str:
+        from jose import jwt
+
+        return jwt.encode(claims, key, algorithm=ALGORITHM)
+
+    def decode(self, token: str, key: str) -> Dict[str, Any]:
+        from jose import jwt
+
+        try:
+            return jwt.decode(token, key, algorithms=ALGORITHM)
+        except jwt.JWTError as exc:
+            raise InvalidToken(str(exc)) from exc
+
+
+class PyJWTBackend:
+    def encode(self, claims: Dict[str, Any], key: str) -> str:
+        import jwt
+
+        return jwt.encode(claims, key, algorithm=ALGORITHM)
+
+    def decode(self, token: str, key: str) -> Dict[str, Any]:
+        import jwt
+
+        try:
+            return jwt.decode(token, key, algorithms=[ALGORITHM])
+        except jwt.PyJWTError as exc:
+            raise InvalidToken(str(exc)) from exc
+
+
+JWT_BACKENDS: Dict[str, Type[JWTBackend]] = {"jose": JoseBackend, "pyjwt": PyJWTBackend}
+
+
+@lru_cache()
+def get_jwt_backend(name: str = settings.JWT_BACKEND) -> JWTBackend:
+    if name not in JWT_BACKENDS:
+        raise ValueError(f"Unknown JWT backend: {name}")
+    return JWT_BACKENDS[name]()
+
+
+# Cost of new password hashes picked by calibrate_password_hash, from the
+# median duration of this many hashes.
+_calibrated_rounds: Optional[int] = None
+CALIBRATION_SAMPLES = 5
+
+
+@lru_cache()
+def get_pwd_context() -> "CryptContext":
+    from passlib.context import CryptContext
+
+    schemes = settings.PASSWORD_HASH_SCHEMES
+    rounds = settings.PASSWORD_HASH_ROUNDS or _calibrated_rounds
+    options = {}
+    if rounds is not None:
+        # Hashes below the cost of new ones need an update.
+        options = {
+            f"{schemes[0]}__default_rounds": rounds,
+            f"{schemes[0]}__min_rounds": rounds,
+        }
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+def calibrate_password_hash(
+    target_ms: float = settings.PASSWORD_HASH_TARGET_MS,
+    samples: int = CALIBRATION_SAMPLES,
+) -> Optional[int]:
+    """Pick the highest cost of the hash scheme that hashes within ``target_ms``.
+
+    Times ``samples`` hashes at the scheme's default cost and extrapolates
+    from the median, the cost being exponential (bcrypt) or linear (pbkdf2,
+    argon2) in rounds. Never goes below ``PASSWORD_HASH_MIN_ROUNDS``, or the
+    passlib default when unset: a slow or busy host only keeps the default.
+    ``PASSWORD_HASH_ROUNDS``, when set, wins. Returns the cost in use, ``None``
+    for schemes without one.
+    """
+    from passlib.registry import get_crypt_handler
+
+    global _calibrated_rounds
+    if settings.PASSWORD_HASH_ROUNDS is not None:
+        return settings.PASSWORD_HASH_ROUNDS
+    handler = get_crypt_handler(settings.PASSWORD_HASH_SCHEMES[0])
+    if "rounds" not in handler.setting_kwds:
+        return None
+    rounds = handler.default_rounds
+    hasher = handler.using(rounds=rounds)
+    durations = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash(secrets.token_hex(8))
+        durations.append(time.perf_counter() - start)
+    ratio = target_ms / 1000 / statistics.median(durations)
+    if handler.rounds_cost == "log2":
+        rounds += math.floor(math.log2(ratio))
+    else:
+        rounds = math.floor(rounds * ratio)
+    floor = settings.PASSWORD_HASH_MIN_ROUNDS or handler.default_rounds
+    rounds = max(rounds, floor, handler.min_rounds)
+    if handler.max_rounds is not None:
+        rounds = min(rounds, handler.max_rounds)
+    _calibrated_rounds = rounds
+    get_pwd_context.cache_clear()
+    return rounds
+
 
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
@@ -24,25 +152,42 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = get_jwt_backend().encode(to_encode, settings.SECRET_KEY)
     return encoded_jwt
 
 
 def get_user_id_from_token(token: str) -> str:
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=ALGORITHM)
-        user_id = payload.get("sub", None)
+    """User id of a valid access token.
+
+    Verified tokens are cached until they expire, so a token presented again
+    is only hashed. Tokens without an expiry are verified every time.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    user_id = verified_tokens.get(key)
+    if user_id is not None:
         return user_id
-    except (jwt.JWTError, ValidationError) as exc:
+    try:
+        payload = get_jwt_backend().decode(token, settings.SECRET_KEY)
+        user_id = payload["sub"]
+    except (InvalidToken, ValidationError, KeyError) as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         ) from exc
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        verified_tokens.set(key, user_id, ttl=expires_in)
+    return user_id
 
 
 def verify_password(plain_password: SecretStr, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password.get_secret_value(), hashed_password)
+    return get_pwd_context().verify(plain_password.get_secret_value(), hashed_password)
 
 
 def get_password_hash(password: SecretStr) -> str:
-    return pwd_context.hash(password.get_secret_value())
+    return get_pwd_context().hash(password.get_secret_value())
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a verified hash uses an old scheme or a lower cost."""
+    return get_pwd_context().needs_update(hashed_password)
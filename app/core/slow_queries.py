@@ -0,0 +1,130 @@
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import ClauseElement
+
+from app.core.config import settings
+
+SENSITIVE = re.compile(r"password|token|secret|email", re.IGNORECASE)
+
+MAX_VALUE_LENGTH = 64
+
+_dialect = postgresql.dialect(paramstyle="named")
+
+# text() reads ":name::TYPE" as a literal colon: keep a space before the cast.
+PARAM_CAST = re.compile(r"(:\w+)::")
+
+
+def compile_query(
+    query: Any, values: Optional[Dict[str, Any]]
+) -> Tuple[str, Dict[str, Any]]:
+    """SQL with ``:name`` placeholders, and its parameters."""
+    if isinstance(query, str):
+        query = text(query).bindparams(**(values or {}))
+    compiled = query.compile(
+        dialect=_dialect, compile_kwargs={"render_postcompile": True}
+    )
+    return PARAM_CAST.sub(r"\1 ::", str(compiled)), dict(compiled.params)
+
+
+IN_LIST = re.compile(r"\(\s*:\w+(?:\s*,\s*:\w+)*\s*\)")
+
+
+def shape(sql: str) -> str:
+    """Fingerprint of a statement, the same whatever its parameters."""
+    normalized = IN_LIST.sub("(...)", " ".join(sql.split()))
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+def redact(params: Dict[str, Any]) -> Dict[str, Any]:
+    redacted = {}
+    for name, value in params.items():
+        if SENSITIVE.search(name):
+            value = "***"
+        elif isinstance(value, (str, bytes)) and len(value) > MAX_VALUE_LENGTH:
+            value = f"{value[:MAX_VALUE_LENGTH]!r}... ({len(value)})"
+        redacted[name] = value
+    return redacted
+
+
+class SlowQueryLog:
+    """Log queries slower than ``threshold_ms``, by crud function.
+
+    With ``explain`` set, the first occurrence of each query shape is run
+    again under ``EXPLAIN (ANALYZE, BUFFERS)`` in a rolled back transaction
+    (writes included) and the plan is kept with its statistics.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: int = settings.SLOW_QUERY_MS,
+        explain: bool = settings.SLOW_QUERY_EXPLAIN,
+        max_shapes: int = settings.SLOW_QUERY_MAX_SHAPES,
+    ) -> None:
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.max_shapes = max_shapes
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def is_slow(self, elapsed: float) -> bool:
+        return elapsed >= self.threshold
+
+    def record(
+        self,
+        query: Any,
+        values: Optional[Dict[str, Any]],
+        elapsed: float,
+        caller: Optional[str],
+    ) -> Optional[Tuple[str, ClauseElement]]:
+        """Log a slow query. Return the shape and the statement to explain
+        if it is the first of its shape and plans are captured."""
+        try:
+            sql, params = compile_query(query, values)
+        except Exception:
+            sql, params = str(query), dict(values or {})
+        key = shape(sql)
+        logger.warning(
+            "Slow query ({:.0f} ms) in {}: {} {}",
+            elapsed * 1000,
+            caller,
+            " ".join(sql.split()),
+            redact(params),
+        )
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry["count"] += 1
+            entry["max_ms"] = max(entry["max_ms"], round(elapsed * 1000, 1))
+            return None
+        if len(self.entries) >= self.max_shapes:
+            return None
+        self.entries[key] = {
+            "shape": key,
+            "caller": caller,
+            "sql": " ".join(sql.split()),
+            "count": 1,
+            "max_ms": round(elapsed * 1000, 1),
+            "plan": None,
+        }
+        if not self.explain:
+            return None
+        statement = text("EXPLAIN (ANALYZE, BUFFERS) " + sql).bindparams(**params)
+        return key, statement
+
+    def set_plan(self, key: str, rows: List[Any]) -> None:
+        self.entries[key]["plan"] = "\n".join(row[0] for row in rows)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            key: {name: value for name, value in entry.items() if name != "plan"}
+            for key, entry in self.entries.items()
+        }
+
+    def queries(self) -> List[Dict[str, Any]]:
+        return sorted(self.entries.values(), key=lambda entry: -entry["max_ms"])
+
+
+slow_queries = SlowQueryLog()
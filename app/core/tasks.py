@@ -0,0 +1,179 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+
+TaskFunc = Callable[..., Awaitable[Any]]
+
+
+class QueueFull(Exception):
+    pass
+
+
+@dataclass
+class Task:
+    func: TaskFunc
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+
+
+@dataclass
+class QueueStats:
+    enqueued: int = 0
+    processed: int = 0
+    retried: int = 0
+    failed: int = 0
+    rejected: int = 0
+
+
+class TaskQueue:
+    def __init__(self, name: str, maxsize: int, concurrency: int) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.concurrency = concurrency
+        self.queue: "asyncio.Queue[Task]" = asyncio.Queue(maxsize=maxsize)
+        self.stats = QueueStats()
+
+
+class TaskWorker:
+    """Bounded in-process worker pool for non-critical post-write work.
+
+    Each named queue has its own size limit and number of consumers, so a slow
+    kind of work cannot starve the others. ``enqueue`` waits for free space
+    (backpressure) up to ``timeout`` seconds and raises ``QueueFull`` after;
+    with a ``timeout`` of 0 it only enqueues if there is free space.
+    Failed tasks are retried with exponential backoff. ``stop`` drains what
+    was already enqueued before cancelling the consumers.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.TASK_QUEUE_MAXSIZE,
+        concurrency: int = settings.TASK_QUEUE_CONCURRENCY,
+        max_retries: int = settings.TASK_MAX_RETRIES,
+        retry_delay: float = settings.TASK_RETRY_DELAY,
+    ) -> None:
+        self.maxsize = maxsize
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.queues: Dict[str, TaskQueue] = {}
+        self._consumers: List["asyncio.Task[None]"] = []
+        self._running = False
+
+    def register_queue(
+        self,
+        name: str,
+        maxsize: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> TaskQueue:
+        if name not in self.queues:
+            self.queues[name] = TaskQueue(
+                name,
+                maxsize=maxsize or self.maxsize,
+                concurrency=concurrency or self.concurrency,
+            )
+            if self._running:
+                self._start_consumers(self.queues[name])
+        return self.queues[name]
+
+    async def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        for task_queue in self.queues.values():
+            # Queues are empty while stopped; recreate them on the running loop.
+            task_queue.queue = asyncio.Queue(maxsize=task_queue.maxsize)
+            self._start_consumers(task_queue)
+
+    async def stop(self, timeout: float = settings.TASK_SHUTDOWN_TIMEOUT) -> None:
+        if not self._running:
+            return
+        self._running = False
+        pending = [task_queue.queue.join() for task_queue in self.queues.values()]
+        try:
+            await asyncio.wait_for(asyncio.gather(*pending), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Background tasks not drained after {}s, depths: {}",
+                timeout,
+                self.depths(),
+            )
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+    async def enqueue(
+        self,
+        queue_name: str,
+        func: TaskFunc,
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> None:
+        task_queue = self.register_queue(queue_name)
+        task = Task(func=func, args=args, kwargs=kwargs)
+        if not self._running:
+            # No consumers (e.g. in scripts and tests): run the task inline.
+            task_queue.stats.enqueued += 1
+            await self._run(task_queue, task)
+            return
+        try:
+            if timeout is not None and timeout <= 0:
+                # wait_for(timeout=0) times out even with free space.
+                task_queue.queue.put_nowait(task)
+            else:
+                await asyncio.wait_for(task_queue.queue.put(task), timeout=timeout)
+        except (asyncio.QueueFull, asyncio.TimeoutError) as exc:
+            task_queue.stats.rejected += 1
+            raise QueueFull(queue_name) from exc
+        task_queue.stats.enqueued += 1
+
+    def depths(self) -> Dict[str, int]:
+        return {name: q.queue.qsize() for name, q in self.queues.items()}
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"depth": q.queue.qsize(), **q.stats.__dict__}
+            for name, q in self.queues.items()
+        }
+
+    def _start_consumers(self, task_queue: TaskQueue) -> None:
+        for _ in range(task_queue.concurrency):
+            self._consumers.append(asyncio.create_task(self._consume(task_queue)))
+
+    async def _consume(self, task_queue: TaskQueue) -> None:
+        while True:
+            task = await task_queue.queue.get()
+            try:
+                await self._run(task_queue, task)
+            finally:
+                task_queue.queue.task_done()
+
+    async def _run(self, task_queue: TaskQueue, task: Task) -> None:
+        while True:
+            task.attempts += 1
+            try:
+                await task.func(*task.args, **task.kwargs)
+            except Exception:
+                if task.attempts > self.max_retries:
+                    task_queue.stats.failed += 1
+                    logger.exception(
+                        "Background task {} failed on queue {}",
+                        getattr(task.func, "__name__", task.func),
+                        task_queue.name,
+                    )
+                    return
+                task_queue.stats.retried += 1
+                await asyncio.sleep(self.retry_delay * 2 ** (task.attempts - 1))
+            else:
+                task_queue.stats.processed += 1
+                return
+
+
+worker = TaskWorker()
@@ -1,14 +1,38 @@
 import datetime
-from typing import List, Optional
+from typing import Any, Iterable, List, Optional, Sequence, Set, Tuple
 
 from slugify import slugify
-from sqlalchemy import desc, func, select
+from sqlalchemy import column, desc, func, select, table, text, true, tuple_
+from sqlalchemy.sql import Select
 
 from app import db, schemas
-from app.crud import crud_tag, crud_user
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.invalidation import bus
+from app.crud import crud_article_summary, crud_tag, crud_user
 from app.db import database
 
+# Position in a feed: (created_at, id) of the last article seen.
+FeedCursor = Tuple[datetime.datetime, int]
 
+# Last known totals of article lists, keyed by filter.
+_counts: LRUCache[int] = LRUCache(
+    max_size=settings.ARTICLE_COUNT_CACHE_SIZE, ttl=settings.ARTICLE_COUNT_CACHE_TTL
+)
+
+# Number of authors a user follows, by user id: dropped when they follow or
+# unfollow someone.
+_follow_counts: LRUCache[int] = bus.register(
+    "follows",
+    LRUCache(
+        max_size=settings.ARTICLE_COUNT_CACHE_SIZE,
+        ttl=settings.ARTICLE_COUNT_CACHE_TTL,
+    ),
+)
+
+
+# The tag helpers only write tag_assoc: their callers refresh the article's
+# summary once, in the transaction of their writes.
 async def add_article_tags(article_id: int, tags: List[str]) -> None:
     if len(tags) > 0:
         for tag in tags:
@@ -48,12 +72,11 @@ async def create(payload: schemas.ArticleInCreate, author_id: int) -> int:
         slug=slug,
         author_id=author_id,
     )
-    article_id = await database.execute(query=query)
-    if payload.tagList:
-        for tag in payload.tagList:
-            if not await crud_tag.is_existed_tag(tag):
-                await crud_tag.create(tag)
-        await add_article_tags(article_id, payload.tagList)
+    async with database.transaction():
+        article_id = await database.execute(query=query)
+        if payload.tagList:
+            await add_article_tags(article_id, payload.tagList)
+        await crud_article_summary.refresh([article_id])
     return article_id
 
 
@@ -85,6 +108,21 @@ async def is_article_favorited_by_user(article_id: int, user_id: int) -> bool:
     return row is not None
 
 
+async def favorited_ids(
+    article_ids: Iterable[int], user: Optional[schemas.UserDB]
+) -> Set[int]:
+    """Those of ``article_ids`` that ``user`` favorited, in one query."""
+    article_ids = set(article_ids)
+    if user is None or not article_ids:
+        return set()
+    query = (
+        select([db.favoriter_assoc.c.article_id])
+        .where(db.favoriter_assoc.c.article_id.in_(article_ids))
+        .where(db.favoriter_assoc.c.user_id == user.id)
+    )
+    return {row["article_id"] for row in await database.fetch_all(query=query)}
+
+
 async def count_article_favorites(article_id: int) -> int:
     query = (
         select([func.count()])
@@ -105,80 +143,316 @@ async def update(
     query = (
         db.articles.update()
         .where(article_db.id == db.articles.c.id)
+        .where(article_db.created_at == db.articles.c.created_at)
         .values(update_data)
         .returning(db.articles.c.id)
     )
-    await database.execute(query=query)
-    if new_tags is not None:
-        add_tags = list(set(new_tags) - set(old_tags))
-        remove_tags = list(set(old_tags) - set(new_tags))
-        await add_article_tags(article_db.id, add_tags)
-        await remove_article_tags(article_db.id, remove_tags)
+    async with database.transaction():
+        await database.execute(query=query)
+        if new_tags is not None:
+            add_tags = list(set(new_tags) - set(old_tags))
+            remove_tags = list(set(old_tags) - set(new_tags))
+            await add_article_tags(article_db.id, add_tags)
+            await remove_article_tags(article_db.id, remove_tags)
+        await crud_article_summary.refresh([article_db.id])
+    await bus.publish("articles", article_db.id)
 
 
 async def delete(article_db: schemas.ArticleDB) -> None:
-    query = db.articles.delete().where(article_db.id == db.articles.c.id)
-    await database.execute(query=query)
+    # The articles_delete_dependents trigger deletes the article's comments,
+    # tags, favorites and summary; the favoriters are read first, in the same
+    # transaction, to invalidate their cached favorites.
+    async with database.transaction():
+        favoriters = await database.fetch_all(
+            query=db.favoriter_assoc.select()
+            .with_only_columns([db.favoriter_assoc.c.user_id])
+            .where(db.favoriter_assoc.c.article_id == article_db.id)
+            .with_for_update()
+        )
+        query = (
+            db.articles.delete()
+            .where(article_db.id == db.articles.c.id)
+            .where(article_db.created_at == db.articles.c.created_at)
+        )
+        await database.execute(query=query)
+    await bus.publish("articles", article_db.id)
+    if favoriters:
+        await bus.publish(
+            "favorites", *[(article_db.id, row["user_id"]) for row in favoriters]
+        )
 
 
-async def get_all(
-    limit: int = 20,
-    offset: int = 0,
-    tag: Optional[str] = None,
+async def _get_all_query(
+    tags: Optional[Sequence[str]] = None,
+    any_tag: bool = False,
     author: Optional[str] = None,
     favorited: Optional[str] = None,
-) -> List[schemas.ArticleDB]:
+    columns: Optional[Sequence[str]] = None,
+) -> Select:
     need_join = False
-    j = db.articles
-    query = (
-        select([db.articles])
-        .limit(limit)
-        .offset(offset)
-        .order_by(desc(db.articles.c.created_at))
-    )
-    if tag:
-        need_join = True
-        j = j.join(
-            db.tag_assoc, db.articles.c.id == db.tag_assoc.c.article_id
-        )  # type: ignore
-        query = query.where(db.tag_assoc.c.tag == tag)
+    j = db.article_summaries
+    query = select(crud_article_summary.projection(columns)).order_by(
+        desc(db.article_summaries.c.created_at)
+    )
+    if tags:
+        # Array operators served by the GIN index: && any tag, @> all of them.
+        tag_list = db.article_summaries.c.tag_list
+        query = query.where(
+            tag_list.overlap(list(tags))  # type: ignore[attr-defined]  # not in stubs
+            if any_tag
+            else tag_list.contains(list(tags))
+        )
     if author:
         user_db = await crud_user.get_user_by_username(username=author)
         if user_db:
             author_id = user_db.id
-            query = query.where(author_id == db.articles.c.author_id)
+            query = query.where(author_id == db.article_summaries.c.author_id)
     if favorited:
         user_db = await crud_user.get_user_by_username(username=favorited)
         if user_db:
             favorited_id = user_db.id
             need_join = True
             j = j.join(
-                db.favoriter_assoc, db.articles.c.id == db.favoriter_assoc.c.article_id
+                db.favoriter_assoc,
+                db.article_summaries.c.id == db.favoriter_assoc.c.article_id,
             )  # type: ignore
             query = query.where(favorited_id == db.favoriter_assoc.c.user_id)
     if need_join:
         query = query.select_from(j)
-    articles = await database.fetch_all(query=query)
-    return [schemas.ArticleDB(**article) for article in articles]
+    return query
+
+
+def _newest_first(query: Select, before: Optional[FeedCursor]) -> Select:
+    summaries = db.article_summaries
+    if before is not None:
+        query = query.where(tuple_(summaries.c.created_at, summaries.c.id) < before)
+    return query.order_by(desc(summaries.c.created_at), desc(summaries.c.id))
+
+
+def _feed_query(
+    follow_by: int,
+    columns: Optional[Sequence[str]] = None,
+    before: Optional[FeedCursor] = None,
+) -> Select:
+    """Articles of the followed authors, joined then sorted."""
+    j = db.article_summaries.join(
+        db.followers_assoc,
+        db.article_summaries.c.author_id == db.followers_assoc.c.follower,
+    )
+    query = (
+        select(crud_article_summary.projection(columns))
+        .where(db.followers_assoc.c.followed_by == follow_by)
+        .select_from(j)
+    )
+    return _newest_first(query, before)
+
+
+def _feed_merge_query(
+    follow_by: int,
+    limit: int,
+    offset: int = 0,
+    columns: Optional[Sequence[str]] = None,
+    before: Optional[FeedCursor] = None,
+) -> Select:
+    """A page of the feed, merged from each followed author's newest articles.
+
+    A ``LATERAL`` subquery reads at most ``offset + limit`` articles per
+    author from the ``(author_id, created_at)`` index, so the cost grows with
+    the number of followed authors, not with the number of their articles.
+    """
+    follows = db.followers_assoc
+    per_author = _newest_first(
+        select(crud_article_summary.projection(columns)).where(
+            db.article_summaries.c.author_id == follows.c.follower
+        ),
+        before,
+    )
+    newest = per_author.limit(offset + limit).lateral("newest")
+    return (
+        select([newest])
+        .select_from(follows.join(newest, true()))
+        .where(follows.c.followed_by == follow_by)
+        .order_by(desc(newest.c.created_at), desc(newest.c.id))
+        .limit(limit)
+        .offset(offset)
+    )
+
+
+async def follow_count(user_id: int) -> int:
+    """Number of authors ``user_id`` follows."""
+    count = _follow_counts.get(user_id)
+    if count is None:
+        query = (
+            select([func.count()])
+            .select_from(db.followers_assoc)
+            .where(db.followers_assoc.c.followed_by == user_id)
+        )
+        count = await database.fetch_val(query=query)
+        _follow_counts.set(user_id, count)
+    return count
+
+
+async def _merge_feed(follow_by: int) -> bool:
+    return await follow_count(follow_by) >= settings.FEED_MERGE_MIN_FOLLOWS
+
+
+async def get_all(
+    limit: int = 20,
+    offset: int = 0,
+    tags: Optional[Sequence[str]] = None,
+    any_tag: bool = False,
+    author: Optional[str] = None,
+    favorited: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> List[schemas.ArticleSummary]:
+    """Most recent articles first, with all of ``tags`` (any of them with
+    ``any_tag``). With ``columns`` (summary column names), only those are
+    selected, the other fields are left unset."""
+    query = await _get_all_query(tags, any_tag, author, favorited, columns)
+    articles = await database.fetch_all(query=query.limit(limit).offset(offset))
+    return [crud_article_summary.from_row(article, columns) for article in articles]
+
+
+async def get_all_with_count(
+    limit: int = 20,
+    offset: int = 0,
+    tags: Optional[Sequence[str]] = None,
+    any_tag: bool = False,
+    author: Optional[str] = None,
+    favorited: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[List[schemas.ArticleSummary], int, bool]:
+    """Like ``get_all``, also returning the total number of matching articles
+    and whether that total is approximate."""
+    query = await _get_all_query(tags, any_tag, author, favorited, columns)
+    count_key = _list_count_key(tags, any_tag, author, favorited)
+    return await _fetch_page_with_count(query, limit, offset, count_key, columns)
+
+
+def _list_count_key(
+    tags: Optional[Sequence[str]] = None,
+    any_tag: bool = False,
+    author: Optional[str] = None,
+    favorited: Optional[str] = None,
+) -> Tuple[Any, ...]:
+    """Key of the cached total of an article list: same filters, same key."""
+    tag_key = tuple(sorted(set(tags))) if tags else None
+    return ("all", tag_key, any_tag and tag_key is not None, author, favorited)
 
 
 async def feed(
     follow_by: int,
     limit: int = 20,
     offset: int = 0,
-) -> List[schemas.ArticleDB]:
-    query = (
-        select([db.articles])
+    columns: Optional[Sequence[str]] = None,
+    before: Optional[FeedCursor] = None,
+) -> List[schemas.ArticleSummary]:
+    """Most recent articles of the authors ``follow_by`` follows, older than
+    the ``before`` cursor if given.
+
+    Users following ``FEED_MERGE_MIN_FOLLOWS`` authors or more get a merge
+    of per-author lists, the others a plain join.
+    """
+    if await _merge_feed(follow_by):
+        query = _feed_merge_query(follow_by, limit, offset, columns, before)
+    else:
+        query = _feed_query(follow_by, columns, before).limit(limit).offset(offset)
+    articles = await database.fetch_all(query=query)
+    return [crud_article_summary.from_row(article, columns) for article in articles]
+
+
+async def feed_with_count(
+    follow_by: int,
+    limit: int = 20,
+    offset: int = 0,
+    columns: Optional[Sequence[str]] = None,
+    before: Optional[FeedCursor] = None,
+) -> Tuple[List[schemas.ArticleSummary], int, bool]:
+    """Like ``feed``, also returning the total number of articles in the feed
+    and whether that total is approximate."""
+    count_key = ("feed", follow_by)
+    if before is None and not await _merge_feed(follow_by):
+        return await _fetch_page_with_count(
+            _feed_query(follow_by, columns), limit, offset, count_key, columns
+        )
+    articles = await feed(follow_by, limit, offset, columns, before)
+    cached = _counts.get(count_key)
+    if cached is not None and cached > settings.ARTICLE_COUNT_EXACT_LIMIT:
+        return articles, cached, True
+    # Counting stops past the exact limit: a larger feed reports the limit
+    # plus one, flagged as approximate.
+    count_query = select([func.count()]).select_from(
+        _feed_query(follow_by)
+        .order_by(None)
+        .limit(settings.ARTICLE_COUNT_EXACT_LIMIT + 1)
+        .alias()
+    )
+    total = await database.fetch_val(query=count_query)
+    _counts.set(count_key, total)
+    return articles, total, total > settings.ARTICLE_COUNT_EXACT_LIMIT
+
+
+async def _fetch_page_with_count(
+    query: Select,
+    limit: int,
+    offset: int,
+    count_key: Tuple[Any, ...],
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[List[schemas.ArticleSummary], int, bool]:
+    """Fetch a page of ``query`` and the total number of rows it matches.
+
+    Small totals are counted exactly with ``count(*) OVER ()`` in the page
+    query itself. Once a total is known to be above
+    ``ARTICLE_COUNT_EXACT_LIMIT``, counting is skipped until the cached total
+    expires: the cached value (or, for the unfiltered list, the planner's
+    row estimate) is returned and flagged as approximate.
+    """
+    cached = _counts.get(count_key)
+    if cached is not None and cached > settings.ARTICLE_COUNT_EXACT_LIMIT:
+        articles = await database.fetch_all(query=query.limit(limit).offset(offset))
+        if count_key == _list_count_key():
+            cached = max(await estimate_articles_count(), cached)
+        return (
+            [crud_article_summary.from_row(article, columns) for article in articles],
+            cached,
+            True,
+        )
+    page_query = (
+        query.add_columns(  # type: ignore[attr-defined]  # missing from the stubs
+            func.count().over().label("total_count")
+        )
         .limit(limit)
         .offset(offset)
-        .order_by(desc(db.articles.c.created_at))
     )
-    j = db.articles.join(
-        db.followers_assoc, db.articles.c.author_id == db.followers_assoc.c.follower
+    articles = await database.fetch_all(query=page_query)
+    if articles:
+        total = articles[0]["total_count"]
+    elif offset == 0:
+        total = 0
+    else:
+        count_query = select([func.count()]).select_from(query.order_by(None).alias())
+        total = await database.fetch_val(query=count_query)
+    _counts.set(count_key, total)
+    return (
+        [crud_article_summary.from_row(article, columns) for article in articles],
+        total,
+        False,
     )
-    query = query.where(db.followers_assoc.c.followed_by == follow_by).select_from(j)
-    articles = await database.fetch_all(query=query)
-    return [schemas.ArticleDB(**article) for article in articles]
+
+
+async def estimate_articles_count() -> int:
+    """The planner's row count of ``article_summaries``, which lists read.
+
+    Not of ``articles``: the statistics of a partitioned table are not kept
+    up to date by autovacuum.
+    """
+    query = (
+        select([column("reltuples")])
+        .select_from(table("pg_class"))
+        .where(column("oid") == text("'article_summaries'::regclass"))
+    )
+    estimate = await database.fetch_val(query=query)
+    return max(int(estimate or 0), 0)
 
 
 async def favorite(article_id: int, user_id: int) -> None:
@@ -187,6 +461,9 @@ async def favorite(article_id: int, user_id: int) -> None:
         article_id=article_id,
     )
     await database.execute(query=query)
+    await crud_article_summary.add_favorites(article_id, 1)
+    await bus.publish("articles", article_id)
+    await bus.publish("favorites", (article_id, user_id))
 
 
 async def unfavorite(article_id: int, user_id: int) -> None:
@@ -194,5 +471,9 @@ async def unfavorite(article_id: int, user_id: int) -> None:
         db.favoriter_assoc.delete()
         .where(user_id == db.favoriter_assoc.c.user_id)
         .where(article_id == db.favoriter_assoc.c.article_id)
+        .returning(db.favoriter_assoc.c.article_id)
     )
-    await database.execute(query=query)
+    if await database.execute(query=query) is not None:
+        await crud_article_summary.add_favorites(article_id, -1)
+        await bus.publish("articles", article_id)
+        await bus.publish("favorites", (article_id, user_id))
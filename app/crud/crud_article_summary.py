@@ -0,0 +1,225 @@
+from typing import Any, List, Mapping, Optional, Sequence
+
+from sqlalchemy import String, and_, exists, func, not_, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.sql import ColumnElement, Select
+
+from app import db, schemas
+from app.core.counters import CounterBuffer
+from app.db import database
+
+# sqlalchemy-stubs predate SQLAlchemy 1.4: the attr-defined ignores below are
+# for scalar_subquery, subquery and ARRAY's contained_by.
+
+SUMMARY_COLUMNS = [column.name for column in db.article_summaries.columns]
+
+SCALAR_COLUMNS = [name for name in SUMMARY_COLUMNS if name != "tag_list"]
+
+COUNT_COLUMNS = {"favorites_count", "comments_count"}
+
+AUTHOR_COLUMNS = {
+    "author_username": db.users.c.username,
+    "author_bio": db.users.c.bio,
+    "author_image": db.users.c.image,
+}
+
+# Selected by every projection: list order and per-viewer lookups need them.
+KEY_COLUMNS = ["id", "author_id", "created_at"]
+
+# Flushes recount the favorites of the changed articles: the workers' buffers
+# and summary rebuilds do not count a favorite twice.
+favorites_counter = CounterBuffer(
+    db.article_summaries,
+    db.article_summaries.c.favorites_count,
+    source=select([func.count()])  # type: ignore[attr-defined]
+    .where(db.favoriter_assoc.c.article_id == db.article_summaries.c.id)
+    .scalar_subquery(),
+)
+
+
+def _summary_select() -> Select:
+    """Compute summary rows from the normalized tables."""
+    articles = db.articles
+    tag_list = func.array(
+        select([db.tag_assoc.c.tag])  # type: ignore[attr-defined]
+        .where(db.tag_assoc.c.article_id == articles.c.id)
+        .scalar_subquery(),
+        type_=ARRAY(String),
+    )
+    favorites_count = (
+        select([func.count()])  # type: ignore[attr-defined]
+        .where(db.favoriter_assoc.c.article_id == articles.c.id)
+        .scalar_subquery()
+    )
+    comments_count = (
+        select([func.count()])  # type: ignore[attr-defined]
+        .where(db.comments.c.article_id == articles.c.id)
+        .where(db.comments.c.created_at >= articles.c.created_at)
+        .scalar_subquery()
+    )
+    return select(
+        [
+            articles.c.id,
+            articles.c.slug,
+            articles.c.title,
+            articles.c.description,
+            articles.c.body,
+            articles.c.author_id,
+            *[column.label(name) for name, column in AUTHOR_COLUMNS.items()],
+            tag_list.label("tag_list"),
+            favorites_count.label("favorites_count"),
+            comments_count.label("comments_count"),
+            articles.c.created_at,
+            articles.c.updated_at,
+        ]
+    ).select_from(articles.join(db.users, db.users.c.id == articles.c.author_id))
+
+
+async def refresh(article_ids: List[int], counts: bool = False) -> None:
+    """Recompute the summaries of the given articles.
+
+    Counts of existing summaries are left alone unless ``counts`` is set:
+    they are maintained incrementally, with favorites buffered in
+    ``favorites_counter`` of every worker, whose flushes recount them.
+    Summaries of articles that no longer exist are deleted.
+    """
+    if not article_ids:
+        return
+    upsert = insert(db.article_summaries).from_select(
+        SUMMARY_COLUMNS, _summary_select().where(db.articles.c.id.in_(article_ids))
+    )
+    skipped = {"id"} if counts else {"id", *COUNT_COLUMNS}
+    query = upsert.on_conflict_do_update(
+        index_elements=[db.article_summaries.c.id],
+        set_={
+            name: upsert.excluded[name]
+            for name in SUMMARY_COLUMNS
+            if name not in skipped
+        },
+    )
+    if counts:
+        favorites_counter.discard(article_ids)
+    await database.execute(query=query)
+    orphans = (
+        db.article_summaries.delete()
+        .where(db.article_summaries.c.id.in_(article_ids))
+        .where(~exists().where(db.articles.c.id == db.article_summaries.c.id))
+    )
+    await database.execute(query=orphans)
+
+
+async def refresh_author(author_id: int) -> None:
+    """Copy the author's current profile into their article summaries."""
+    query = (
+        db.article_summaries.update()
+        .where(db.article_summaries.c.author_id == author_id)
+        .values(
+            {
+                name: select([column])  # type: ignore[attr-defined]
+                .where(db.users.c.id == author_id)
+                .scalar_subquery()
+                for name, column in AUTHOR_COLUMNS.items()
+            }
+        )
+    )
+    await database.execute(query=query)
+
+
+async def add_favorites(article_id: int, delta: int) -> None:
+    await favorites_counter.add(article_id, delta)
+
+
+async def add_comments(article_id: int, delta: int) -> None:
+    query = (
+        db.article_summaries.update()
+        .where(db.article_summaries.c.id == article_id)
+        .values(comments_count=db.article_summaries.c.comments_count + delta)
+    )
+    await database.execute(query=query)
+
+
+async def delete(article_id: int) -> None:
+    query = db.article_summaries.delete().where(db.article_summaries.c.id == article_id)
+    await database.execute(query=query)
+
+
+async def get(article_id: int) -> Optional[schemas.ArticleSummary]:
+    query = db.article_summaries.select().where(db.article_summaries.c.id == article_id)
+    row = await database.fetch_one(query=query)
+    return from_row(row) if row else None
+
+
+async def get_by_slug(slug: str) -> Optional[schemas.ArticleSummary]:
+    query = db.article_summaries.select().where(db.article_summaries.c.slug == slug)
+    row = await database.fetch_one(query=query)
+    return from_row(row) if row else None
+
+
+def projection(
+    columns: Optional[Sequence[str]] = None,
+) -> List[ColumnElement[Any]]:
+    """Summary columns to select: all of them, or ``columns`` and the keys."""
+    if columns is None:
+        return list(db.article_summaries.columns)
+    names = dict.fromkeys([*KEY_COLUMNS, *columns])
+    return [db.article_summaries.c[name] for name in names]
+
+
+def from_row(
+    row: Mapping[str, Any], columns: Optional[Sequence[str]] = None
+) -> schemas.ArticleSummary:
+    """Summary of a row, counting the favorites not flushed yet.
+
+    A row of a ``projection`` leaves the other fields unset.
+    """
+    if columns is None:
+        summary = schemas.ArticleSummary(**row)
+    else:
+        names = [*KEY_COLUMNS, *columns]
+        summary = schemas.ArticleSummary.construct(
+            **{name: row[name] for name in names}
+        )
+    if "favorites_count" in summary.__fields_set__:
+        summary.favorites_count += favorites_counter.pending(summary.id)
+    return summary
+
+
+async def rebuild() -> int:
+    """Recompute every summary from scratch, return the number of rows.
+
+    Runs in one transaction: readers keep seeing the old rows until it
+    commits.
+    """
+    async with database.transaction():
+        favorites_counter.discard(list(favorites_counter.deltas))
+        await database.execute(query=db.article_summaries.delete())
+        query = insert(db.article_summaries).from_select(
+            SUMMARY_COLUMNS, _summary_select()
+        )
+        await database.execute(query=query)
+        count_query = select([func.count()]).select_from(db.article_summaries)
+        return await database.fetch_val(query=count_query)
+
+
+async def check() -> List[int]:
+    """Ids of articles whose summary is missing, stale or orphaned."""
+    stored = db.article_summaries
+    expected = _summary_select().subquery("expected")  # type: ignore[attr-defined]
+    differs = [
+        stored.c[name].is_distinct_from(expected.c[name]) for name in SCALAR_COLUMNS
+    ]
+    # Tags have no order: compare them as sets.
+    same_tags = and_(
+        stored.c.tag_list.contains(expected.c.tag_list),
+        stored.c.tag_list.contained_by(expected.c.tag_list),  # type: ignore[attr-defined]
+    )
+    query = (
+        select([func.coalesce(stored.c.id, expected.c.id).label("id")])
+        .select_from(
+            stored.outerjoin(expected, stored.c.id == expected.c.id, full=True)
+        )
+        .where(or_(*differs, not_(same_tags)))
+        .order_by("id")
+    )
+    rows = await database.fetch_all(query=query)
+    return [row["id"] for row in rows]
@@ -1,6 +1,10 @@
+import datetime
 from typing import List, Optional
 
+from sqlalchemy.sql import Select
+
 from app import db, schemas
+from app.crud import crud_article_summary
 from app.db import database
 
 
@@ -13,6 +17,7 @@ async def create(
         article_id=article_id,
     )
     comment_id = await database.execute(query=query)
+    await crud_article_summary.add_comments(article_id, 1)
     return comment_id
 
 
@@ -25,12 +30,30 @@ async def get(comment_id: int) -> Optional[schemas.CommentDB]:
         return None
 
 
-async def get_comments_from_an_article(article_id: int) -> List[schemas.CommentDB]:
+def _comments_query(
+    article_id: int, since: Optional[datetime.datetime] = None
+) -> Select:
     query = db.comments.select().where(article_id == db.comments.c.article_id)
+    if since is not None:
+        # Comments are never older than their article: skip older partitions.
+        query = query.where(db.comments.c.created_at >= since)
+    return query
+
+
+async def get_comments_from_an_article(
+    article_id: int, since: Optional[datetime.datetime] = None
+) -> List[schemas.CommentDB]:
+    query = _comments_query(article_id, since)
     comment_rows = await database.fetch_all(query=query)
     return [schemas.CommentDB(**row) for row in comment_rows]
 
 
 async def delete(comment_id: int) -> None:
-    query = db.comments.delete().where(comment_id == db.comments.c.id)
-    await database.execute(query=query)
+    query = (
+        db.comments.delete()
+        .where(comment_id == db.comments.c.id)
+        .returning(db.comments.c.article_id)
+    )
+    article_id = await database.execute(query=query)
+    if article_id is not None:
+        await crud_article_summary.add_comments(article_id, -1)
@@ -0,0 +1,23 @@
+from typing import Dict
+
+from app.db import database
+
+PARTITIONED_TABLES = ("articles", "comments")
+
+
+async def ensure_partitions(months_ahead: int) -> Dict[str, int]:
+    """Create the monthly partitions of the next ``months_ahead`` months.
+
+    There is no default partition: a row of a month without a partition is
+    rejected. Return the number of partitions created per table.
+    """
+    query = (
+        "SELECT create_monthly_partitions(CAST(:table AS regclass), now()::date, "
+        "(now() + make_interval(months => :months))::date)"
+    )
+    created = {}
+    for table in PARTITIONED_TABLES:
+        created[table] = await database.fetch_val(
+            query=query, values={"table": table, "months": months_ahead}
+        )
+    return created
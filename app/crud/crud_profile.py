@@ -1,46 +1,131 @@
-from typing import Optional
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql.selectable import CTE
 
 from app import db, schemas
-from app.crud import crud_user
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.invalidation import bus
 from app.db import database
 
+PublicProfileEntry = Tuple[int, schemas.PublicProfile]
+
+# Public profiles with their user id, keyed by user id and by username.
+_public_profiles: LRUCache[PublicProfileEntry] = bus.register(
+    "profiles",
+    LRUCache(max_size=settings.PROFILE_CACHE_SIZE, ttl=settings.PROFILE_CACHE_TTL),
+)
+
+PUBLIC_PROFILE_COLUMNS = [
+    db.users.c.id,
+    db.users.c.username,
+    db.users.c.bio,
+    db.users.c.image,
+]
+
+
+def _cache_public_profile(row: Any) -> PublicProfileEntry:
+    entry = (
+        row["id"],
+        schemas.PublicProfile(
+            username=row["username"], bio=row["bio"], image=row["image"]
+        ),
+    )
+    _public_profiles.set(row["id"], entry)
+    _public_profiles.set(row["username"], entry)
+    return entry
+
+
+async def get_public_profile_by_username(
+    username: str,
+) -> Optional[PublicProfileEntry]:
+    """User id and public profile of a username, shared by every viewer."""
+    entry = _public_profiles.get(username)
+    if entry is not None:
+        return entry
+    query = select(PUBLIC_PROFILE_COLUMNS).where(db.users.c.username == username)
+    row = await database.fetch_one(query=query)
+    return _cache_public_profile(row) if row else None
+
+
+async def get_public_profiles(
+    user_ids: Iterable[int],
+) -> Dict[int, schemas.PublicProfile]:
+    """Public profiles of existing users among ``user_ids``, read in one query
+    for those not cached."""
+    profiles: Dict[int, schemas.PublicProfile] = {}
+    missing = []
+    for user_id in set(user_ids):
+        entry = _public_profiles.get(user_id)
+        if entry is None:
+            missing.append(user_id)
+        else:
+            profiles[user_id] = entry[1]
+    if missing:
+        query = select(PUBLIC_PROFILE_COLUMNS).where(db.users.c.id.in_(missing))
+        for row in await database.fetch_all(query=query):
+            profiles[row["id"]] = _cache_public_profile(row)[1]
+    return profiles
+
+
+async def following_ids(
+    user_ids: Iterable[int], follower_by: Optional[schemas.UserDB]
+) -> Set[int]:
+    """Those of ``user_ids`` that ``follower_by`` follows, in one query."""
+    user_ids = set(user_ids)
+    if follower_by is None or not user_ids:
+        return set()
+    query = (
+        select([db.followers_assoc.c.follower])
+        .where(db.followers_assoc.c.follower.in_(user_ids))
+        .where(db.followers_assoc.c.followed_by == follower_by.id)
+    )
+    return {row["follower"] for row in await database.fetch_all(query=query)}
+
 
 async def get_profile_by_username(
     username: str,
     requested_user: Optional[schemas.UserDB] = None,
 ) -> Optional[schemas.Profile]:
-    user_db = await crud_user.get_user_by_username(username=username)
-    if user_db is None:
+    entry = await get_public_profile_by_username(username)
+    if entry is None:
         return None
-    profile = schemas.Profile(
-        username=user_db.username, bio=user_db.bio, image=user_db.image  # type: ignore
+    user_id, public = entry
+    return schemas.Profile(
+        **public.dict(),
+        following=await is_following_user_id(user_id, requested_user),
     )
-    profile.following = await is_following(user_db, requested_user)
-    return profile
 
 
 async def get_profile_by_user_id(
     user_id: int,
     requested_user: Optional[schemas.UserDB] = None,
 ) -> Optional[schemas.Profile]:
-    user_db = await crud_user.get(user_id=user_id)
-    if user_db is None:
+    public = (await get_public_profiles([user_id])).get(user_id)
+    if public is None:
         return None
-    profile = schemas.Profile(
-        username=user_db.username, bio=user_db.bio, image=user_db.image  # type: ignore
+    return schemas.Profile(
+        **public.dict(),
+        following=await is_following_user_id(user_id, requested_user),
     )
-    profile.following = await is_following(user_db, requested_user)
-    return profile
 
 
 async def is_following(
     follower: schemas.UserDB, follower_by: Optional[schemas.UserDB]
+) -> bool:
+    return await is_following_user_id(follower.id, follower_by)
+
+
+async def is_following_user_id(
+    user_id: int, follower_by: Optional[schemas.UserDB]
 ) -> bool:
     if follower_by is None:
         return False
     query = (
         db.followers_assoc.select()
-        .where(follower.id == db.followers_assoc.c.follower)
+        .where(user_id == db.followers_assoc.c.follower)
         .where(follower_by.id == db.followers_assoc.c.followed_by)
     )
     row = await database.fetch_one(query=query)
@@ -48,23 +133,23 @@ async def is_following(
 
 
 async def follow(follower: schemas.UserDB, follower_by: schemas.UserDB) -> bool:
-    if await is_following(follower=follower, follower_by=follower_by):
-        return False
     query = (
-        db.followers_assoc.insert()
+        insert(db.followers_assoc)
         .values(
             follower=follower.id,
             followed_by=follower_by.id,
         )
+        .on_conflict_do_nothing()
         .returning(db.followers_assoc.c.follower)
     )
     row = await database.execute(query=query)
-    return row is not None
+    if row is None:
+        return False
+    await bus.publish("follows", follower_by.id)
+    return True
 
 
 async def unfollow(follower: schemas.UserDB, follower_by: schemas.UserDB) -> bool:
-    if not await is_following(follower=follower, follower_by=follower_by):
-        return False
     query = (
         db.followers_assoc.delete()
         .where(db.followers_assoc.c.follower == follower.id)
@@ -72,4 +157,75 @@ async def unfollow(follower: schemas.UserDB, follower_by: schemas.UserDB) -> boo
         .returning(db.followers_assoc.c.follower)
     )
     row = await database.execute(query=query)
-    return row is not None
+    if row is None:
+        return False
+    await bus.publish("follows", follower_by.id)
+    return True
+
+
+def _target_user(username: str) -> CTE:
+    return (
+        select([db.users.c.id, db.users.c.username, db.users.c.bio, db.users.c.image])
+        .where(username == db.users.c.username)
+        .cte("target_user")
+    )
+
+
+async def _fetch_follow_result(
+    target: CTE, written: CTE, follower_by: schemas.UserDB, following: bool
+) -> Optional[Tuple[int, schemas.Profile, bool]]:
+    written_count = select([func.count()]).select_from(written)
+    changed = written_count.scalar_subquery() > 0  # type: ignore[attr-defined]
+    query = select([target, changed.label("changed")])
+    row = await database.fetch_one(query=query)
+    if row is None:
+        return None
+    _, public = _cache_public_profile(row)
+    profile = schemas.Profile(**public.dict(), following=following)
+    if row["changed"]:
+        await bus.publish("follows", follower_by.id)
+    return row["id"], profile, row["changed"]
+
+
+async def follow_by_username(
+    username: str, follower_by: schemas.UserDB
+) -> Optional[Tuple[int, schemas.Profile, bool]]:
+    """Follow a user by username in a single round trip.
+
+    Return ``None`` if the user does not exist, otherwise the user id, the
+    profile as seen by ``follower_by`` and whether a follow row was written.
+    Following yourself never writes a row.
+    """
+    target = _target_user(username)
+    written = (
+        insert(db.followers_assoc)
+        .from_select(
+            ["follower", "followed_by"],
+            select([target.c.id, cast(follower_by.id, Integer)]).where(
+                target.c.id != follower_by.id
+            ),
+        )
+        .on_conflict_do_nothing()
+        .returning(db.followers_assoc.c.follower)
+        .cte("written")
+    )
+    return await _fetch_follow_result(target, written, follower_by, following=True)
+
+
+async def unfollow_by_username(
+    username: str, follower_by: schemas.UserDB
+) -> Optional[Tuple[int, schemas.Profile, bool]]:
+    """Unfollow a user by username in a single round trip.
+
+    Same result as ``follow_by_username``, the flag telling whether a follow
+    row was deleted.
+    """
+    target = _target_user(username)
+    written = (
+        db.followers_assoc.delete()
+        .where(db.followers_assoc.c.follower.in_(select([target.c.id])))
+        .where(db.followers_assoc.c.followed_by == follower_by.id)
+        .returning(db.followers_assoc.c.follower)
+        .cte("written")
+    )
+    return await _fetch_follow_result(target, written, follower_by, following=False)
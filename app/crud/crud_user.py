@@ -1,9 +1,17 @@
-from typing import Optional
+from typing import Any, Optional
 
 from pydantic import SecretStr
 
 from app import db, schemas
-from app.core.security import get_password_hash, verify_password
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.invalidation import bus
+from app.core.security import (
+    get_password_hash,
+    password_needs_rehash,
+    verify_password,
+)
+from app.crud import crud_article_summary
 from app.db import database
 
 
@@ -16,10 +24,28 @@ async def create(payload: schemas.UserCreate) -> Optional[int]:
     return await database.execute(query=query)
 
 
+# User rows, keyed by user id and by username.
+users_cache: LRUCache[schemas.UserDB] = bus.register(
+    "users", LRUCache(max_size=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+)
+
+
+async def _get_cached(key: Any, where: Any) -> Optional[schemas.UserDB]:
+    user_db = users_cache.get(key)
+    if user_db is not None:
+        return user_db
+    version = users_cache.version
+    user_row = await database.fetch_one(query=db.users.select().where(where))
+    if user_row is None:
+        return None
+    user_db = schemas.UserDB(**user_row)
+    users_cache.set_if_unchanged(user_db.id, user_db, version)
+    users_cache.set_if_unchanged(user_db.username, user_db, version)
+    return user_db
+
+
 async def get(user_id: int) -> Optional[schemas.UserDB]:
-    query = db.users.select().where(user_id == db.users.c.id)
-    user_row = await database.fetch_one(query=query)
-    return schemas.UserDB(**user_row) if user_row else None
+    return await _get_cached(user_id, user_id == db.users.c.id)
 
 
 async def get_user_by_email(email: str) -> Optional[schemas.UserDB]:
@@ -29,20 +55,53 @@ async def get_user_by_email(email: str) -> Optional[schemas.UserDB]:
 
 
 async def get_user_by_username(username: str) -> Optional[schemas.UserDB]:
-    query = db.users.select().where(username == db.users.c.username)
-    user_row = await database.fetch_one(query=query)
-    return schemas.UserDB(**user_row) if user_row else None
+    return await _get_cached(username, username == db.users.c.username)
 
 
 async def update(user_id: int, payload: schemas.UserUpdate) -> int:
     update_data = payload.dict(exclude_unset=True)
+    profile_changed = bool(update_data.keys() & {"username", "bio", "image"})
+    # Joined to itself, the row before the update: its cached username.
+    old = db.users.alias("old")
+    cached = ("users", "profiles") if profile_changed else ("users",)
     query = (
         db.users.update()
         .where(user_id == db.users.c.id)
+        .where(old.c.id == db.users.c.id)
         .values(update_data)
-        .returning(db.users.c.id)
+        .returning(
+            db.users.c.id,
+            old.c.username,
+            *[
+                notify
+                for name in cached
+                for notify in bus.notify(name, db.users.c.id, old.c.username)
+            ],
+        )
     )
-    return await database.execute(query=query)
+    row = await database.fetch_one(query=query)
+    if row is None:
+        return None  # type: ignore
+    for name in cached:
+        bus.drop(name, user_id, row["username"])
+    if profile_changed:
+        await crud_article_summary.refresh_author(user_id)
+    return row["id"]
+
+
+async def delete(user_db: schemas.UserDB) -> None:
+    # A cached row would still authenticate the user's tokens.
+    keys = (user_db.id, user_db.username)
+    query = (
+        db.users.delete()
+        .where(user_db.id == db.users.c.id)
+        .returning(
+            db.users.c.id, *bus.notify("users", *keys), *bus.notify("profiles", *keys)
+        )
+    )
+    await database.execute(query=query)
+    bus.drop("users", *keys)
+    bus.drop("profiles", *keys)
 
 
 async def authenticate(email: str, password: SecretStr) -> Optional[schemas.UserDB]:
@@ -51,4 +110,25 @@ async def authenticate(email: str, password: SecretStr) -> Optional[schemas.User
         return None
     if not verify_password(password, user_db.hashed_password):
         return None
+    if password_needs_rehash(user_db.hashed_password):
+        user_db = await rehash_password(user_db, password)
     return user_db
+
+
+async def rehash_password(
+    user_db: schemas.UserDB, password: SecretStr
+) -> schemas.UserDB:
+    """Store a hash with the current scheme and cost, unless the password
+    changed meanwhile."""
+    hashed_password = get_password_hash(password)
+    query = (
+        db.users.update()
+        .where(db.users.c.id == user_db.id)
+        .where(db.users.c.hashed_password == user_db.hashed_password)
+        .values(hashed_password=hashed_password)
+        .returning(db.users.c.id, *bus.notify("users", user_db.id, user_db.username))
+    )
+    if await database.execute(query=query) is None:
+        return user_db
+    bus.drop("users", user_db.id, user_db.username)
+    return user_db.copy(update={"hashed_password": hashed_password})
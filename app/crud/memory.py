@@ -0,0 +1,570 @@
+"""In-memory storage backend, for benchmarks of the API layer.
+
+Rows live in dicts keyed by id. Article lists are served from sorted indexes
+of ``(created_at, id)`` keys (all articles, per author, per tag, per
+favoriting user), so pages and totals cost about what the Postgres indexes
+do rather than a scan. Column projections are ignored: there are no bytes
+to save. Nothing is persisted and nothing is shared between workers.
+"""
+import datetime
+import heapq
+import itertools
+from bisect import bisect_left, insort
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
+
+from asyncpg.exceptions import UniqueViolationError
+from pydantic import SecretStr
+from slugify import slugify
+
+from app import schemas
+from app.core.security import (
+    get_password_hash,
+    password_needs_rehash,
+    verify_password,
+)
+from app.crud.repository import Repository
+
+Key = Tuple[datetime.datetime, int]
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class SortedIndex:
+    """Article keys in ``created_at`` order, newest last."""
+
+    def __init__(self) -> None:
+        self.keys: List[Key] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: Key) -> bool:
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def add(self, key: Key) -> None:
+        insort(self.keys, key)
+
+    def remove(self, key: Key) -> None:
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+
+    def newest(self, before: Optional[Key] = None) -> Iterator[Key]:
+        """Keys newest first, only those older than ``before`` if given."""
+        if before is None:
+            return reversed(self.keys)
+        end = bisect_left(self.keys, before)
+        return (self.keys[i] for i in range(end - 1, -1, -1))
+
+    @classmethod
+    def union(cls, indexes: Iterable["SortedIndex"]) -> "SortedIndex":
+        index = cls()
+        index.keys = sorted(set(itertools.chain.from_iterable(i.keys for i in indexes)))
+        return index
+
+    def page(self, limit: int, offset: int) -> List[Key]:
+        end = len(self.keys) - offset
+        if end <= 0:
+            return []
+        return self.keys[max(end - limit, 0) : end][::-1]
+
+
+class MemoryStore:
+    """Tables and indexes shared by the repositories of one backend."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, Iterator[int]] = {
+            name: itertools.count(1) for name in ("users", "articles", "comments")
+        }
+        self.users: Dict[int, schemas.UserDB] = {}
+        self.user_by_email: Dict[str, int] = {}
+        self.user_by_username: Dict[str, int] = {}
+        # followed user id -> follower ids, and the reverse
+        self.followers: Dict[int, Set[int]] = {}
+        self.following: Dict[int, Set[int]] = {}
+        self.articles: Dict[int, schemas.ArticleDB] = {}
+        self.article_by_slug: Dict[str, int] = {}
+        self.article_tags: Dict[int, List[str]] = {}
+        self.favoriters: Dict[int, Set[int]] = {}
+        self.recent = SortedIndex()
+        self.recent_by_author: Dict[int, SortedIndex] = {}
+        self.recent_by_tag: Dict[str, SortedIndex] = {}
+        self.recent_favorited_by: Dict[int, SortedIndex] = {}
+        self.comments: Dict[int, schemas.CommentDB] = {}
+        self.comments_by_article: Dict[int, List[int]] = {}
+        # Ordered set of tags, in creation order
+        self.tags: Dict[str, None] = {}
+
+    def next_id(self, table: str) -> int:
+        return next(self.ids[table])
+
+    def key(self, article_id: int) -> Key:
+        return self.articles[article_id].created_at, article_id
+
+    def summary(self, article_id: int) -> schemas.ArticleSummary:
+        article = self.articles[article_id]
+        author = self.users[article.author_id]
+        return schemas.ArticleSummary(
+            **article.dict(),
+            # Users are created with a username.
+            author_username=cast(str, author.username),
+            author_bio=author.bio,
+            author_image=author.image,
+            tag_list=list(self.article_tags.get(article_id, [])),
+            favorites_count=len(self.favoriters.get(article_id, ())),
+            comments_count=len(self.comments_by_article.get(article_id, [])),
+        )
+
+    def summaries(self, keys: Iterable[Key]) -> List[schemas.ArticleSummary]:
+        return [self.summary(article_id) for _, article_id in keys]
+
+
+def _check_unique(
+    index: Dict[str, int], value: str, constraint: str, row_id: Optional[int] = None
+) -> None:
+    """Raise like Postgres if ``value`` belongs to a row other than ``row_id``.
+
+    Usernames have no unique index in Postgres, but their index here can only
+    hold one user per name: they are checked like emails and slugs.
+    """
+    owner = index.get(value)
+    if owner is not None and owner != row_id:
+        raise UniqueViolationError(
+            f'duplicate key value violates unique constraint "{constraint}"'
+        )
+
+
+def _index(indexes: Dict[Any, SortedIndex], name: object) -> SortedIndex:
+    index = indexes.get(name)
+    if index is None:
+        index = indexes[name] = SortedIndex()
+    return index
+
+
+class MemoryUsers:
+    def __init__(self, store: MemoryStore) -> None:
+        self.store = store
+
+    async def create(self, payload: schemas.UserCreate) -> Optional[int]:
+        _check_unique(self.store.user_by_email, payload.email, "ix_users_email")
+        _check_unique(
+            self.store.user_by_username, payload.username, "ix_users_username"
+        )
+        user_id = self.store.next_id("users")
+        self.store.users[user_id] = schemas.UserDB(
+            id=user_id,
+            username=payload.username,
+            email=payload.email,
+            hashed_password=get_password_hash(payload.password),
+        )
+        self.store.user_by_email[payload.email] = user_id
+        self.store.user_by_username[payload.username] = user_id
+        return user_id
+
+    async def get(self, user_id: int) -> Optional[schemas.UserDB]:
+        user = self.store.users.get(user_id)
+        return user.copy() if user else None
+
+    async def get_user_by_email(self, email: str) -> Optional[schemas.UserDB]:
+        user_id = self.store.user_by_email.get(email)
+        return await self.get(user_id) if user_id is not None else None
+
+    async def get_user_by_username(self, username: str) -> Optional[schemas.UserDB]:
+        user_id = self.store.user_by_username.get(username)
+        return await self.get(user_id) if user_id is not None else None
+
+    async def update(self, user_id: int, payload: schemas.UserUpdate) -> int:
+        user = self.store.users.get(user_id)
+        if user is None:
+            return None  # type: ignore
+        update_data = payload.dict(exclude_unset=True)
+        password = update_data.pop("password", None)
+        if password is not None:
+            update_data["hashed_password"] = get_password_hash(SecretStr(password))
+        if "email" in update_data:
+            _check_unique(
+                self.store.user_by_email,
+                update_data["email"],
+                "ix_users_email",
+                user_id,
+            )
+        if "username" in update_data:
+            _check_unique(
+                self.store.user_by_username,
+                update_data["username"],
+                "ix_users_username",
+                user_id,
+            )
+        if "email" in update_data:
+            del self.store.user_by_email[user.email]  # type: ignore
+            self.store.user_by_email[update_data["email"]] = user_id
+        if "username" in update_data:
+            del self.store.user_by_username[user.username]  # type: ignore
+            self.store.user_by_username[update_data["username"]] = user_id
+        self.store.users[user_id] = user.copy(update=update_data)
+        return user_id
+
+    async def authenticate(
+        self, email: str, password: SecretStr
+    ) -> Optional[schemas.UserDB]:
+        user_db = await self.get_user_by_email(email=email)
+        if not user_db:
+            return None
+        if not verify_password(password, user_db.hashed_password):
+            return None
+        if password_needs_rehash(user_db.hashed_password):
+            user_db.hashed_password = get_password_hash(password)
+            self.store.users[user_db.id] = user_db.copy()
+        return user_db
+
+
+class MemoryArticles:
+    def __init__(self, store: MemoryStore) -> None:
+        self.store = store
+
+    async def create(self, payload: schemas.ArticleInCreate, author_id: int) -> int:
+        store = self.store
+        slug = slugify(payload.title)
+        _check_unique(store.article_by_slug, slug, "article_slugs_pkey")
+        article_id = store.next_id("articles")
+        now = _now()
+        store.articles[article_id] = schemas.ArticleDB(
+            id=article_id,
+            slug=slug,
+            title=payload.title,
+            description=payload.description,
+            body=payload.body,
+            author_id=author_id,
+            created_at=now,
+            updated_at=now,
+        )
+        store.article_by_slug[slug] = article_id
+        key = store.key(article_id)
+        store.recent.add(key)
+        _index(store.recent_by_author, author_id).add(key)
+        self._add_tags(article_id, payload.tagList or [])
+        return article_id
+
+    def _add_tags(self, article_id: int, tags: List[str]) -> None:
+        key = self.store.key(article_id)
+        article_tags = self.store.article_tags.setdefault(article_id, [])
+        for tag in tags:
+            if tag in article_tags:
+                continue
+            self.store.tags[tag] = None
+            article_tags.append(tag)
+            _index(self.store.recent_by_tag, tag).add(key)
+
+    def _remove_tags(self, article_id: int, tags: Iterable[str]) -> None:
+        key = self.store.key(article_id)
+        article_tags = self.store.article_tags.get(article_id, [])
+        for tag in tags:
+            if tag in article_tags:
+                article_tags.remove(tag)
+                self.store.recent_by_tag[tag].remove(key)
+
+    async def get(self, article_id: int) -> Optional[schemas.ArticleDB]:
+        article = self.store.articles.get(article_id)
+        return article.copy() if article else None
+
+    async def get_article_by_sluq(self, slug: str) -> Optional[schemas.ArticleDB]:
+        article_id = self.store.article_by_slug.get(slug)
+        return await self.get(article_id) if article_id is not None else None
+
+    async def is_article_favorited_by_user(self, article_id: int, user_id: int) -> bool:
+        return user_id in self.store.favoriters.get(article_id, ())
+
+    async def favorited_ids(
+        self, article_ids: Iterable[int], user: Optional[schemas.UserDB]
+    ) -> Set[int]:
+        if user is None:
+            return set()
+        return {
+            article_id
+            for article_id in article_ids
+            if user.id in self.store.favoriters.get(article_id, ())
+        }
+
+    async def update(
+        self, article_db: schemas.ArticleDB, payload: schemas.ArticleInUpdate
+    ) -> None:
+        article = self.store.articles.get(article_db.id)
+        if article is None:
+            return
+        update_data = payload.dict(exclude_unset=True)
+        update_data["updated_at"] = _now()
+        new_tags = update_data.pop("tagList", None)
+        self.store.articles[article.id] = article.copy(update=update_data)
+        if new_tags is not None:
+            old_tags = self.store.article_tags.get(article.id, [])
+            self._remove_tags(article.id, set(old_tags) - set(new_tags))
+            self._add_tags(article.id, new_tags)
+
+    async def delete(self, article_db: schemas.ArticleDB) -> None:
+        store = self.store
+        article = store.articles.get(article_db.id)
+        if article is None:
+            return
+        key = store.key(article.id)
+        self._remove_tags(article.id, list(store.article_tags.get(article.id, [])))
+        del store.article_tags[article.id]
+        for user_id in store.favoriters.pop(article.id, set()):
+            store.recent_favorited_by[user_id].remove(key)
+        for comment_id in store.comments_by_article.pop(article.id, []):
+            del store.comments[comment_id]
+        store.recent.remove(key)
+        store.recent_by_author[article.author_id].remove(key)
+        if store.article_by_slug.get(article.slug) == article.id:
+            del store.article_by_slug[article.slug]
+        del store.articles[article.id]
+
+    async def get_all_with_count(
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        tags: Optional[Sequence[str]] = None,
+        any_tag: bool = False,
+        author: Optional[str] = None,
+        favorited: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[schemas.ArticleSummary], int, bool]:
+        """Intersect the indexes of the filters, walking the smallest one.
+
+        Like the Postgres query, an unknown author or favoriting user does
+        not filter anything.
+        """
+        store = self.store
+        indexes = [store.recent]
+        tag_indexes = [
+            store.recent_by_tag.get(tag, SortedIndex()) for tag in tags or ()
+        ]
+        if tag_indexes and any_tag:
+            indexes.append(SortedIndex.union(tag_indexes))
+        else:
+            indexes.extend(tag_indexes)
+        author_id = store.user_by_username.get(author) if author else None
+        if author_id is not None:
+            indexes.append(store.recent_by_author.get(author_id, SortedIndex()))
+        favorited_id = store.user_by_username.get(favorited) if favorited else None
+        if favorited_id is not None:
+            indexes.append(store.recent_favorited_by.get(favorited_id, SortedIndex()))
+        smallest = min(indexes, key=len)
+        others = [index for index in indexes if index is not smallest]
+        if not others:
+            return store.summaries(smallest.page(limit, offset)), len(smallest), False
+        keys = [
+            key for key in smallest.newest() if all(key in index for index in others)
+        ]
+        return store.summaries(keys[offset : offset + limit]), len(keys), False
+
+    async def feed_with_count(
+        self,
+        follow_by: int,
+        limit: int = 20,
+        offset: int = 0,
+        columns: Optional[Sequence[str]] = None,
+        before: Optional[Key] = None,
+    ) -> Tuple[List[schemas.ArticleSummary], int, bool]:
+        """Merge the per-author indexes of the followed users."""
+        store = self.store
+        indexes = [
+            store.recent_by_author[user_id]
+            for user_id in store.following.get(follow_by, ())
+            if user_id in store.recent_by_author
+        ]
+        merged = heapq.merge(*(index.newest(before) for index in indexes), reverse=True)
+        keys = itertools.islice(merged, offset, offset + limit)
+        return store.summaries(keys), sum(map(len, indexes)), False
+
+    async def favorite(self, article_id: int, user_id: int) -> None:
+        favoriters = self.store.favoriters.setdefault(article_id, set())
+        if user_id in favoriters:
+            return
+        favoriters.add(user_id)
+        key = self.store.key(article_id)
+        _index(self.store.recent_favorited_by, user_id).add(key)
+
+    async def unfavorite(self, article_id: int, user_id: int) -> None:
+        favoriters = self.store.favoriters.get(article_id, set())
+        if user_id not in favoriters:
+            return
+        favoriters.remove(user_id)
+        self.store.recent_favorited_by[user_id].remove(self.store.key(article_id))
+
+
+class MemorySummaries:
+    def __init__(self, store: MemoryStore) -> None:
+        self.store = store
+
+    async def get(self, article_id: int) -> Optional[schemas.ArticleSummary]:
+        if article_id not in self.store.articles:
+            return None
+        return self.store.summary(article_id)
+
+    async def get_by_slug(self, slug: str) -> Optional[schemas.ArticleSummary]:
+        article_id = self.store.article_by_slug.get(slug)
+        return await self.get(article_id) if article_id is not None else None
+
+
+class MemoryProfiles:
+    def __init__(self, store: MemoryStore) -> None:
+        self.store = store
+
+    def _profile(
+        self, user_id: int, requested_user: Optional[schemas.UserDB]
+    ) -> schemas.Profile:
+        user = self.store.users[user_id]
+        return schemas.Profile(
+            username=user.username,  # type: ignore
+            bio=user.bio,
+            image=user.image,
+            following=self._is_following(user_id, requested_user),
+        )
+
+    def _is_following(
+        self, user_id: int, follower_by: Optional[schemas.UserDB]
+    ) -> bool:
+        if follower_by is None:
+            return False
+        return follower_by.id in self.store.followers.get(user_id, ())
+
+    async def get_profile_by_username(
+        self, username: str, requested_user: Optional[schemas.UserDB] = None
+    ) -> Optional[schemas.Profile]:
+        user_id = self.store.user_by_username.get(username)
+        if user_id is None:
+            return None
+        return self._profile(user_id, requested_user)
+
+    async def get_profile_by_user_id(
+        self, user_id: int, requested_user: Optional[schemas.UserDB] = None
+    ) -> Optional[schemas.Profile]:
+        if user_id not in self.store.users:
+            return None
+        return self._profile(user_id, requested_user)
+
+    async def get_public_profiles(
+        self, user_ids: Iterable[int]
+    ) -> Dict[int, schemas.PublicProfile]:
+        users = self.store.users
+        return {
+            user_id: schemas.PublicProfile(
+                username=users[user_id].username,  # type: ignore
+                bio=users[user_id].bio,
+                image=users[user_id].image,
+            )
+            for user_id in set(user_ids)
+            if user_id in users
+        }
+
+    async def is_following_user_id(
+        self, user_id: int, follower_by: Optional[schemas.UserDB]
+    ) -> bool:
+        return self._is_following(user_id, follower_by)
+
+    async def following_ids(
+        self, user_ids: Iterable[int], follower_by: Optional[schemas.UserDB]
+    ) -> Set[int]:
+        return {
+            user_id for user_id in user_ids if self._is_following(user_id, follower_by)
+        }
+
+    async def follow_by_username(
+        self, username: str, follower_by: schemas.UserDB
+    ) -> Optional[Tuple[int, schemas.Profile, bool]]:
+        user_id = self.store.user_by_username.get(username)
+        if user_id is None:
+            return None
+        followers = self.store.followers.setdefault(user_id, set())
+        changed = user_id != follower_by.id and follower_by.id not in followers
+        if changed:
+            followers.add(follower_by.id)
+            self.store.following.setdefault(follower_by.id, set()).add(user_id)
+        profile = self._profile(user_id, None)
+        profile.following = True
+        return user_id, profile, changed
+
+    async def unfollow_by_username(
+        self, username: str, follower_by: schemas.UserDB
+    ) -> Optional[Tuple[int, schemas.Profile, bool]]:
+        user_id = self.store.user_by_username.get(username)
+        if user_id is None:
+            return None
+        followers = self.store.followers.get(user_id, set())
+        changed = follower_by.id in followers
+        if changed:
+            followers.remove(follower_by.id)
+            self.store.following[follower_by.id].remove(user_id)
+        return user_id, self._profile(user_id, None), changed
+
+
+class MemoryComments:
+    def __init__(self, store: MemoryStore) -> None:
+        self.store = store
+
+    async def create(
+        self, payload: schemas.CommentInCreate, article_id: int, author_id: int
+    ) -> int:
+        comment_id = self.store.next_id("comments")
+        now = _now()
+        self.store.comments[comment_id] = schemas.CommentDB(
+            id=comment_id,
+            body=payload.body,
+            author_id=author_id,
+            article_id=article_id,
+            created_at=now,
+            updated_at=now,
+        )
+        self.store.comments_by_article.setdefault(article_id, []).append(comment_id)
+        return comment_id
+
+    async def get(self, comment_id: int) -> Optional[schemas.CommentDB]:
+        comment = self.store.comments.get(comment_id)
+        return comment.copy() if comment else None
+
+    async def get_comments_from_an_article(
+        self, article_id: int, since: Optional[datetime.datetime] = None
+    ) -> List[schemas.CommentDB]:
+        return [
+            self.store.comments[comment_id].copy()
+            for comment_id in self.store.comments_by_article.get(article_id, [])
+        ]
+
+    async def delete(self, comment_id: int) -> None:
+        comment = self.store.comments.pop(comment_id, None)
+        if comment is not None:
+            self.store.comments_by_article[comment.article_id].remove(comment_id)
+
+
+class MemoryTags:
+    def __init__(self, store: MemoryStore) -> None:
+        self.store = store
+
+    async def get_all_tags(self) -> List[str]:
+        return list(self.store.tags)
+
+
+def memory_repository(store: Optional[MemoryStore] = None) -> Repository:
+    store = store or MemoryStore()
+    return Repository(
+        users=MemoryUsers(store),
+        articles=MemoryArticles(store),
+        summaries=MemorySummaries(store),
+        profiles=MemoryProfiles(store),
+        comments=MemoryComments(store),
+        tags=MemoryTags(store),
+    )
@@ -0,0 +1,220 @@
+"""Storage interface of the API layer.
+
+Routers and dependencies reach storage through ``repository`` only. The
+Postgres implementation is the crud modules themselves; the in-memory one
+(``app.crud.memory``) serves benchmarks of routing, auth and serialization
+without a database. ``STORAGE_BACKEND`` picks one at import time.
+"""
+import datetime
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from pydantic import SecretStr
+
+from app import schemas
+from app.core.config import settings
+
+
+class UserRepository(Protocol):
+    async def create(self, payload: schemas.UserCreate) -> Optional[int]:
+        ...
+
+    async def get(self, user_id: int) -> Optional[schemas.UserDB]:
+        ...
+
+    async def get_user_by_email(self, email: str) -> Optional[schemas.UserDB]:
+        ...
+
+    async def get_user_by_username(self, username: str) -> Optional[schemas.UserDB]:
+        ...
+
+    async def update(self, user_id: int, payload: schemas.UserUpdate) -> int:
+        ...
+
+    async def authenticate(
+        self, email: str, password: SecretStr
+    ) -> Optional[schemas.UserDB]:
+        ...
+
+
+class ArticleRepository(Protocol):
+    async def create(self, payload: schemas.ArticleInCreate, author_id: int) -> int:
+        ...
+
+    async def get(self, article_id: int) -> Optional[schemas.ArticleDB]:
+        ...
+
+    async def get_article_by_sluq(self, slug: str) -> Optional[schemas.ArticleDB]:
+        ...
+
+    async def is_article_favorited_by_user(self, article_id: int, user_id: int) -> bool:
+        ...
+
+    async def favorited_ids(
+        self, article_ids: Iterable[int], user: Optional[schemas.UserDB]
+    ) -> Set[int]:
+        ...
+
+    async def update(
+        self, article_db: schemas.ArticleDB, payload: schemas.ArticleInUpdate
+    ) -> None:
+        ...
+
+    async def delete(self, article_db: schemas.ArticleDB) -> None:
+        ...
+
+    async def get_all_with_count(
+        self,
+        limit: int = 20,
+        offset: int = 0,
+        tags: Optional[Sequence[str]] = None,
+        any_tag: bool = False,
+        author: Optional[str] = None,
+        favorited: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[schemas.ArticleSummary], int, bool]:
+        ...
+
+    async def feed_with_count(
+        self,
+        follow_by: int,
+        limit: int = 20,
+        offset: int = 0,
+        columns: Optional[Sequence[str]] = None,
+        before: Optional[Tuple[datetime.datetime, int]] = None,
+    ) -> Tuple[List[schemas.ArticleSummary], int, bool]:
+        ...
+
+    async def favorite(self, article_id: int, user_id: int) -> None:
+        ...
+
+    async def unfavorite(self, article_id: int, user_id: int) -> None:
+        ...
+
+
+class ArticleSummaryRepository(Protocol):
+    async def get(self, article_id: int) -> Optional[schemas.ArticleSummary]:
+        ...
+
+    async def get_by_slug(self, slug: str) -> Optional[schemas.ArticleSummary]:
+        ...
+
+
+class ProfileRepository(Protocol):
+    async def get_profile_by_username(
+        self, username: str, requested_user: Optional[schemas.UserDB] = None
+    ) -> Optional[schemas.Profile]:
+        ...
+
+    async def get_profile_by_user_id(
+        self, user_id: int, requested_user: Optional[schemas.UserDB] = None
+    ) -> Optional[schemas.Profile]:
+        ...
+
+    async def get_public_profiles(
+        self, user_ids: Iterable[int]
+    ) -> Dict[int, schemas.PublicProfile]:
+        ...
+
+    async def is_following_user_id(
+        self, user_id: int, follower_by: Optional[schemas.UserDB]
+    ) -> bool:
+        ...
+
+    async def following_ids(
+        self, user_ids: Iterable[int], follower_by: Optional[schemas.UserDB]
+    ) -> Set[int]:
+        ...
+
+    async def follow_by_username(
+        self, username: str, follower_by: schemas.UserDB
+    ) -> Optional[Tuple[int, schemas.Profile, bool]]:
+        ...
+
+    async def unfollow_by_username(
+        self, username: str, follower_by: schemas.UserDB
+    ) -> Optional[Tuple[int, schemas.Profile, bool]]:
+        ...
+
+
+class CommentRepository(Protocol):
+    async def create(
+        self, payload: schemas.CommentInCreate, article_id: int, author_id: int
+    ) -> int:
+        ...
+
+    async def get(self, comment_id: int) -> Optional[schemas.CommentDB]:
+        ...
+
+    async def get_comments_from_an_article(
+        self, article_id: int, since: Optional[datetime.datetime] = None
+    ) -> List[schemas.CommentDB]:
+        ...
+
+    async def delete(self, comment_id: int) -> None:
+        ...
+
+
+class TagRepository(Protocol):
+    async def get_all_tags(self) -> List[str]:
+        ...
+
+
+@dataclass
+class Repository:
+    users: UserRepository
+    articles: ArticleRepository
+    summaries: ArticleSummaryRepository
+    profiles: ProfileRepository
+    comments: CommentRepository
+    tags: TagRepository
+
+    async def gather(self, *reads: Awaitable[Any]) -> List[Any]:
+        """Await independent reads concurrently, see ``GuardedDatabase.gather``."""
+        from app.db import database
+
+        return await database.gather(*reads)
+
+
+def postgres_repository() -> Repository:
+    from app.crud import (
+        crud_article,
+        crud_article_summary,
+        crud_comment,
+        crud_profile,
+        crud_tag,
+        crud_user,
+    )
+
+    return Repository(
+        users=crud_user,
+        articles=crud_article,
+        summaries=crud_article_summary,
+        profiles=crud_profile,
+        comments=crud_comment,
+        tags=crud_tag,
+    )
+
+
+def get_repository(backend: str = settings.STORAGE_BACKEND) -> Repository:
+    if backend == "postgres":
+        return postgres_repository()
+    if backend == "memory":
+        from app.crud.memory import memory_repository
+
+        return memory_repository()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+repository = get_repository()
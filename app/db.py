@@ -1,4 +1,10 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, List, Optional, Tuple
+
 import sqlalchemy
+from asyncpg.exceptions import QueryCanceledError
 from databases import Database
 from sqlalchemy import (
     TIMESTAMP,
@@ -7,18 +13,157 @@ from sqlalchemy import (
     Integer,
     MetaData,
     String,
-    create_engine,
     func,
 )
+from sqlalchemy.dialects.postgresql import ARRAY
 
+from app.core import query_budget
 from app.core.config import settings
+from app.core.slow_queries import slow_queries
+from app.core.tasks import QueueFull, worker
 
-# SQLAlchemy
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI)
 metadata = MetaData()
 
-# database = Database(settings.SQLALCHEMY_DATABASE_URI, force_rollback=settings.TESTING)
-database = Database(settings.SQLALCHEMY_DATABASE_URI)  # type: ignore
+# Connections the current request may use at once, see GuardedDatabase.gather.
+_read_slots: ContextVar[Optional[asyncio.Semaphore]] = ContextVar(
+    "read_slots", default=None
+)
+
+
+class GuardedDatabase(Database):
+    """``Database`` that enforces statement timeouts and request DB budgets.
+
+    The pool sets ``STATEMENT_TIMEOUT_MS`` on every connection. Queries issued
+    from a crud function listed in ``STATEMENT_TIMEOUTS`` run with that
+    timeout instead. Time spent in queries is charged to the request's
+    ``QueryBudget``.
+    """
+
+    async def fetch_all(self, query: Any, values: Any = None) -> Any:
+        return await self._run("fetch_all", query, values)
+
+    async def fetch_one(self, query: Any, values: Any = None) -> Any:
+        return await self._run("fetch_one", query, values)
+
+    async def fetch_val(self, query: Any, values: Any = None, column: Any = 0) -> Any:
+        return await self._run("fetch_val", query, values, column=column)
+
+    async def execute(self, query: Any, values: Any = None) -> Any:
+        return await self._run("execute", query, values)
+
+    async def execute_many(self, query: Any, values: Any) -> Any:
+        return await self._run("execute_many", query, values)
+
+    def use_new_connection(self) -> None:
+        """Give the current task a connection of its own.
+
+        Tasks inherit the connection of the task that created them, and the
+        queries of one connection run one at a time.
+        """
+        if self._global_connection is None:
+            self._new_connection()
+
+    async def gather(self, *reads: Awaitable[Any]) -> List[Any]:
+        """Await independent reads concurrently, and return their results.
+
+        Each read runs in a task with a pooled connection of its own, and a
+        request runs at most ``REQUEST_DB_CONCURRENCY`` of them at once, so
+        that one request cannot starve the pool. Inside a transaction, whose
+        writes other connections do not see, and on the single connection of
+        tests, they run one after another.
+        """
+        if self._in_transaction():
+            return [await read for read in reads]
+        slots = _read_slots.get()
+        if slots is None:
+            slots = asyncio.Semaphore(settings.REQUEST_DB_CONCURRENCY)
+            _read_slots.set(slots)
+
+        async def run(read: Awaitable[Any]) -> Any:
+            async with slots:  # type: ignore
+                self.use_new_connection()
+                return await read
+
+        return list(await asyncio.gather(*map(run, reads)))
+
+    def _in_transaction(self) -> bool:
+        if self._global_connection is not None:
+            return True
+        connection = self._connection_context.get(None)
+        return connection is not None and bool(connection._transaction_stack)
+
+    async def _run(self, method: str, query: Any, *args: Any, **kwargs: Any) -> Any:
+        budget = query_budget.current_budget()
+        if budget is not None:
+            budget.check()
+        # Walking the stack for the crud caller costs on every query: only do
+        # it up front when there are overrides to look up.
+        caller = query_budget.crud_caller() if settings.STATEMENT_TIMEOUTS else None
+        timeout = query_budget.statement_timeout(caller)
+        start = time.perf_counter()
+        try:
+            async with self.connection() as connection:
+                if timeout is None:
+                    return await getattr(connection, method)(query, *args, **kwargs)
+                nested = self._in_transaction()
+                # SET LOCAL ends with the transaction: a cancelled task cannot
+                # leave the override on the pooled connection.
+                async with connection.transaction():
+                    await connection.execute(
+                        f"SET LOCAL statement_timeout = {int(timeout)}"
+                    )
+                    result = await getattr(connection, method)(query, *args, **kwargs)
+                    if nested:
+                        # Released savepoints keep SET LOCAL until the outer
+                        # transaction ends.
+                        await connection.execute(
+                            "SET LOCAL statement_timeout TO DEFAULT"
+                        )
+                    return result
+        except QueryCanceledError:
+            query_budget.record_timeout(caller or query_budget.crud_caller(), query)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            if budget is not None:
+                budget.add(elapsed)
+            if slow_queries.is_slow(elapsed):
+                caller = caller or query_budget.crud_caller()
+                await self._record_slow(method, query, args, elapsed, caller)
+
+    async def _record_slow(
+        self,
+        method: str,
+        query: Any,
+        args: Tuple[Any, ...],
+        elapsed: float,
+        caller: Optional[str],
+    ) -> None:
+        values = args[0] if args and method != "execute_many" else None
+        explain = slow_queries.record(query, values, elapsed, caller)
+        if explain is None:
+            return
+        try:
+            await worker.enqueue("slow_queries", self._explain, *explain, timeout=0)
+        except QueueFull:
+            pass
+
+    async def _explain(self, key: str, statement: Any) -> None:
+        # Bypasses _run: neither budgeted nor logged, and never kept.
+        async with self.connection() as connection:
+            async with connection.transaction(force_rollback=True):
+                rows = await connection.fetch_all(statement)
+        slow_queries.set_plan(key, rows)
+
+
+# In tests every connect() opens a transaction on a single shared connection
+# and disconnect() rolls it back: each test starts from the migrated state.
+database = GuardedDatabase(
+    settings.SQLALCHEMY_DATABASE_URI,  # type: ignore
+    force_rollback=settings.TESTING,
+    server_settings={"statement_timeout": str(settings.STATEMENT_TIMEOUT_MS)},
+)
+
 
 users = sqlalchemy.Table(
     "users",
@@ -49,8 +194,8 @@ tags = sqlalchemy.Table(
 articles = sqlalchemy.Table(
     "articles",
     metadata,
-    Column("id", Integer, primary_key=True, index=True),
-    Column("slug", String, unique=True),
+    Column("id", Integer, primary_key=True, autoincrement=True, index=True),
+    Column("slug", String, index=True),
     Column("title", String),
     Column("description", String),
     Column("body", String),
@@ -58,6 +203,7 @@ articles = sqlalchemy.Table(
     Column(
         "created_at",
         TIMESTAMP(timezone=True),
+        primary_key=True,
         nullable=False,
         server_default=func.now(),
     ),
@@ -69,6 +215,14 @@ articles = sqlalchemy.Table(
     ),
 )
 
+# Slug uniqueness of the partitioned articles table, maintained by a trigger.
+article_slugs = sqlalchemy.Table(
+    "article_slugs",
+    metadata,
+    Column("slug", String, primary_key=True),
+    Column("article_id", Integer, nullable=False),
+)
+
 tag_assoc = sqlalchemy.Table(
     "tag_assoc",
     metadata,
@@ -80,19 +234,20 @@ favoriter_assoc = sqlalchemy.Table(
     "favoriter_assoc",
     metadata,
     Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
-    Column("article_id", Integer, ForeignKey("articles.id"), primary_key=True),
+    Column("article_id", Integer, primary_key=True, index=True),
 )
 
 comments = sqlalchemy.Table(
     "comments",
     metadata,
-    Column("id", Integer, primary_key=True, index=True),
+    Column("id", Integer, primary_key=True, autoincrement=True, index=True),
     Column("body", String),
     Column("author_id", Integer, ForeignKey("users.id")),
-    Column("article_id", Integer, ForeignKey("articles.id")),
+    Column("article_id", Integer),
     Column(
         "created_at",
         TIMESTAMP(timezone=True),
+        primary_key=True,
         nullable=False,
         server_default=func.now(),
     ),
@@ -103,3 +258,23 @@ comments = sqlalchemy.Table(
         server_default=func.now(),
     ),
 )
+
+# Read model of articles, maintained by app.crud.crud_article_summary.
+article_summaries = sqlalchemy.Table(
+    "article_summaries",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("slug", String, unique=True, index=True),
+    Column("title", String),
+    Column("description", String),
+    Column("body", String),
+    Column("author_id", Integer),
+    Column("author_username", String),
+    Column("author_bio", String),
+    Column("author_image", String),
+    Column("tag_list", ARRAY(String), nullable=False, server_default="{}"),
+    Column("favorites_count", Integer, nullable=False, server_default="0"),
+    Column("comments_count", Integer, nullable=False, server_default="0"),
+    Column("created_at", TIMESTAMP(timezone=True), nullable=False, index=True),
+    Column("updated_at", TIMESTAMP(timezone=True), nullable=False),
+)
@@ -0,0 +1,47 @@
+"""Gunicorn configuration, driven by ``app.core.config.Settings``.
+
+Used by ``python -m app.server`` and picked up by the Docker image through
+``GUNICORN_CONF``.
+"""
+import multiprocessing
+from typing import Optional
+
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+from app.core.config import settings
+
+
+def get_workers(
+    cores: int,
+    workers_per_core: float = settings.WORKERS_PER_CORE,
+    web_concurrency: Optional[int] = settings.WEB_CONCURRENCY,
+    max_workers: Optional[int] = settings.MAX_WORKERS,
+) -> int:
+    if web_concurrency:
+        return web_concurrency
+    workers = max(int(workers_per_core * cores), 2)
+    if max_workers:
+        workers = min(workers, max_workers)
+    return workers
+
+
+class UvicornWorker(BaseUvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "lifespan": "on",
+    }
+
+
+bind = f"{settings.SERVER_HOST}:{settings.SERVER_PORT}"
+workers = get_workers(multiprocessing.cpu_count())
+worker_class = "app.gunicorn_conf.UvicornWorker"
+backlog = settings.SERVER_BACKLOG
+keepalive = settings.SERVER_KEEPALIVE
+timeout = settings.SERVER_TIMEOUT
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT
+# Recycle workers so slow leaks cannot grow forever; jitter spreads restarts.
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS_JITTER
+accesslog = None
+errorlog = "-"
@@ -1,21 +1,79 @@
-from fastapi import FastAPI
+from asyncpg.exceptions import QueryCanceledError
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from loguru import logger
+from starlette import status
 
 from app.api import api
+from app.core import query_budget, security
+from app.core.admission import AdmissionControlMiddleware, admission
+from app.core.compression import CompressionMiddleware, compressor
+from app.core.config import settings
+from app.core.invalidation import bus
+from app.core.tasks import worker
+from app.crud import crud_article_summary, crud_partition
 from app.db import database
 
 app = FastAPI()
 
+app.add_middleware(CompressionMiddleware, compressor=compressor)
+app.add_middleware(
+    query_budget.QueryBudgetMiddleware, budget_ms=settings.REQUEST_DB_BUDGET_MS
+)
+app.add_middleware(AdmissionControlMiddleware, controller=admission)
+
 app.include_router(api.api_router, prefix="/api")
 
 
+@app.exception_handler(query_budget.QueryBudgetExceeded)
+async def query_budget_exceeded_handler(
+    request: Request, exc: query_budget.QueryBudgetExceeded
+) -> JSONResponse:
+    logger.warning("{} {}: {}", request.method, request.url.path, exc)
+    return JSONResponse(
+        {"detail": query_budget.BUDGET_EXCEEDED},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+@app.exception_handler(QueryCanceledError)
+async def query_canceled_handler(
+    request: Request, exc: QueryCanceledError
+) -> JSONResponse:
+    return JSONResponse(
+        {"detail": query_budget.QUERY_TIMED_OUT},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
 @app.on_event("startup")
 async def startup() -> None:
+    rounds = await run_in_threadpool(security.calibrate_password_hash)
+    logger.info("Password hash cost: {}", rounds)
+    if settings.STORAGE_BACKEND == "memory":
+        logger.info("Use in-memory storage")
+        await worker.start()
+        return
     logger.info("Connect to database")
     await database.connect()
+    created = await crud_partition.ensure_partitions(settings.PARTITION_MONTHS_AHEAD)
+    logger.info("Partitions created: {}", created)
+    logger.info("Listen for cache invalidations")
+    await bus.start()
+    await crud_article_summary.favorites_counter.start()
+    logger.info("Start background task worker")
+    await worker.start()
 
 
 @app.on_event("shutdown")
 async def shutdown() -> None:
+    logger.info("Drain background task worker")
+    await worker.stop()
+    if settings.STORAGE_BACKEND == "memory":
+        return
+    logger.info("Flush buffered counters")
+    await crud_article_summary.favorites_counter.stop()
+    await bus.stop()
     logger.info("Disconnect to database")
     await database.disconnect()
@@ -2,3 +2,4 @@ from .user import *  # noqa # isort:skip
 from .profile import *  # noqa # isort:skip
 from .article import *  # noqa # isort:skip
 from .comment import *  # noqa # isort:skip
+from .batch import *  # noqa # isort:skip
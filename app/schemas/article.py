@@ -20,6 +20,15 @@ class ArticleDB(ArticleBase):
     updated_at: datetime.datetime
 
 
+class ArticleSummary(ArticleDB):
+    author_username: str
+    author_bio: Optional[str]
+    author_image: Optional[str]
+    tag_list: List[str]
+    favorites_count: int
+    comments_count: int
+
+
 class ArticleInCreate(BaseModel):
     title: str
     description: str
@@ -48,6 +57,24 @@ class ArticleInUpdate(BaseModel):
     tagList: Optional[List[str]]
 
 
+class ArticleInList(BaseModel):
+    """An article of a list, with the fields asked for (all by default)."""
+
+    slug: Optional[str]
+    title: Optional[str]
+    description: Optional[str]
+    body: Optional[str]
+    author: Optional[schemas.Profile]
+    createdAt: Optional[datetime.datetime]
+    updatedAt: Optional[datetime.datetime]
+    tagList: Optional[List[str]]
+    favorited: Optional[bool]
+    favoritesCount: Optional[int]
+
+
 class MultipleArticlesInResponse(BaseModel):
-    articles: List[ArticleForResponse]
+    articles: List[ArticleInList]
     articlesCount: int
+    articlesCountApproximate: bool = False
+    # Cursor of the next page of a feed, if there may be one
+    nextCursor: Optional[str] = None
@@ -0,0 +1,34 @@
+from typing import Any, List
+
+from pydantic import BaseModel, Field, validator
+
+from app.core.config import settings
+
+
+class SubRequest(BaseModel):
+    path: str = Field(..., example="/api/articles/how-to-train-your-dragon")
+
+    @validator("path")
+    def path_is_api(cls, path: str) -> str:
+        if not path.startswith("/api/") or path.startswith("/api/batch"):
+            raise ValueError("must be an API path other than /api/batch")
+        return path
+
+
+class BatchRequest(BaseModel):
+    requests: List[SubRequest]
+
+    @validator("requests")
+    def not_too_many(cls, requests: List[SubRequest]) -> List[SubRequest]:
+        if len(requests) > settings.BATCH_MAX_REQUESTS:
+            raise ValueError(f"at most {settings.BATCH_MAX_REQUESTS} requests")
+        return requests
+
+
+class SubResponse(BaseModel):
+    status: int
+    body: Any
+
+
+class BatchResponse(BaseModel):
+    responses: List[SubResponse]
@@ -3,10 +3,15 @@ from typing import Optional
 from pydantic import BaseModel
 
 
-class Profile(BaseModel):
+class PublicProfile(BaseModel):
+    """The part of a profile that is the same for every viewer."""
+
     username: str
     bio: Optional[str] = None
     image: Optional[str] = None
+
+
+class Profile(PublicProfile):
     following: bool = False
 
 
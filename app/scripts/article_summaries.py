@@ -0,0 +1,62 @@
+"""Maintain the article_summaries read model.
+
+    python -m app.scripts.article_summaries rebuild
+    python -m app.scripts.article_summaries check [--fix]
+
+``rebuild`` recomputes every summary. ``check`` lists the articles whose
+summary differs from the normalized tables and exits with status 1 if there
+are any; ``--fix`` recomputes those summaries. Favorite increments buffered
+by running workers show up as drift until they are flushed, so only
+articles that still differ after a few flush intervals are reported.
+"""
+import argparse
+import asyncio
+import sys
+
+from loguru import logger
+
+from app.core.config import settings
+from app.crud import crud_article_summary
+from app.db import database
+
+
+async def rebuild() -> int:
+    count = await crud_article_summary.rebuild()
+    logger.info("Rebuilt {} article summaries", count)
+    return 0
+
+
+async def check(fix: bool) -> int:
+    drifted = await crud_article_summary.check()
+    if drifted:
+        await asyncio.sleep(settings.COUNTER_FLUSH_INTERVAL * 4)
+        drifted = sorted(set(drifted) & set(await crud_article_summary.check()))
+    if not drifted:
+        logger.info("Article summaries are consistent")
+        return 0
+    logger.warning("{} article summaries differ: {}", len(drifted), drifted[:50])
+    if not fix:
+        return 1
+    await crud_article_summary.refresh(drifted, counts=True)
+    remaining = await crud_article_summary.check()
+    logger.info("Fixed {} article summaries", len(drifted) - len(remaining))
+    return 1 if remaining else 0
+
+
+async def main(args: argparse.Namespace) -> int:
+    await database.connect()
+    try:
+        if args.command == "rebuild":
+            return await rebuild()
+        return await check(args.fix)
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="recompute every summary")
+    check_parser = subparsers.add_parser("check", help="compare with the source")
+    check_parser.add_argument("--fix", action="store_true")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,50 @@
+"""Production entry point: ``python -m app.server``.
+
+Runs gunicorn with uvicorn workers configured by ``app/gunicorn_conf.py``.
+"""
+from typing import Any, Dict
+
+from gunicorn.app.base import BaseApplication
+
+from app import gunicorn_conf
+
+CONFIG_KEYS = (
+    "bind",
+    "workers",
+    "worker_class",
+    "backlog",
+    "keepalive",
+    "timeout",
+    "graceful_timeout",
+    "max_requests",
+    "max_requests_jitter",
+    "accesslog",
+    "errorlog",
+)
+
+
+def get_options() -> Dict[str, Any]:
+    return {key: getattr(gunicorn_conf, key) for key in CONFIG_KEYS}
+
+
+class Server(BaseApplication):  # type: ignore
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> Any:
+        from app.main import app
+
+        return app
+
+
+def main() -> None:
+    Server(get_options()).run()
+
+
+if __name__ == "__main__":
+    main()
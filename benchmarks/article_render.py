@@ -0,0 +1,66 @@
+"""Latency of the single-article and favorite endpoints, one request at a time.
+
+    python -m benchmarks.article_render --url http://localhost:8080 --requests 500
+
+Signs in as a seeded user (``bench1``), then times ``GET /api/articles/{slug}``
+and ``POST /api/articles/{slug}/favorite`` (undone with a ``DELETE`` after
+each) on the newest article, and prints p50/p95/p99 latency of each. Run it
+against a server started with ``REQUEST_DB_CONCURRENCY=1`` (reads of a render
+one after another) and one with the default, to compare.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+
+async def timed(
+    latencies: Dict[str, List[float]], label: str, call: Callable[[], Awaitable]
+) -> None:
+    start = time.perf_counter()
+    response = await call()
+    latencies.setdefault(label, []).append(time.perf_counter() - start)
+    response.raise_for_status()
+
+
+async def run(url: str, requests: int) -> None:
+    async with httpx.AsyncClient(base_url=url, timeout=30) as http:
+        response = await http.post(
+            "/api/users/login",
+            json={"user": {"email": "bench1@example.com", "password": "changeit"}},
+        )
+        response.raise_for_status()
+        http.headers["Authorization"] = f"Token {response.json()['user']['token']}"
+        response = await http.get("/api/articles", params={"limit": 1})
+        response.raise_for_status()
+        path = f"/api/articles/{response.json()['articles'][0]['slug']}"
+
+        latencies: Dict[str, List[float]] = {}
+        for _ in range(requests):
+            await timed(latencies, "GET article", lambda: http.get(path))
+            await timed(
+                latencies, "POST favorite", lambda: http.post(f"{path}/favorite")
+            )
+            await http.delete(f"{path}/favorite")
+
+    for label, values in latencies.items():
+        quantiles = statistics.quantiles(values, n=100)
+        print(
+            f"{label:14} p50: {quantiles[49] * 1000:6.2f} ms  "
+            f"p95: {quantiles[94] * 1000:6.2f} ms  p99: {quantiles[98] * 1000:6.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.requests))
+
+
+if __name__ == "__main__":
+    main()
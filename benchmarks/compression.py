@@ -0,0 +1,91 @@
+"""CPU cost vs. bandwidth of response compression for article lists.
+
+    python -m benchmarks.compression --articles 20 --body-size 4000
+
+Serializes a ``MultipleArticlesInResponse`` like ``GET /api/articles`` and
+reports, per encoding and level, the compressed size and the time to
+compress it, next to the cost of a precompressed-cache hit.
+"""
+import argparse
+import datetime
+import functools
+import gzip
+import hashlib
+import random
+import timeit
+from typing import Callable, Dict
+
+from app import schemas
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+WORDS = "you have to believe in dragons and async python with postgres".split()
+
+
+def article_list(articles: int, body_size: int) -> bytes:
+    rng = random.Random(42)  # nosec
+    now = datetime.datetime.now(datetime.timezone.utc)
+    items = []
+    for i in range(articles):
+        body = " ".join(rng.choice(WORDS) for _ in range(body_size // 5))
+        items.append(
+            schemas.ArticleForResponse(
+                slug=f"how-to-train-your-dragon-{i}",
+                title=f"How to train your dragon {i}",
+                description="Ever wonder how?",
+                body=body[:body_size],
+                createdAt=now,
+                updatedAt=now,
+                author=schemas.Profile(username=f"bench{i}", bio="I work at statefarm"),
+                tagList=["dragons", "training"],
+                favorited=False,
+                favoritesCount=rng.randint(0, 100),
+            )
+        )
+    response = schemas.MultipleArticlesInResponse(
+        articles=items, articlesCount=len(items)
+    )
+    return response.json().encode()
+
+
+def candidates() -> Dict[str, Callable[[bytes], bytes]]:
+    result: Dict[str, Callable[[bytes], bytes]] = {}
+    for level in (1, 6, 9):
+        result[f"gzip-{level}"] = lambda body, level=level: gzip.compress(
+            body, compresslevel=level, mtime=0
+        )
+    if brotli is not None:
+        for quality in (1, 4, 6, 11):
+            result[f"br-{quality}"] = lambda body, quality=quality: brotli.compress(
+                body, quality=quality
+            )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--body-size", type=int, default=4000)
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+    body = article_list(args.articles, args.body_size)
+    print(f"uncompressed: {len(body)} bytes")
+    print(f"{'encoding':<10} {'bytes':>8} {'ratio':>6} {'ms/response':>12}")
+    for name, compress in candidates().items():
+        size = len(compress(body))
+        seconds = timeit.timeit(functools.partial(compress, body), number=args.number)
+        print(
+            f"{name:<10} {size:>8} {size / len(body):>6.2f} "
+            f"{seconds / args.number * 1000:>12.3f}"
+        )
+    seconds = timeit.timeit(
+        lambda: hashlib.blake2b(body, digest_size=16).digest(), number=args.number
+    )
+    print(f"{'cache hit':<10} {'':>8} {'':>6} {seconds / args.number * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
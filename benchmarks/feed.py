@@ -0,0 +1,143 @@
+"""Compare the two feed strategies by number of followed authors.
+
+    python -m benchmarks.feed --authors 10000 --articles-per-author 20
+
+Inserts ``--authors`` authors with ``--articles-per-author`` articles each
+(with ``generate_series``, straight into the tables and their summaries),
+and readers following 10, 1k and 10k of them. Then prints the execution
+time reported by ``EXPLAIN ANALYZE`` of the first feed page, and of a page
+further down reached with a keyset cursor, for the join strategy and the
+LATERAL merge strategy.
+"""
+import argparse
+import asyncio
+import json
+from typing import List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import Select
+
+from app import db
+from app.core.slow_queries import compile_query
+from app.crud import crud_article, crud_article_summary
+from app.crud.crud_article import FeedCursor
+from app.db import database
+
+FOLLOWS = [10, 1000, 10000]
+
+PREFIX = "feed-bench-"
+
+
+async def generate(authors: int, articles_per_author: int) -> None:
+    await database.execute(
+        "SELECT create_monthly_partitions('articles', "
+        "(now() - interval '1 year')::date, now()::date)"
+    )
+    await database.execute(
+        """
+        INSERT INTO users (username, email, hashed_password)
+        SELECT :prefix || n, :prefix || n || '@example.com', 'x'
+        FROM generate_series(1, :authors) AS n
+        UNION ALL
+        SELECT :prefix || 'reader-' || f, :prefix || 'reader-' || f || '@example.com', 'x'
+        FROM unnest(CAST(:follows AS integer[])) AS f
+        """,
+        values={"prefix": PREFIX, "authors": authors, "follows": FOLLOWS},
+    )
+    await database.execute(
+        """
+        INSERT INTO articles (slug, title, description, body, author_id, created_at)
+        SELECT 'feed-bench-' || u.id || '-' || n, 'Feed bench', 'bench',
+               repeat('Lorem ipsum ', 50), u.id,
+               now() - interval '1 year' * random()
+        FROM users u, generate_series(1, :count) AS n
+        WHERE u.username LIKE :prefix || '%' AND u.username NOT LIKE '%reader%'
+        """,
+        values={"prefix": PREFIX, "count": articles_per_author},
+    )
+    await database.execute(
+        """
+        INSERT INTO followers_assoc (follower, followed_by)
+        SELECT author.id, reader.id
+        FROM users reader
+        CROSS JOIN LATERAL (
+            SELECT id FROM users
+            WHERE username LIKE :prefix || '%' AND username NOT LIKE '%reader%'
+            ORDER BY random()
+            LIMIT split_part(reader.username, '-', 4)::integer
+        ) AS author
+        WHERE reader.username LIKE :prefix || 'reader-%'
+        """,
+        values={"prefix": PREFIX},
+    )
+    summaries = insert(db.article_summaries).from_select(
+        crud_article_summary.SUMMARY_COLUMNS,
+        crud_article_summary._summary_select().where(
+            db.articles.c.slug.like(f"{PREFIX}%")
+        ),
+    )
+    await database.execute(query=summaries)
+    for table in ("users", "articles", "followers_assoc", "article_summaries"):
+        await database.execute(f"ANALYZE {table}")
+
+
+async def explain(label: str, query: Select) -> None:
+    sql, params = compile_query(query, None)
+    row = await database.fetch_one(
+        "EXPLAIN (ANALYZE, FORMAT JSON) " + sql, values=params
+    )
+    result = row[0]  # type: ignore
+    plan = (json.loads(result) if isinstance(result, str) else result)[0]
+    print(f"{label:44} {plan['Execution Time']:9.2f} ms")
+
+
+async def cursor_at(reader_id: int, depth: int) -> Optional[FeedCursor]:
+    rows = await database.fetch_all(
+        query=crud_article._feed_query(reader_id).limit(depth)
+    )
+    return (rows[-1]["created_at"], rows[-1]["id"]) if rows else None
+
+
+async def main(
+    authors: int, articles_per_author: int, limit: int, depth: int, skip: bool
+) -> None:
+    await database.connect()
+    if not skip:
+        await generate(authors, articles_per_author)
+    for follows in FOLLOWS:
+        reader_id = await database.fetch_val(
+            "SELECT id FROM users WHERE username = :username",
+            values={"username": f"{PREFIX}reader-{follows}"},
+        )
+        count = await crud_article.follow_count(reader_id)
+        before = await cursor_at(reader_id, depth)
+        pages: List = [("first page", None), (f"after {depth} articles", before)]
+        for page, cursor in pages:
+            await explain(
+                f"{count:5} follows, join,  {page}",
+                crud_article._feed_query(reader_id, before=cursor).limit(limit),
+            )
+            await explain(
+                f"{count:5} follows, merge, {page}",
+                crud_article._feed_merge_query(reader_id, limit, before=cursor),
+            )
+    await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--authors", type=int, default=10000)
+    parser.add_argument("--articles-per-author", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=1000)
+    parser.add_argument("--skip-generate", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.authors,
+            args.articles_per_author,
+            args.limit,
+            args.depth,
+            args.skip_generate,
+        )
+    )
@@ -0,0 +1,69 @@
+"""Closed-loop HTTP load generator for a running server.
+
+    python -m benchmarks.http_throughput --url http://localhost:8080 \
+        --concurrency 64 --duration 30
+
+Each of ``--concurrency`` clients requests the paths round-robin for
+``--duration`` seconds; prints throughput and latency percentiles.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+PATHS = [
+    "/api/articles?limit=20",
+    "/api/articles?tag=python&limit=20",
+    "/api/articles?author=bench1&limit=20",
+    "/api/tags",
+    "/api/profiles/bench1",
+]
+
+
+async def client(
+    http: httpx.AsyncClient, deadline: float, latencies: List[float], errors: List[int]
+) -> None:
+    i = 0
+    while time.perf_counter() < deadline:
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        start = time.perf_counter()
+        r = await http.get(path)
+        latencies.append(time.perf_counter() - start)
+        if r.status_code >= 400:
+            errors.append(r.status_code)
+
+
+async def run(url: str, concurrency: int, duration: float) -> None:
+    latencies: List[float] = []
+    errors: List[int] = []
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as http:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *(client(http, deadline, latencies, errors) for _ in range(concurrency))
+        )
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"requests: {len(latencies)}  errors: {len(errors)}")
+    print(f"throughput: {len(latencies) / duration:.1f} req/s")
+    print(
+        f"latency p50: {quantiles[49] * 1000:.1f} ms  "
+        f"p95: {quantiles[94] * 1000:.1f} ms  p99: {quantiles[98] * 1000:.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Measure cold import time of ``app.main`` with ``python -X importtime``.
+
+    python -m benchmarks.import_time --budget-ms 600 --repeat 5
+
+Prints the best cumulative import time over ``--repeat`` fresh interpreters
+and the slowest imported packages, and exits with status 1 when the best run
+is over ``--budget-ms``.
+"""
+import argparse
+import subprocess  # nosec
+import sys
+from typing import Dict, List, Tuple
+
+MODULE = "app.main"
+
+
+def import_times(module: str = MODULE) -> Dict[str, int]:
+    """Cumulative import time in microseconds per module, from a fresh process."""
+    result = subprocess.run(  # nosec
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:  # header line
+            continue
+    return times
+
+
+def top_level(times: Dict[str, int], count: int) -> List[Tuple[str, int]]:
+    packages: Dict[str, int] = {}
+    for name, cumulative in times.items():
+        package = name.split(".")[0]
+        packages[package] = max(packages.get(package, 0), cumulative)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=600)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    runs = [import_times() for _ in range(args.repeat)]
+    best = min(runs, key=lambda times: times[MODULE])
+    best_ms = best[MODULE] / 1000
+    print(f"{MODULE}: {best_ms:.1f} ms (best of {args.repeat})")
+    for package, cumulative in top_level(best, args.top):
+        print(f"  {package:<24} {cumulative / 1000:8.1f} ms")
+    if best_ms > args.budget_ms:
+        print(f"over budget: {best_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
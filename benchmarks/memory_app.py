@@ -0,0 +1,26 @@
+"""The app on the in-memory storage backend, seeded on startup.
+
+    STORAGE_BACKEND=memory uvicorn benchmarks.memory_app:app --port 8080
+
+Measures routing, auth and serialization without Postgres in the way.
+"""
+from loguru import logger
+
+from app.core.config import settings
+from app.crud.repository import repository
+from app.main import app
+from benchmarks.seed import seed_repository
+
+if settings.STORAGE_BACKEND != "memory":
+    raise RuntimeError("Set STORAGE_BACKEND=memory to benchmark the API layer")
+
+
+@app.on_event("startup")
+async def seed() -> None:
+    logger.info("Seed in-memory storage")
+    await seed_repository(
+        repository, users=50, articles=20, follows=20, favorites=20, comments=5
+    )
+
+
+__all__ = ["app"]
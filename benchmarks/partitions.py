@@ -0,0 +1,129 @@
+"""Measure partition pruning of the crud queries on a multi-year dataset.
+
+    python -m benchmarks.partitions --years 5 --articles-per-day 200
+
+Inserts articles, their summaries and comments spread over the last
+``--years`` years with ``generate_series`` (authored by the first user, run
+``benchmarks.seed`` first), then prints, for the queries built by the crud
+modules, the relations the plan reads and the execution time reported by
+``EXPLAIN ANALYZE``.
+"""
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from sqlalchemy import desc
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import Select
+
+from app import db
+from app.core.slow_queries import compile_query
+from app.crud import crud_article, crud_article_summary, crud_comment
+from app.db import database
+
+
+async def generate(years: int, articles_per_day: int) -> None:
+    for table in ("articles", "comments"):
+        await database.execute(
+            f"SELECT create_monthly_partitions('{table}', "
+            "(now() - make_interval(years => :years))::date, now()::date)",
+            values={"years": years},
+        )
+    await database.execute(
+        """
+        INSERT INTO articles (slug, title, description, body, author_id, created_at)
+        SELECT 'partition-bench-' || n, 'Partition bench ' || n, 'bench',
+               repeat('Lorem ipsum ', 50), (SELECT min(id) FROM users),
+               now() - make_interval(years => :years) * random()
+        FROM generate_series(1, :count) AS n
+        """,
+        values={"years": years, "count": years * 365 * articles_per_day},
+    )
+    await database.execute(
+        """
+        INSERT INTO comments (body, author_id, article_id, created_at)
+        SELECT 'bench', a.author_id, a.id, a.created_at + interval '1 hour' * n
+        FROM articles a, generate_series(1, 3) AS n
+        WHERE a.slug LIKE 'partition-bench-%'
+        """
+    )
+    summaries = insert(db.article_summaries).from_select(
+        crud_article_summary.SUMMARY_COLUMNS,
+        crud_article_summary._summary_select().where(
+            db.articles.c.slug.like("partition-bench-%")
+        ),
+    )
+    await database.execute(query=summaries)
+    for table in ("articles", "comments", "article_summaries"):
+        await database.execute(f"ANALYZE {table}")
+
+
+def relations(plan: Dict[str, Any]) -> List[str]:
+    """Relations the plan read: children of a Merge Append that were never
+    executed (``LIMIT`` satisfied by newer partitions) are left out."""
+    if plan.get("Actual Loops") == 0:
+        return []
+    names = [plan["Relation Name"]] if "Relation Name" in plan else []
+    for child in plan.get("Plans", []):
+        names.extend(relations(child))
+    return names
+
+
+async def explain(name: str, query: Select) -> None:
+    sql, params = compile_query(query, None)
+    row = await database.fetch_one(
+        "EXPLAIN (ANALYZE, FORMAT JSON) " + sql, values=params
+    )
+    result = row[0]  # type: ignore
+    plan = (json.loads(result) if isinstance(result, str) else result)[0]
+    touched = sorted(set(relations(plan["Plan"])))
+    print(
+        f"{name:40} {plan['Execution Time']:9.2f} ms  "
+        f"{len(touched):3} relations  {', '.join(touched[:4])}"
+        + (" ..." if len(touched) > 4 else "")
+    )
+
+
+async def main(years: int, articles_per_day: int, skip_generate: bool) -> None:
+    await database.connect()
+    if not skip_generate:
+        await generate(years, articles_per_day)
+    article = await database.fetch_one(
+        query=db.articles.select().order_by(desc(db.articles.c.created_at)).limit(1)
+    )
+    author = await database.fetch_val(
+        query=db.users.select()
+        .with_only_columns([db.users.c.username])
+        .where(db.users.c.id == article["author_id"])  # type: ignore
+    )
+    article_id, since = article["id"], article["created_at"]  # type: ignore
+    queries = {
+        "recent articles": await crud_article._get_all_query(),
+        "recent articles of an author": await crud_article._get_all_query(
+            author=author
+        ),
+        "comments of a recent article": crud_comment._comments_query(article_id, since),
+        "comments of a recent article, unpruned": crud_comment._comments_query(
+            article_id
+        ),
+        # Not a crud query: lists read the summaries. Shows whether the
+        # partitions are read newest first.
+        "newest rows of articles": db.articles.select()
+        .order_by(desc(db.articles.c.created_at))
+        .limit(20),
+    }
+    for name, query in queries.items():
+        if name.startswith("recent articles"):
+            query = query.limit(20)
+        await explain(name, query)
+    await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--articles-per-day", type=int, default=200)
+    parser.add_argument("--skip-generate", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.years, args.articles_per_day, args.skip_generate))
@@ -0,0 +1,94 @@
+"""Seed a database with a realistic dataset for benchmarks.
+
+    python -m benchmarks.seed --users 200 --articles 20
+
+Every user writes ``--articles`` articles with a few tags, follows
+``--follows`` other users, favorites ``--favorites`` articles and comments on
+``--comments`` articles. Run ``alembic upgrade head`` first.
+"""
+import argparse
+import asyncio
+import random
+
+from pydantic import SecretStr
+
+from app import schemas
+from app.crud.repository import Repository, postgres_repository
+from app.db import database
+
+TAGS = ["python", "async", "fastapi", "postgres", "docker", "testing", "dragons"]
+
+
+async def seed(
+    users: int, articles: int, follows: int, favorites: int, comments: int
+) -> None:
+    await database.connect()
+    await seed_repository(
+        postgres_repository(), users, articles, follows, favorites, comments
+    )
+    await database.disconnect()
+
+
+async def seed_repository(
+    repository: Repository,
+    users: int,
+    articles: int,
+    follows: int,
+    favorites: int,
+    comments: int,
+) -> None:
+    rng = random.Random(42)  # nosec
+    user_dbs = []
+    for i in range(users):
+        user_in = schemas.UserCreate(
+            username=f"bench{i}",
+            email=f"bench{i}@example.com",
+            password=SecretStr("changeit"),
+        )
+        user_db = await repository.users.get_user_by_email(email=user_in.email)
+        if user_db is None:
+            user_id = await repository.users.create(user_in)
+            user_db = await repository.users.get(user_id)  # type: ignore
+        user_dbs.append(user_db)
+    article_ids = []
+    for user_db in user_dbs:
+        for j in range(articles):
+            article_in = schemas.ArticleInCreate(
+                title=f"{user_db.username} article {j} {rng.random()}",
+                description="Benchmark article",
+                body="Lorem ipsum dolor sit amet. " * rng.randint(20, 200),
+                tagList=rng.sample(TAGS, rng.randint(1, 3)),
+            )
+            article_ids.append(await repository.articles.create(article_in, user_db.id))
+    for user_db in user_dbs:
+        for other in rng.sample(user_dbs, min(follows, len(user_dbs))):
+            if other.id != user_db.id:
+                await repository.profiles.follow_by_username(
+                    other.username, user_db  # type: ignore
+                )
+        for article_id in rng.sample(article_ids, min(favorites, len(article_ids))):
+            await repository.articles.unfavorite(article_id, user_db.id)
+            await repository.articles.favorite(article_id, user_db.id)
+        for article_id in rng.sample(article_ids, min(comments, len(article_ids))):
+            await repository.comments.create(
+                schemas.CommentInCreate(body="Benchmark comment"),
+                article_id=article_id,
+                author_id=user_db.id,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--follows", type=int, default=20)
+    parser.add_argument("--favorites", type=int, default=20)
+    parser.add_argument("--comments", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(
+        seed(args.users, args.articles, args.follows, args.favorites, args.comments)
+    )
+
+
+if __name__ == "__main__":
+    main()
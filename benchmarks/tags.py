@@ -0,0 +1,130 @@
+"""Compare multi-tag filters: tag_assoc joins against the GIN-indexed array.
+
+    python -m benchmarks.tags --articles 200000 --tags 500
+
+Inserts ``--articles`` articles with three tags each out of ``--tags``
+(skewed, so a few are popular), with their summaries. Then prints the
+execution time reported by ``EXPLAIN ANALYZE`` of the first page of articles
+having one tag, all of two and three tags, and any of three, filtered with
+one ``tag_assoc`` join per tag (``EXISTS`` for any) and with the array
+operators on ``article_summaries.tag_list``.
+"""
+import argparse
+import asyncio
+import json
+from typing import List
+
+from sqlalchemy import desc, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import Select
+
+from app import db
+from app.core.slow_queries import compile_query
+from app.crud import crud_article, crud_article_summary
+from app.db import database
+
+PREFIX = "tags-bench-"
+
+
+async def generate(articles: int, tags: int) -> None:
+    await database.execute(
+        "SELECT create_monthly_partitions('articles', "
+        "(now() - interval '1 year')::date, now()::date)"
+    )
+    await database.execute(
+        "INSERT INTO users (username, email, hashed_password) "
+        "VALUES (:username, :email, 'x')",
+        values={"username": PREFIX, "email": f"{PREFIX}@example.com"},
+    )
+    await database.execute(
+        """
+        INSERT INTO tags (tag)
+        SELECT :prefix || n FROM generate_series(1, :tags) AS n
+        ON CONFLICT DO NOTHING
+        """,
+        values={"prefix": PREFIX, "tags": tags},
+    )
+    await database.execute(
+        """
+        INSERT INTO articles (slug, title, description, body, author_id, created_at)
+        SELECT :prefix || n, 'Tags bench', 'bench', repeat('Lorem ipsum ', 50),
+               u.id, now() - interval '1 year' * random()
+        FROM users u, generate_series(1, :articles) AS n
+        WHERE u.username = :prefix
+        """,
+        values={"prefix": PREFIX, "articles": articles},
+    )
+    await database.execute(
+        """
+        INSERT INTO tag_assoc (article_id, tag)
+        SELECT a.id, :prefix || (1 + floor(random() ^ 3 * :tags)::integer)
+        FROM articles a, generate_series(1, 3)
+        WHERE a.slug LIKE :prefix || '%'
+        ON CONFLICT DO NOTHING
+        """,
+        values={"prefix": PREFIX, "tags": tags},
+    )
+    summaries = insert(db.article_summaries).from_select(
+        crud_article_summary.SUMMARY_COLUMNS,
+        crud_article_summary._summary_select().where(
+            db.articles.c.slug.like(f"{PREFIX}%")
+        ),
+    )
+    await database.execute(query=summaries)
+    for table in ("articles", "tag_assoc", "article_summaries"):
+        await database.execute(f"ANALYZE {table}")
+
+
+def join_query(tags: List[str], any_tag: bool) -> Select:
+    """The filter before the tag_list index: a join per tag."""
+    summaries = db.article_summaries
+    query = select([summaries]).order_by(desc(summaries.c.created_at))
+    if any_tag:
+        tagged = exists().where(
+            (db.tag_assoc.c.article_id == summaries.c.id) & db.tag_assoc.c.tag.in_(tags)
+        )
+        return query.where(tagged)
+    j = summaries
+    for i, tag in enumerate(tags):
+        assoc = db.tag_assoc.alias(f"tag_assoc_{i}")
+        j = j.join(assoc, summaries.c.id == assoc.c.article_id)  # type: ignore
+        query = query.where(assoc.c.tag == tag)
+    return query.select_from(j)
+
+
+async def explain(label: str, query: Select) -> None:
+    sql, params = compile_query(query, None)
+    row = await database.fetch_one(
+        "EXPLAIN (ANALYZE, FORMAT JSON) " + sql, values=params
+    )
+    result = row[0]  # type: ignore
+    plan = (json.loads(result) if isinstance(result, str) else result)[0]
+    print(f"{label:36} {plan['Execution Time']:9.2f} ms")
+
+
+async def main(articles: int, tags: int, limit: int, skip: bool) -> None:
+    await database.connect()
+    if not skip:
+        await generate(articles, tags)
+    # Tag 1 is the most popular; tags further down are rarer.
+    cases = [
+        ("1 tag", [f"{PREFIX}1"], False),
+        ("all of 2 tags", [f"{PREFIX}1", f"{PREFIX}2"], False),
+        ("all of 3 tags", [f"{PREFIX}1", f"{PREFIX}2", f"{PREFIX}3"], False),
+        ("any of 3 tags", [f"{PREFIX}1", f"{PREFIX}50", f"{PREFIX}100"], True),
+    ]
+    for label, names, any_tag in cases:
+        await explain(f"{label}, joins", join_query(names, any_tag).limit(limit))
+        query = await crud_article._get_all_query(names, any_tag)
+        await explain(f"{label}, tag_list", query.limit(limit))
+    await database.disconnect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=200000)
+    parser.add_argument("--tags", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--skip-generate", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.articles, args.tags, args.limit, args.skip_generate))
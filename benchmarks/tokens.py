@@ -0,0 +1,58 @@
+"""Microbenchmarks of access token creation and verification.
+
+    python -m benchmarks.tokens --number 10000
+
+Prints the time per call of ``create_access_token``, of encoding and of an
+uncached verification with each installed JWT backend (``JWT_BACKEND``), and
+of ``get_user_id_from_token`` on a token it verified before (a cache hit).
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable
+
+from app.core import security
+from app.core.config import settings
+
+
+def report(label: str, number: int, call: Callable[[], object]) -> None:
+    seconds = timeit.timeit(call, number=number)
+    print(f"{label:30} {seconds / number * 1e6:8.2f} us/call")
+
+
+def bench_backend(name: str, number: int, token: str) -> None:
+    backend = security.get_jwt_backend(name)
+    claims = {"sub": "1", "exp": datetime.utcnow() + timedelta(days=1)}
+    try:
+        backend.encode(claims, settings.SECRET_KEY)
+    except ImportError:
+        print(f"{name}: not installed")
+        return
+    report(
+        f"{name} encode", number, lambda: backend.encode(claims, settings.SECRET_KEY)
+    )
+    report(f"{name} verify", number, lambda: backend.decode(token, settings.SECRET_KEY))
+
+
+def main(number: int) -> None:
+    report(
+        f"create_access_token ({settings.JWT_BACKEND})",
+        number,
+        lambda: security.create_access_token(1),
+    )
+    token = security.create_access_token(1)
+    for name in security.JWT_BACKENDS:
+        bench_backend(name, number, token)
+    security.get_user_id_from_token(token)
+    report(
+        "get_user_id_from_token, cached",
+        number,
+        lambda: security.get_user_id_from_token(token),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.number)
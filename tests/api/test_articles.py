@@ -212,6 +212,72 @@ async def test_list_articles(
         )
 
 
+async def test_list_articles_fields(
+    async_client: AsyncClient, test_user: schemas.UserDB
+):
+    await create_test_article(test_user)
+
+    params = {"fields": "slug,title,author", "author": test_user.username}
+    r = await async_client.get(API_ARTICLES, params=params)
+    assert r.status_code == status.HTTP_200_OK
+    article = r.json()["articles"][0]
+    assert set(article) == {"slug", "title", "author"}
+    assert article["author"]["username"] == test_user.username
+
+    params = {"include_body": "false", "author": test_user.username}
+    r = await async_client.get(API_ARTICLES, params=params)
+    assert r.status_code == status.HTTP_200_OK
+    article = r.json()["articles"][0]
+    assert "body" not in article
+    assert "description" in article
+
+    r = await async_client.get(API_ARTICLES, params={"fields": "slug,password"})
+    assert r.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+async def test_list_articles_favorited(
+    async_client: AsyncClient, test_user: schemas.UserDB, token: str
+):
+    article_ids = [(await create_test_article(test_user))[1] for _ in range(3)]
+    await crud_article.favorite(article_id=article_ids[1], user_id=test_user.id)
+
+    headers = {"Authorization": f"{JWT_TOKEN_PREFIX} {token}"}
+    params = {"fields": "slug,favorited", "author": test_user.username}
+    r = await async_client.get(API_ARTICLES, params=params, headers=headers)
+    assert r.status_code == status.HTTP_200_OK
+    articles = r.json()["articles"]
+    assert [article["favorited"] for article in articles] == [False, True, False]
+
+
+@pytest.mark.parametrize(
+    "tag,tag_match,found",
+    [
+        ("reactjs,dragons", "all", True),
+        ("reactjs,no-such-tag", "all", False),
+        ("reactjs,no-such-tag", "any", True),
+        ("no-such-tag,other-tag", "any", False),
+    ],
+)
+async def test_list_articles_multiple_tags(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    tag: str,
+    tag_match: str,
+    found: bool,
+):
+    await create_test_article(test_user)
+    params = {"tag": tag, "tag_match": tag_match, "author": test_user.username}
+    r = await async_client.get(API_ARTICLES, params=params)
+    assert r.status_code == status.HTTP_200_OK
+    assert (r.json()["articlesCount"] > 0) == found
+
+
+async def test_list_articles_invalid_tag_match(async_client: AsyncClient):
+    params = {"tag": "reactjs", "tag_match": "some"}
+    r = await async_client.get(API_ARTICLES, params=params)
+    assert r.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 async def test_feed_articles(
     async_client: AsyncClient,
     test_user: schemas.UserDB,
@@ -234,6 +300,35 @@ async def test_feed_articles(
         )
 
 
+async def test_feed_articles_cursor(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    token: str,
+    other_user: schemas.UserDB,
+):
+    headers = {"Authorization": f"{JWT_TOKEN_PREFIX} {token}"}
+    for _ in range(3):
+        await create_test_article(other_user)
+    await crud_profile.follow(other_user, test_user)
+
+    slugs = []
+    params = {"limit": 2, "fields": "slug"}
+    while True:
+        r = await async_client.get(
+            f"{API_ARTICLES}/feed", params=params, headers=headers
+        )
+        assert r.status_code == status.HTTP_200_OK
+        slugs += [article["slug"] for article in r.json()["articles"]]
+        if not r.json()["nextCursor"]:
+            break
+        params["cursor"] = r.json()["nextCursor"]
+    assert len(slugs) == len(set(slugs)) == 3
+
+    params = {"cursor": "not a cursor"}
+    r = await async_client.get(f"{API_ARTICLES}/feed", params=params, headers=headers)
+    assert r.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
 async def test_favorite_unfavorited_article_not_existed(
     async_client: AsyncClient,
     token: str,
@@ -0,0 +1,52 @@
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+from app import schemas
+from app.core.config import settings
+from tests.utils.article import create_test_article
+
+pytestmark = pytest.mark.asyncio
+
+API_BATCH = "/api/batch"
+JWT_TOKEN_PREFIX = "Token"
+
+
+async def test_batch(async_client: AsyncClient, test_user: schemas.UserDB, token: str):
+    article_in, _article_id = await create_test_article(test_user)
+    articles = "/api/articles?limit=1&fields=title"
+    paths = ["/api/user", "/api/tags", articles, "/api/articles/not-existed"]
+    headers = {"Authorization": f"{JWT_TOKEN_PREFIX} {token}"}
+    r = await async_client.post(
+        API_BATCH,
+        json={"requests": [{"path": path} for path in paths]},
+        headers=headers,
+    )
+    assert r.status_code == status.HTTP_200_OK
+    user, tags, articles, missing = r.json()["responses"]
+    assert user["status"] == status.HTTP_200_OK
+    assert user["body"]["user"]["username"] == test_user.username
+    assert "tags" in tags["body"]
+    assert articles["body"]["articles"] == [{"title": article_in["title"]}]
+    assert missing["status"] == status.HTTP_400_BAD_REQUEST
+
+
+async def test_batch_without_authentication(async_client: AsyncClient):
+    r = await async_client.post(API_BATCH, json={"requests": [{"path": "/api/user"}]})
+    assert r.status_code == status.HTTP_200_OK
+    assert r.json()["responses"][0]["status"] == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.parametrize(
+    "paths",
+    [
+        ["/docs"],
+        ["/api/batch"],
+        ["/api/tags"] * (settings.BATCH_MAX_REQUESTS + 1),
+    ],
+)
+async def test_batch_invalid(async_client: AsyncClient, paths):
+    r = await async_client.post(
+        API_BATCH, json={"requests": [{"path": path} for path in paths]}
+    )
+    assert r.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
@@ -0,0 +1,13 @@
+import pytest
+from httpx import AsyncClient
+from starlette import status
+
+pytestmark = pytest.mark.asyncio
+
+API_METRICS = "/api/metrics"
+
+
+async def test_get_metrics(async_client: AsyncClient):
+    r = await async_client.get(f"{API_METRICS}")
+    assert r.status_code == status.HTTP_200_OK
+    assert "tasks" in r.json()
@@ -6,17 +6,25 @@ from typing import AsyncGenerator
 import pytest
 from asgi_lifespan import LifespanManager
 from httpx import AsyncClient
-from sqlalchemy_utils import create_database, database_exists, drop_database
-
-from alembic import command
-from alembic.config import Config
 
 environ["TESTING"] = "True"
+# Cheapest bcrypt cost: tests hash many passwords, and skip calibration.
+environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+# One database per pytest-xdist worker (gw0, gw1, ...), cloned from one template.
+if environ.get("PYTEST_XDIST_WORKER"):
+    environ["TEST_DB_SUFFIX"] = f"_{environ['PYTEST_XDIST_WORKER']}"
 
 from app import schemas  # noqa: E402
 from app.core import security  # noqa: E402
 from app.core.config import settings  # noqa: E402
+from app.core.invalidation import bus  # noqa: E402
 from app.main import app  # noqa: E402
+from tests.utils.database import (  # noqa: E402
+    clone_database,
+    drop_database,
+    ensure_template,
+    with_database,
+)
 from tests.utils.user import get_test_user  # noqa: E402
 
 sys.path.append(str(pathlib.Path().absolute().parent))
@@ -26,27 +34,26 @@ DROP_DATABASE_AFTER_TEST = False
 
 @pytest.fixture(scope="session", autouse=True)
 def create_test_database():
-    root_dir = pathlib.Path(__file__).absolute().parent.parent
-    ini_file = root_dir.joinpath("alembic.ini").__str__()
-    alembic_directory = root_dir.joinpath("alembic").__str__()
-    url = settings.SQLALCHEMY_DATABASE_URI
-    if DROP_DATABASE_AFTER_TEST:
-        assert not database_exists(url), "Test database already exists. Aborting tests."
-    elif not database_exists(url):
-        create_database(url)  # Create the test database.
-
-    config = Config(ini_file)  # Run the migrations.
-    config.set_main_option("script_location", alembic_directory)
-    command.downgrade(config, "base")
-    command.upgrade(config, "head")
+    """Copy the test database (of this xdist worker) from a migrated template.
+
+    The template is migrated once and rebuilt only when the migration
+    scripts change. Tests do not leak rows: ``database`` rolls back
+    everything when the app shuts down at the end of each test.
+    """
+    url = str(settings.SQLALCHEMY_DATABASE_URI)
+    template = with_database(url, f"test_{settings.POSTGRES_DB}_template")
+    ensure_template(template)
+    clone_database(template, url)
     yield  # Run the tests.
     if DROP_DATABASE_AFTER_TEST:
-        drop_database(url)  # Drop the test database.
+        drop_database(url)
 
 
 @pytest.fixture()
 async def async_client() -> AsyncGenerator[AsyncClient, None]:
     async with LifespanManager(app):
+        # Cached rows of earlier tests were rolled back.
+        bus.flush()
         async with AsyncClient(app=app, base_url="http://test") as ac:
             yield ac
 
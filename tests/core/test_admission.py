@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette import status
+
+from app.core.admission import (
+    AdmissionController,
+    AdmissionControlMiddleware,
+    Limiter,
+)
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_limiter_queue_and_shed():
+    limiter = Limiter("test", max_inflight=1, max_queue=1)
+    assert await limiter.acquire(timeout=1)
+    waiting = asyncio.ensure_future(limiter.acquire(timeout=1))
+    await asyncio.sleep(0)
+    assert limiter.stats()["waiting"] == 1
+    assert not await limiter.acquire(timeout=1)  # queue is full
+    limiter.release(elapsed=0.01)
+    assert await waiting
+    assert limiter.inflight == 1
+    limiter.release(elapsed=0.01)
+    assert limiter.inflight == 0
+    stats = limiter.stats()
+    assert stats["admitted"] == 2
+    assert stats["queued"] == 1
+    assert stats["shed"] == 1
+
+
+async def test_limiter_timeout():
+    limiter = Limiter("test", max_inflight=1, max_queue=10)
+    assert await limiter.acquire(timeout=1)
+    assert not await limiter.acquire(timeout=0.01)
+    assert limiter.stats()["waiting"] == 0
+    limiter.release()
+    assert limiter.inflight == 0
+
+
+def test_route_class():
+    assert AdmissionController.route_class("POST", "/api/users/login") == "auth"
+    assert AdmissionController.route_class("POST", "/api/users") == "auth"
+    assert AdmissionController.route_class("GET", "/api/articles") == "read"
+    assert AdmissionController.route_class("POST", "/api/articles") == "write"
+
+
+async def test_middleware_sheds_with_retry_after():
+    release = asyncio.Event()
+    test_app = FastAPI()
+
+    @test_app.get("/slow")
+    async def slow() -> dict:
+        await release.wait()
+        return {}
+
+    controller = AdmissionController(
+        max_inflight=1,
+        max_inflight_auth=1,
+        max_inflight_read=1,
+        max_inflight_write=1,
+        max_queue=0,
+        timeout=0.1,
+    )
+    test_app.add_middleware(AdmissionControlMiddleware, controller=controller)
+    async with AsyncClient(app=test_app, base_url="http://test") as ac:
+        first = asyncio.ensure_future(ac.get("/slow"))
+        await asyncio.sleep(0.05)
+        r = await ac.get("/slow")
+        assert r.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert "Retry-After" in r.headers
+        release.set()
+        assert (await first).status_code == status.HTTP_200_OK
+    assert controller.stats()["read"]["shed"] == 1
+
+
+def test_batch_is_a_read():
+    assert AdmissionController.route_class("POST", "/api/batch") == "read"
+    assert AdmissionController.route_class("POST", "/api/articles") == "write"
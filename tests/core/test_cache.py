@@ -0,0 +1,39 @@
+import time
+
+from app.core.cache import LRUCache
+
+
+def test_lru_eviction():
+    cache: LRUCache[int] = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "hits": 3, "misses": 1}
+
+
+def test_ttl_and_delete():
+    cache: LRUCache[int] = LRUCache(max_size=10, ttl=0.01)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert "b" in cache
+    cache.delete("b")
+    assert "b" not in cache
+    assert len(cache) == 0
+
+
+def test_set_if_unchanged():
+    cache: LRUCache[int] = LRUCache(max_size=10)
+    version = cache.version
+    cache.set_if_unchanged("a", 1, version)
+    assert cache.get("a") == 1
+
+    version = cache.version
+    cache.delete("b")
+    cache.set_if_unchanged("b", 2, version)
+    assert "b" not in cache
@@ -0,0 +1,75 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from httpx import AsyncClient
+
+from app.core.compression import CompressionMiddleware, Compressor
+
+pytestmark = pytest.mark.asyncio
+
+BIG = {"articles": [{"body": "You have to believe " * 50}] * 10}
+
+
+def create_app(compressor: Compressor) -> FastAPI:
+    test_app = FastAPI()
+
+    @test_app.get("/big")
+    async def big() -> dict:
+        return BIG
+
+    @test_app.get("/small")
+    async def small() -> dict:
+        return {"tags": []}
+
+    @test_app.get("/image")
+    async def image() -> PlainTextResponse:
+        return PlainTextResponse("x" * 5000, media_type="image/png")
+
+    test_app.add_middleware(
+        CompressionMiddleware,
+        compressor=compressor,
+        minimum_size=500,
+        content_types=["application/json"],
+    )
+    return test_app
+
+
+def test_choose_encoding():
+    compressor = Compressor()
+    assert compressor.choose_encoding("gzip, deflate") == "gzip"
+    assert compressor.choose_encoding("gzip;q=0") is None
+    assert compressor.choose_encoding("identity") is None
+
+
+async def test_compress_with_cache():
+    compressor = Compressor(level=6, cache_size=10)
+    compressor.compressors.pop("br", None)
+    test_app = create_app(compressor)
+    headers = {"Accept-Encoding": "gzip"}
+    async with AsyncClient(app=test_app, base_url="http://test") as ac:
+        for _ in range(3):
+            r = await ac.get("/big", headers=headers)
+            assert r.headers["content-encoding"] == "gzip"
+            assert "Accept-Encoding" in r.headers["vary"]
+            assert r.json() == BIG
+        assert compressor.cache.stats() == {"size": 1, "hits": 2, "misses": 1}
+        assert compressor.bytes_out < compressor.bytes_in
+
+        r = await ac.get("/small", headers=headers)
+        assert "content-encoding" not in r.headers
+        assert "Accept-Encoding" in r.headers["vary"]
+        r = await ac.get("/image", headers=headers)
+        assert "content-encoding" not in r.headers
+        assert "vary" not in r.headers
+        r = await ac.get("/big", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in r.headers
+        assert "Accept-Encoding" in r.headers["vary"]
+        assert r.json() == BIG
+
+
+def test_gzip_roundtrip():
+    compressor = Compressor(level=1)
+    body = b"a" * 2000
+    assert gzip.decompress(compressor.compress("gzip", body)) == body
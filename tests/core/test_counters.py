@@ -0,0 +1,128 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+
+from app import db
+from app.core.counters import CounterBuffer
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_counter(threshold: int = 100) -> CounterBuffer:
+    return CounterBuffer(
+        db.article_summaries,
+        db.article_summaries.c.favorites_count,
+        interval=60,
+        threshold=threshold,
+    )
+
+
+@pytest.fixture
+def execute():
+    with mock.patch("app.core.counters.database") as database:
+        database.execute = mock.AsyncMock()
+        yield database.execute
+
+
+async def test_write_through_until_started(execute: mock.AsyncMock) -> None:
+    counter = make_counter()
+    await counter.add(1)
+    execute.assert_awaited_once()
+    assert counter.pending(1) == 0
+
+
+async def test_coalesce_and_flush_on_stop(execute: mock.AsyncMock) -> None:
+    counter = make_counter()
+    await counter.start()
+    for _ in range(5):
+        await counter.add(1)
+    await counter.add(1, -1)
+    await counter.add(2)
+    await counter.add(3)
+    await counter.add(3, -1)
+    assert counter.pending(1) == 4
+    execute.assert_not_awaited()
+
+    await counter.stop()
+    execute.assert_awaited_once()
+    query = execute.await_args.kwargs["query"]
+    compiled = query.compile(dialect=postgresql.dialect())
+    assert "FROM (VALUES" in str(compiled)
+    assert sorted(compiled.params.values()) == [1, 1, 2, 4]
+    assert counter.pending(1) == 0
+    assert counter.stats()["rows_written"] == 2
+
+
+async def test_flush_on_threshold(execute: mock.AsyncMock) -> None:
+    counter = make_counter(threshold=3)
+    await counter.start()
+    await counter.add(1)
+    await counter.add(2)
+    execute.assert_not_awaited()
+    await counter.add(1)
+    execute.assert_awaited_once()
+    await counter.stop()
+
+
+async def test_failed_flush_keeps_increments(execute: mock.AsyncMock) -> None:
+    counter = make_counter()
+    await counter.start()
+    await counter.add(1)
+    execute.side_effect = ConnectionError
+    with pytest.raises(ConnectionError):
+        await counter.flush()
+    assert counter.pending(1) == 1
+    execute.side_effect = None
+    await counter.stop()
+    assert counter.pending(1) == 0
+    assert counter.stats()["failures"] == 1
+
+
+async def test_pending_while_flushing(execute: mock.AsyncMock) -> None:
+    counter = make_counter()
+    await counter.start()
+    await counter.add(1)
+    written = asyncio.Event()
+
+    async def write(**kwargs) -> None:
+        await written.wait()
+
+    execute.side_effect = write
+    flush = asyncio.create_task(counter.flush())
+    await asyncio.sleep(0)
+    await counter.add(1)
+    assert counter.pending(1) == 2
+    written.set()
+    await flush
+    assert counter.pending(1) == 1
+    execute.side_effect = None
+    await counter.stop()
+
+
+async def test_flush_recounts_from_source(execute: mock.AsyncMock) -> None:
+    source = (
+        select([func.count()])
+        .where(db.favoriter_assoc.c.article_id == db.article_summaries.c.id)
+        .scalar_subquery()
+    )
+    counter = CounterBuffer(
+        db.article_summaries,
+        db.article_summaries.c.favorites_count,
+        source=source,
+        interval=60,
+    )
+    await counter.start()
+    await counter.add(1)
+    await counter.add(1)
+    await counter.add(2)
+    assert counter.pending(1) == 2
+    await counter.stop()
+    query = execute.await_args.kwargs["query"]
+    compiled = str(query.compile(dialect=postgresql.dialect()))
+    assert "VALUES" not in compiled
+    assert "count(*)" in compiled
+    assert counter.pending(1) == 0
+    assert counter.stats()["rows_written"] == 2
@@ -0,0 +1,44 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from app import db
+from app.db import GuardedDatabase
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_gather_caps_concurrency(monkeypatch) -> None:
+    monkeypatch.setattr(db.settings, "REQUEST_DB_CONCURRENCY", 2)
+    database = GuardedDatabase("postgresql://localhost/test")
+    running = peak = 0
+    connections = set()
+
+    async def read(value: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        connections.add(id(database.connection()))
+        await asyncio.sleep(0.01 * (5 - value))
+        running -= 1
+        return value
+
+    assert await database.gather(*map(read, range(5))) == [0, 1, 2, 3, 4]
+    assert peak == 2
+    assert len(connections) == 5
+
+
+async def test_gather_is_sequential_on_a_single_connection() -> None:
+    database = GuardedDatabase("postgresql://localhost/test")
+    database._global_connection = mock.MagicMock()
+    order = []
+
+    async def read(value: int) -> int:
+        order.append(value)
+        await asyncio.sleep(0.01 * (3 - value))
+        order.append(value)
+        return value
+
+    assert await database.gather(*map(read, range(3))) == [0, 1, 2]
+    assert order == [0, 0, 1, 1, 2, 2]
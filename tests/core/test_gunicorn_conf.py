@@ -0,0 +1,25 @@
+import pytest
+
+from app.gunicorn_conf import get_workers
+
+
+@pytest.mark.parametrize(
+    "cores,workers_per_core,web_concurrency,max_workers,expected",
+    [
+        (8, 1.0, None, None, 8),
+        (1, 1.0, None, None, 2),
+        (4, 2.0, None, None, 8),
+        (16, 1.0, None, 4, 4),
+        (16, 1.0, 3, 4, 3),
+    ],
+)
+def test_get_workers(cores, workers_per_core, web_concurrency, max_workers, expected):
+    assert (
+        get_workers(
+            cores,
+            workers_per_core=workers_per_core,
+            web_concurrency=web_concurrency,
+            max_workers=max_workers,
+        )
+        == expected
+    )
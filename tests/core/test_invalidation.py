@@ -0,0 +1,132 @@
+import asyncio
+import json
+from unittest import mock
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.cache import LRUCache
+from app.core.invalidation import MAX_KEYS_SIZE, InvalidationBus
+from app.db import database
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_bus() -> InvalidationBus:
+    bus = InvalidationBus(channel="test_invalidation")
+    bus.register("follows", LRUCache(max_size=10))
+    return bus
+
+
+async def test_publish_invalidates_locally_and_notifies() -> None:
+    bus = make_bus()
+    cache = bus.caches["follows"]
+    cache.set((1, 2), True)
+    with mock.patch("app.core.invalidation.database") as database:
+        database.execute = mock.AsyncMock()
+        await bus.publish("follows", (1, 2))
+        await bus.publish("unknown", 1)
+    assert (1, 2) not in cache
+    database.execute.assert_awaited_once()
+    values = database.execute.await_args.kwargs["values"]
+    assert values["channel"] == "test_invalidation"
+    assert json.loads(values["payload"])["keys"] == [[1, 2]]
+
+
+async def test_notify_with_the_write(async_client: AsyncClient) -> None:
+    bus = make_bus()
+    assert bus.notify("unknown", 1) == []
+    (notify,) = bus.notify("follows", (1, 2))
+    assert notify.name == "notify_follows"
+    assert bus.published == 1
+
+    payload = await database.fetch_val(
+        select([bus._sql_payload("follows", [(1, 2), "x"])])
+    )
+    assert json.loads(payload) == json.loads(
+        bus._payload("follows", keys=[[1, 2], "x"])
+    )
+    await database.fetch_all(select(bus.notify("follows", 1)))
+
+
+async def test_handle_remote_payload() -> None:
+    bus = make_bus()
+    other = make_bus()
+    cache = bus.caches["follows"]
+    cache.set((1, 2), True)
+    cache.set((3, 4), True)
+    bus.handle(bus._payload("follows", keys=[[1, 2]]))
+    assert (1, 2) in cache
+    bus.handle(other._payload("follows", keys=[[1, 2]]))
+    assert (1, 2) not in cache
+    assert (3, 4) in cache
+    bus.handle(other._payload("follows", flush=True))
+    assert len(cache) == 0
+    bus.handle("not json")
+    assert bus.received == 2
+
+
+async def test_payloads_fit_notify() -> None:
+    bus = make_bus()
+    keys = [("x" * 100, i) for i in range(500)]
+    payloads = bus._payloads("follows", keys)
+    assert len(payloads) > 1
+    assert all(len(payload) < 8000 for payload in payloads)
+    assert sum(len(json.loads(p)["keys"]) for p in payloads) == len(keys)
+    (flush,) = bus._payloads("follows", ["x" * MAX_KEYS_SIZE])
+    assert json.loads(flush)["flush"]
+
+
+async def test_flush_clears_all_caches() -> None:
+    bus = make_bus()
+    bus.caches["follows"].set((1, 2), True)
+    bus.flush()
+    assert len(bus.caches["follows"]) == 0
+    assert bus.flushes == 1
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.on_terminate = None
+        self.closed = False
+
+    def add_termination_listener(self, callback) -> None:
+        self.on_terminate = callback
+
+    async def add_listener(self, channel, callback) -> None:
+        pass
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def test_listener_reconnects_and_flushes() -> None:
+    bus = InvalidationBus(channel="test_invalidation", reconnect_delay=0)
+    cache = bus.register("follows", LRUCache(max_size=10))
+    connections = []
+    attempts = []
+
+    async def connect(dsn):
+        attempts.append(dsn)
+        if len(attempts) == 2:
+            raise OSError("connection refused")
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    with mock.patch("app.core.invalidation.asyncpg.connect", side_effect=connect):
+        await bus.start()
+        assert bus.connected
+        assert bus.flushes == 1
+        cache.set((1, 2), True)
+        connections[0].on_terminate(connections[0])
+        while len(connections) < 2 or not bus.connected:
+            await asyncio.sleep(0)
+        await bus.stop()
+    assert (1, 2) not in cache
+    assert bus.flushes == 2
+    assert bus.reconnects == 2
+    assert all(connection.closed for connection in connections)
@@ -0,0 +1,61 @@
+import pytest
+from asyncpg.exceptions import QueryCanceledError
+from httpx import AsyncClient
+
+from app.core import query_budget
+from app.core.query_budget import QueryBudget, QueryBudgetExceeded, crud_caller
+from app.db import database
+
+pytestmark = pytest.mark.asyncio
+
+
+def test_query_budget():
+    budget = QueryBudget(budget_ms=100, path="/api/articles")
+    budget.add(0.05)
+    budget.check()
+    budget.add(0.06)
+    assert budget.queries == 2
+    with pytest.raises(QueryBudgetExceeded):
+        budget.check()
+    assert query_budget.budgets_exceeded["/api/articles"] >= 1
+
+
+def test_crud_caller():
+    assert crud_caller() is None
+    namespace = {"__name__": "app.crud.crud_fake", "crud_caller": crud_caller}
+    exec("def get_all():\n    return crud_caller()", namespace)  # nosec
+    assert namespace["get_all"]() == "crud_fake.get_all"
+
+
+def test_statement_timeout(monkeypatch):
+    monkeypatch.setattr(
+        query_budget.settings, "STATEMENT_TIMEOUTS", {"crud_article.get_all": 2000}
+    )
+    assert query_budget.statement_timeout("crud_article.get_all") == 2000
+    assert query_budget.statement_timeout("crud_user.get") is None
+    assert query_budget.statement_timeout(None) is None
+
+
+async def test_statement_timeout_override(
+    async_client: AsyncClient, monkeypatch
+) -> None:
+    monkeypatch.setattr(
+        query_budget.settings,
+        "STATEMENT_TIMEOUTS",
+        {"crud_fake.show": 1234, "crud_fake.sleep": 10},
+    )
+    namespace = {"__name__": "app.crud.crud_fake", "database": database}
+    exec(  # nosec
+        "async def show():\n"
+        "    return await database.fetch_val('SHOW statement_timeout')\n"
+        "async def sleep():\n"
+        "    return await database.fetch_val('SELECT pg_sleep(1)')",
+        namespace,
+    )
+    default = await database.fetch_val("SHOW statement_timeout")
+    assert await namespace["show"]() == "1234ms"
+    assert await database.fetch_val("SHOW statement_timeout") == default
+    with pytest.raises(QueryCanceledError):
+        await namespace["sleep"]()
+    assert await database.fetch_val("SHOW statement_timeout") == default
+    assert query_budget.timeouts["crud_fake.sleep"] >= 1
@@ -1,11 +1,14 @@
+import time
 from datetime import timedelta
 
 import pytest
 from fastapi import HTTPException
 from pydantic import SecretStr
 
+from app.core import security
 from app.core.security import (
     create_access_token,
+    get_jwt_backend,
     get_password_hash,
     get_user_id_from_token,
     verify_password,
@@ -31,6 +34,36 @@ def test_get_user_id_from_wrong_token():
         get_user_id_from_token(token)
 
 
+def test_token_without_subject():
+    token = get_jwt_backend().encode(
+        {"exp": time.time() + 60}, security.settings.SECRET_KEY
+    )
+    with pytest.raises(HTTPException):
+        get_user_id_from_token(token)
+
+
+def test_verified_tokens_are_cached(monkeypatch):
+    monkeypatch.setattr(security, "verified_tokens", security.LRUCache(max_size=10))
+    token = create_access_token(1, timedelta(minutes=1))
+    assert get_user_id_from_token(token) == "1"
+    assert get_user_id_from_token(token) == "1"
+    assert security.verified_tokens.stats() == {"size": 1, "hits": 1, "misses": 1}
+    ((expires, _),) = security.verified_tokens._data.values()
+    assert expires <= time.monotonic() + 60
+
+
+def test_expired_token():
+    token = create_access_token(1, timedelta(seconds=-1))
+    with pytest.raises(HTTPException):
+        get_user_id_from_token(token)
+
+
+def test_get_jwt_backend():
+    assert isinstance(get_jwt_backend("jose"), security.JoseBackend)
+    with pytest.raises(ValueError):
+        get_jwt_backend("unknown")
+
+
 def test_verify_password():
     plain = "abcxyz"
     assert verify_password(
@@ -42,3 +75,44 @@ def test_verify_password():
 def test_verify_password_str():
     with pytest.raises(AttributeError, match=r"get_secret_value"):
         verify_password("abc", "abc")
+
+
+@pytest.fixture
+def pwd_settings(monkeypatch):
+    monkeypatch.setattr(security, "_calibrated_rounds", None)
+    security.get_pwd_context.cache_clear()
+    yield security.settings
+    monkeypatch.undo()
+    security.get_pwd_context.cache_clear()
+
+
+def test_calibrate_password_hash(pwd_settings, monkeypatch):
+    monkeypatch.setattr(pwd_settings, "PASSWORD_HASH_ROUNDS", None)
+    # Too slow for the target: keeps passlib's default cost.
+    assert security.calibrate_password_hash(target_ms=1, samples=1) == 12
+
+    monkeypatch.setattr(pwd_settings, "PASSWORD_HASH_MIN_ROUNDS", 4)
+    rounds = security.calibrate_password_hash(target_ms=1)
+    assert 4 <= rounds < 12
+    assert security.get_pwd_context().handler().default_rounds == rounds
+
+    monkeypatch.setattr(pwd_settings, "PASSWORD_HASH_ROUNDS", 5)
+    assert security.calibrate_password_hash(target_ms=1) == 5
+
+
+def test_password_needs_rehash(pwd_settings, monkeypatch):
+    monkeypatch.setattr(pwd_settings, "PASSWORD_HASH_ROUNDS", 4)
+    password = SecretStr("abcxyz")
+    old = get_password_hash(password)
+    monkeypatch.setattr(pwd_settings, "PASSWORD_HASH_ROUNDS", 5)
+    security.get_pwd_context.cache_clear()
+    assert security.password_needs_rehash(old)
+    assert not security.password_needs_rehash(get_password_hash(password))
+
+    monkeypatch.setattr(
+        pwd_settings, "PASSWORD_HASH_SCHEMES", ["sha256_crypt", "bcrypt"]
+    )
+    monkeypatch.setattr(pwd_settings, "PASSWORD_HASH_ROUNDS", None)
+    security.get_pwd_context.cache_clear()
+    assert security.password_needs_rehash(old)
+    assert verify_password(password, old)
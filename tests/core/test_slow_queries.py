@@ -0,0 +1,95 @@
+from unittest import mock
+
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.core.slow_queries import SlowQueryLog, compile_query, redact, shape
+from app.core.tasks import TaskWorker
+from app.db import GuardedDatabase
+
+pytestmark = pytest.mark.asyncio
+
+
+def test_shape_ignores_parameters() -> None:
+    first = "SELECT * FROM users WHERE id IN (:id_1_1, :id_1_2) AND bio = :bio_1"
+    second = "SELECT * FROM users\nWHERE id IN (:id_1_1) AND bio = :bio_1"
+    assert shape(first) == shape(second)
+    assert shape(first) != shape("SELECT * FROM users WHERE bio = :bio_1")
+
+
+def test_compile_query_keeps_casted_parameters() -> None:
+    query = db.article_summaries.select().where(
+        db.article_summaries.c.tag_list.overlap(["a", "b"])
+    )
+    sql, params = compile_query(query, None)
+    assert "::VARCHAR[]" in sql
+    statement = text(sql).bindparams(**params)
+    assert statement.compile().params == {"tag_list_1": ["a", "b"]}
+
+
+def test_redact() -> None:
+    params = {"hashed_password": "x", "email_1": "a@b.c", "body": "b" * 100, "id": 1}
+    redacted = redact(params)
+    assert redacted["hashed_password"] == "***"
+    assert redacted["email_1"] == "***"
+    assert len(redacted["body"]) < 100
+    assert redacted["id"] == 1
+
+
+def test_record_explains_first_of_each_shape() -> None:
+    log = SlowQueryLog(threshold_ms=100, explain=True, max_shapes=10)
+    assert not log.is_slow(0.05)
+    assert log.is_slow(0.2)
+    query = db.users.select().where(db.users.c.id == 1)
+    explain = log.record(query, None, 0.2, "crud_user.get")
+    assert explain is not None
+    key, statement = explain
+    assert str(statement).startswith("EXPLAIN (ANALYZE, BUFFERS) SELECT")
+    assert (
+        log.record(db.users.select().where(db.users.c.id == 2), None, 0.3, None) is None
+    )
+    log.set_plan(key, [("Seq Scan on users",), ("Execution Time: 1 ms",)])
+    (entry,) = log.queries()
+    assert entry["count"] == 2
+    assert entry["max_ms"] == 300
+    assert entry["caller"] == "crud_user.get"
+    assert entry["plan"].startswith("Seq Scan")
+    assert "plan" not in log.stats()[key]
+
+    log = SlowQueryLog(threshold_ms=100, explain=False, max_shapes=10)
+    assert log.record(query, None, 0.2, None) is None
+
+
+async def test_guarded_database_records_slow_queries() -> None:
+    database = GuardedDatabase("postgresql://localhost/test")
+    log = SlowQueryLog(threshold_ms=0, explain=False, max_shapes=10)
+    connection = mock.MagicMock()
+    connection.__aenter__.return_value.fetch_one = mock.AsyncMock(return_value=None)
+    with mock.patch("app.db.slow_queries", log), mock.patch.object(
+        database, "connection", return_value=connection
+    ):
+        await database.fetch_one(db.users.select().where(db.users.c.id == 1))
+    assert len(log.queries()) == 1
+
+
+async def test_guarded_database_explains_in_background() -> None:
+    database = GuardedDatabase("postgresql://localhost/test")
+    log = SlowQueryLog(threshold_ms=0, explain=True, max_shapes=10)
+    worker = TaskWorker(maxsize=1, concurrency=1, max_retries=0, retry_delay=0)
+    connection = mock.MagicMock()
+    connection.__aenter__.return_value.fetch_one = mock.AsyncMock(return_value=None)
+    explain = mock.AsyncMock()
+    await worker.start()
+    with mock.patch("app.db.slow_queries", log), mock.patch(
+        "app.db.worker", worker
+    ), mock.patch.object(
+        database, "connection", return_value=connection
+    ), mock.patch.object(
+        database, "_explain", explain
+    ):
+        await database.fetch_one(db.users.select().where(db.users.c.id == 1))
+        await worker.stop()
+    ((key, statement), _kwargs) = explain.await_args
+    assert key == log.queries()[0]["shape"]
+    assert str(statement).startswith("EXPLAIN (ANALYZE, BUFFERS) SELECT")
@@ -0,0 +1,15 @@
+import subprocess  # nosec
+import sys
+
+DEFERRED_MODULES = ["psycopg2", "jose", "passlib"]
+
+
+def test_heavy_modules_not_imported_by_app_main():
+    code = (
+        "import sys, app.main; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(  # nosec
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
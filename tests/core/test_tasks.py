@@ -0,0 +1,96 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from app.core.tasks import QueueFull, TaskWorker
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_enqueue_and_drain_on_stop():
+    worker = TaskWorker(maxsize=10, concurrency=2, max_retries=0, retry_delay=0)
+    done: List[int] = []
+
+    async def job(value: int) -> None:
+        await asyncio.sleep(0.01)
+        done.append(value)
+
+    await worker.start()
+    for i in range(5):
+        await worker.enqueue("default", job, i)
+    await worker.stop()
+    assert sorted(done) == [0, 1, 2, 3, 4]
+    assert worker.stats()["default"]["processed"] == 5
+    assert worker.depths() == {"default": 0}
+
+
+async def test_retry_then_fail():
+    worker = TaskWorker(maxsize=10, concurrency=1, max_retries=2, retry_delay=0)
+    calls: List[int] = []
+
+    async def flaky() -> None:
+        calls.append(1)
+        if len(calls) < 2:
+            raise ValueError("flaky")
+
+    async def broken() -> None:
+        raise ValueError("broken")
+
+    await worker.start()
+    await worker.enqueue("default", flaky)
+    await worker.enqueue("default", broken)
+    await worker.stop()
+    stats = worker.stats()["default"]
+    assert len(calls) == 2
+    assert stats["processed"] == 1
+    assert stats["retried"] == 3
+    assert stats["failed"] == 1
+
+
+async def test_backpressure():
+    worker = TaskWorker(maxsize=1, concurrency=1, max_retries=0, retry_delay=0)
+    release = asyncio.Event()
+
+    async def blocked() -> None:
+        await release.wait()
+
+    await worker.start()
+    await worker.enqueue("slow", blocked)
+    await asyncio.sleep(0)
+    await worker.enqueue("slow", blocked)
+    with pytest.raises(QueueFull):
+        await worker.enqueue("slow", blocked, timeout=0.01)
+    assert worker.stats()["slow"]["rejected"] == 1
+    release.set()
+    await worker.stop()
+
+
+async def test_enqueue_without_waiting():
+    worker = TaskWorker(maxsize=1, concurrency=1, max_retries=0, retry_delay=0)
+    release = asyncio.Event()
+
+    async def blocked() -> None:
+        await release.wait()
+
+    await worker.start()
+    await worker.enqueue("slow", blocked, timeout=0)
+    await asyncio.sleep(0)
+    await worker.enqueue("slow", blocked, timeout=0)
+    with pytest.raises(QueueFull):
+        await worker.enqueue("slow", blocked, timeout=0)
+    assert worker.stats()["slow"]["enqueued"] == 2
+    assert worker.stats()["slow"]["rejected"] == 1
+    release.set()
+    await worker.stop()
+
+
+async def test_run_inline_when_not_started():
+    worker = TaskWorker()
+    done: List[str] = []
+
+    async def job() -> None:
+        done.append("done")
+
+    await worker.enqueue("default", job)
+    assert done == ["done"]
@@ -4,8 +4,10 @@ from httpx import AsyncClient
 from slugify import slugify
 
 from app import schemas
-from app.crud import crud_article, crud_profile
+from app.crud import crud_article, crud_article_summary, crud_comment, crud_profile
+from app.db import database
 from tests.utils.article import NOT_EXISTED_SLUG, TEST_UPDATED_BODY, create_test_article
+from tests.utils.comment import create_test_comment
 
 pytestmark = pytest.mark.asyncio
 
@@ -88,6 +90,22 @@ async def test_favorited_unfavorited(
     assert await crud_article.count_article_favorites(article_id) == 0
 
 
+async def test_favorited_ids(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+) -> None:
+    _, first_id = await create_test_article(author=test_user)
+    _, second_id = await create_test_article(author=test_user)
+    await crud_article.favorite(article_id=second_id, user_id=other_user.id)
+
+    article_ids = [first_id, second_id]
+    assert await crud_article.favorited_ids(article_ids, other_user) == {second_id}
+    assert await crud_article.favorited_ids(article_ids, test_user) == set()
+    assert await crud_article.favorited_ids(article_ids, None) == set()
+    assert await crud_article.favorited_ids([], other_user) == set()
+
+
 async def test_update_article(
     async_client: AsyncClient,
     test_user: schemas.UserDB,
@@ -107,6 +125,52 @@ async def test_update_article(
     assert sorted(await crud_article.get_article_tags(article_id)) == sorted(tags)
 
 
+async def test_delete_article(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+) -> None:
+    _article_in, article_id = await create_test_article(author=test_user)
+    article_db = await crud_article.get(article_id)
+    await create_test_comment(article=article_db, author=other_user)
+    await crud_article.favorite(article_id=article_id, user_id=other_user.id)
+
+    await crud_article.delete(article_db)
+    assert not await crud_article.get(article_id)
+    assert await crud_article.get_article_tags(article_id) == []
+    assert await crud_comment.get_comments_from_an_article(article_id) == []
+    assert not await crud_article.is_article_favorited_by_user(
+        article_id=article_id, user_id=other_user.id
+    )
+
+
+async def test_delete_article_with_sql(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+) -> None:
+    _article_in, article_id = await create_test_article(author=test_user)
+    article_db = await crud_article.get(article_id)
+    await create_test_comment(article=article_db, author=other_user)
+    await crud_article.favorite(article_id=article_id, user_id=other_user.id)
+
+    await database.execute(
+        "DELETE FROM articles WHERE id = :id", values={"id": article_id}
+    )
+    for table, column in [
+        ("comments", "article_id"),
+        ("tag_assoc", "article_id"),
+        ("favoriter_assoc", "article_id"),
+        ("article_summaries", "id"),
+    ]:
+        count = await database.fetch_val(
+            f"SELECT count(*) FROM {table} WHERE {column} = :id",  # nosec
+            values={"id": article_id},
+        )
+        assert count == 0, table
+    assert await crud_article_summary.check() == []
+
+
 @pytest.mark.parametrize(
     "tag_filter,author_filter,favorited_filter",
     [
@@ -136,11 +200,24 @@ async def test_get_all(
         await crud_article.favorite(article_id=article_id, user_id=other_user.id)
         favorited = other_user.username
     article_dbs = await crud_article.get_all(
-        tag=tag, author=author, favorited=favorited
+        tags=[tag] if tag else None, author=author, favorited=favorited
     )
     assert len(article_dbs) > 0
 
 
+async def test_get_all_columns(
+    async_client: AsyncClient, test_user: schemas.UserDB
+) -> None:
+    article_in, article_id = await create_test_article(test_user)
+    article_dbs = await crud_article.get_all(
+        author=test_user.username, columns=["title", "favorites_count"]
+    )
+    assert article_dbs[0].id == article_id
+    assert article_dbs[0].title == article_in["title"]
+    assert article_dbs[0].favorites_count == 0
+    assert "body" not in article_dbs[0].__fields_set__
+
+
 async def test_feed(
     async_client: AsyncClient,
     test_user: schemas.UserDB,
@@ -158,3 +235,111 @@ async def test_feed(
     assert article.body == article_in.get("body")
     assert article.author_id == other_user.id
     assert article.slug == slug
+
+
+@pytest.mark.parametrize("merge", [False, True])
+async def test_feed_with_cursor(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+    monkeypatch: pytest.MonkeyPatch,
+    merge: bool,
+):
+    monkeypatch.setattr(
+        crud_article.settings, "FEED_MERGE_MIN_FOLLOWS", 0 if merge else 10**9
+    )
+    article_ids = [(await create_test_article(other_user))[1] for _ in range(3)]
+    await crud_profile.follow(other_user, test_user)
+
+    first_page = await crud_article.feed(follow_by=test_user.id, limit=2)
+    assert [article.id for article in first_page] == article_ids[:0:-1]
+    last = first_page[-1]
+    articles, count, approximate = await crud_article.feed_with_count(
+        follow_by=test_user.id, limit=2, before=(last.created_at, last.id)
+    )
+    assert [article.id for article in articles] == article_ids[:1]
+    assert (count, approximate) == (3, False)
+
+    crud_article._counts.clear()
+    monkeypatch.setattr(crud_article.settings, "ARTICLE_COUNT_EXACT_LIMIT", 1)
+    articles, count, approximate = await crud_article.feed_with_count(
+        follow_by=test_user.id, limit=2, before=(last.created_at, last.id)
+    )
+    assert (count, approximate) == (2, True)
+
+
+async def test_merge_feed_after_follow(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(crud_article.settings, "FEED_MERGE_MIN_FOLLOWS", 1)
+    assert not await crud_article._merge_feed(test_user.id)
+
+    await crud_profile.follow(other_user, test_user)
+    assert await crud_article._merge_feed(test_user.id)
+
+    await crud_profile.unfollow(other_user, test_user)
+    assert not await crud_article._merge_feed(test_user.id)
+
+    await crud_profile.follow_by_username(other_user.username, test_user)
+    assert await crud_article._merge_feed(test_user.id)
+
+
+async def test_get_all_with_count(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+):
+    await create_test_article(test_user)
+    await create_test_article(test_user)
+    article_dbs, count, approximate = await crud_article.get_all_with_count(
+        limit=1, author=test_user.username
+    )
+    assert len(article_dbs) == 1
+    assert count == 2
+    assert not approximate
+    article_dbs, count, approximate = await crud_article.get_all_with_count(
+        limit=1, offset=5, author=test_user.username
+    )
+    assert len(article_dbs) == 0
+    assert count == 2
+
+    await crud_profile.follow(test_user, other_user)
+    article_dbs, count, approximate = await crud_article.feed_with_count(
+        follow_by=other_user.id, limit=10
+    )
+    assert len(article_dbs) == count == 2
+    assert not approximate
+
+
+async def test_estimate_articles_count(
+    async_client: AsyncClient, test_user: schemas.UserDB
+):
+    await create_test_article(test_user)
+    await database.execute("ANALYZE article_summaries")
+    assert await crud_article.estimate_articles_count() > 0
+
+
+async def test_get_all_with_count_estimate(
+    async_client: AsyncClient, test_user: schemas.UserDB, monkeypatch
+):
+    await create_test_article(test_user)
+    monkeypatch.setattr(crud_article.settings, "ARTICLE_COUNT_EXACT_LIMIT", 0)
+    await crud_article.get_all_with_count(limit=1)
+    await crud_article.get_all_with_count(limit=1, tags=["dragons"], any_tag=True)
+
+    async def estimate() -> int:
+        return 1000
+
+    monkeypatch.setattr(crud_article, "estimate_articles_count", estimate)
+    _articles, count, approximate = await crud_article.get_all_with_count(limit=1)
+    assert count == 1000
+    assert approximate
+    _articles, count, approximate = await crud_article.get_all_with_count(
+        limit=1, tags=["dragons"], any_tag=True
+    )
+    # only the unfiltered list falls back to the planner's estimate
+    assert count == 1
+    assert approximate
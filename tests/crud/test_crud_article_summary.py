@@ -0,0 +1,102 @@
+import pytest
+from httpx import AsyncClient
+
+from app import db, schemas
+from app.core.counters import CounterBuffer
+from app.crud import crud_article, crud_article_summary, crud_comment
+from app.db import database
+from tests.utils.article import create_test_article
+from tests.utils.comment import TEST_COMMENT_BODY
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_summary_follows_writes(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+) -> None:
+    article_in, article_id = await create_test_article(author=test_user)
+    summary = await crud_article_summary.get(article_id)
+    assert summary
+    assert summary.title == article_in.get("title")
+    assert summary.author_username == test_user.username
+    assert sorted(summary.tag_list) == sorted(article_in.get("tagList"))
+    assert summary.favorites_count == 0
+    assert summary.comments_count == 0
+
+    await crud_article.favorite(article_id=article_id, user_id=other_user.id)
+    comment_id = await crud_comment.create(
+        payload=schemas.CommentInCreate(body=TEST_COMMENT_BODY),
+        author_id=other_user.id,
+        article_id=article_id,
+    )
+    summary = await crud_article_summary.get(article_id)
+    assert summary
+    assert summary.favorites_count == 1
+    assert summary.comments_count == 1
+
+    await crud_article.unfavorite(article_id=article_id, user_id=other_user.id)
+    await crud_article.unfavorite(article_id=article_id, user_id=other_user.id)
+    await crud_comment.delete(comment_id)
+    summary = await crud_article_summary.get(article_id)
+    assert summary
+    assert summary.favorites_count == 0
+    assert summary.comments_count == 0
+    await crud_article_summary.favorites_counter.flush()
+    assert article_id not in await crud_article_summary.check()
+
+    article_db = await crud_article.get(article_id)
+    await crud_article.delete(article_db)  # type: ignore
+    assert not await crud_article_summary.get(article_id)
+
+
+async def test_check_and_rebuild(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+) -> None:
+    _article_in, article_id = await create_test_article(author=test_user)
+    await database.execute(
+        query=db.article_summaries.update()
+        .where(db.article_summaries.c.id == article_id)
+        .values(favorites_count=5)
+    )
+    assert article_id in await crud_article_summary.check()
+
+    await crud_article_summary.refresh([article_id])
+    assert article_id in await crud_article_summary.check()
+    await crud_article_summary.refresh([article_id], counts=True)
+    assert article_id not in await crud_article_summary.check()
+
+    await crud_article_summary.delete(article_id)
+    assert article_id in await crud_article_summary.check()
+    assert await crud_article_summary.rebuild() >= 1
+    assert await crud_article_summary.check() == []
+
+
+async def test_flush_after_rebuild_counts_once(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+) -> None:
+    _article_in, article_id = await create_test_article(author=test_user)
+    # Another worker's buffer, holding a favorite it has not flushed yet.
+    other_worker = CounterBuffer(
+        db.article_summaries,
+        db.article_summaries.c.favorites_count,
+        source=crud_article_summary.favorites_counter.source,
+    )
+    await other_worker.start()
+    await database.execute(
+        query=db.favoriter_assoc.insert().values(
+            article_id=article_id, user_id=other_user.id
+        )
+    )
+    await other_worker.add(article_id)
+
+    await crud_article_summary.rebuild()
+    await other_worker.stop()
+    summary = await crud_article_summary.get(article_id)
+    assert summary
+    assert summary.favorites_count == 1
+    assert await crud_article_summary.check() == []
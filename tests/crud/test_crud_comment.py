@@ -1,3 +1,5 @@
+import datetime
+
 import pytest
 from httpx import AsyncClient
 
@@ -70,3 +72,22 @@ async def test_get_comments_from_an_article(
     assert comment_id
     comments = await crud_comment.get_comments_from_an_article(article_id)
     assert len(comments) == 1
+
+
+async def test_get_comments_from_an_article_since(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+) -> None:
+    article_in, article_id = await create_test_article(author=test_user)
+    await crud_comment.create(
+        payload=schemas.CommentInCreate(body=TEST_COMMENT_BODY),
+        author_id=other_user.id,
+        article_id=article_id,
+    )
+    comment_dbs = await crud_comment.get_comments_from_an_article(article_id)
+    since = comment_dbs[0].created_at
+    comments = await crud_comment.get_comments_from_an_article(article_id, since=since)
+    assert len(comments) == 1
+    later = since + datetime.timedelta(days=1)
+    assert not await crud_comment.get_comments_from_an_article(article_id, since=later)
@@ -0,0 +1,179 @@
+import pytest
+from asyncpg.exceptions import UniqueViolationError
+from pydantic import SecretStr
+
+from app import schemas
+from app.crud.memory import memory_repository
+from app.crud.repository import Repository
+
+pytestmark = pytest.mark.asyncio
+
+
+async def create_user(repository: Repository, username: str) -> schemas.UserDB:
+    user_id = await repository.users.create(
+        schemas.UserCreate(
+            username=username,
+            email=f"{username}@example.com",
+            password=SecretStr("changeit"),
+        )
+    )
+    return await repository.users.get(user_id)  # type: ignore
+
+
+async def create_article(
+    repository: Repository, author: schemas.UserDB, title: str, tags=None
+) -> int:
+    payload = schemas.ArticleInCreate(
+        title=title, description="description", body="body", tagList=tags
+    )
+    return await repository.articles.create(payload, author_id=author.id)
+
+
+async def test_users() -> None:
+    repository = memory_repository()
+    user = await create_user(repository, "alice")
+    assert await repository.users.get_user_by_username("alice") == user
+    assert (
+        await repository.users.authenticate("alice@example.com", SecretStr("x")) is None
+    )
+
+    await repository.users.update(user.id, schemas.UserUpdate(username="alicia"))
+    assert await repository.users.get_user_by_username("alice") is None
+    updated = await repository.users.get_user_by_email("alice@example.com")
+    assert updated.username == "alicia"
+
+
+async def test_users_unique() -> None:
+    repository = memory_repository()
+    alice = await create_user(repository, "alice")
+    bob = await create_user(repository, "bob")
+
+    with pytest.raises(UniqueViolationError):
+        await create_user(repository, "alice")
+    with pytest.raises(UniqueViolationError):
+        await repository.users.create(
+            schemas.UserCreate(
+                username="carol",
+                email="alice@example.com",
+                password=SecretStr("changeit"),
+            )
+        )
+    assert await repository.users.get_user_by_username("carol") is None
+
+    with pytest.raises(UniqueViolationError):
+        await repository.users.update(
+            bob.id, schemas.UserUpdate(email="alice@example.com")
+        )
+    with pytest.raises(UniqueViolationError):
+        await repository.users.update(bob.id, schemas.UserUpdate(username="alice"))
+    assert await repository.users.get_user_by_username("alice") == alice
+    assert await repository.users.get_user_by_email("alice@example.com") == alice
+    assert await repository.users.get_user_by_username("bob") == bob
+
+    await repository.users.update(
+        alice.id, schemas.UserUpdate(username="alice", email="alice@example.com")
+    )
+    assert await repository.users.get_user_by_username("alice") == alice
+
+
+async def test_article_slug_unique() -> None:
+    repository = memory_repository()
+    alice = await create_user(repository, "alice")
+    article_id = await create_article(repository, alice, "First")
+
+    with pytest.raises(UniqueViolationError):
+        await create_article(repository, alice, "First")
+    article = await repository.articles.get_article_by_sluq("first")
+    assert article is not None and article.id == article_id
+    articles, count, _ = await repository.articles.get_all_with_count()
+    assert count == 1
+
+
+async def test_article_lists() -> None:
+    repository = memory_repository()
+    alice = await create_user(repository, "alice")
+    bob = await create_user(repository, "bob")
+    first = await create_article(repository, alice, "First", tags=["python"])
+    second = await create_article(repository, bob, "Second", tags=["python", "go"])
+    third = await create_article(repository, alice, "Third")
+    await repository.articles.favorite(second, alice.id)
+
+    articles, count, approximate = await repository.articles.get_all_with_count()
+    assert [article.id for article in articles] == [third, second, first]
+    assert (count, approximate) == (3, False)
+
+    articles, count, _ = await repository.articles.get_all_with_count(limit=1, offset=1)
+    assert [article.id for article in articles] == [second]
+    assert count == 3
+
+    articles, count, _ = await repository.articles.get_all_with_count(
+        tags=["python"], author="alice"
+    )
+    assert [article.id for article in articles] == [first]
+    assert count == 1
+
+    articles, _, _ = await repository.articles.get_all_with_count(tags=["python", "go"])
+    assert [article.id for article in articles] == [second]
+    articles, count, _ = await repository.articles.get_all_with_count(
+        tags=["go", "rust", "python"], any_tag=True
+    )
+    assert [article.id for article in articles] == [second, first]
+    assert count == 2
+
+    articles, _, _ = await repository.articles.get_all_with_count(favorited="alice")
+    assert [article.id for article in articles] == [second]
+    assert articles[0].favorites_count == 1
+    assert articles[0].tag_list == ["python", "go"]
+    assert await repository.articles.favorited_ids([first, second], alice) == {second}
+    assert await repository.articles.favorited_ids([first, second], None) == set()
+
+    await repository.profiles.follow_by_username("alice", bob)
+    await repository.profiles.follow_by_username("bob", bob)
+    articles, count, _ = await repository.articles.feed_with_count(follow_by=bob.id)
+    assert [article.id for article in articles] == [third, first]
+    assert count == 2
+
+
+async def test_update_and_delete_article() -> None:
+    repository = memory_repository()
+    alice = await create_user(repository, "alice")
+    article_id = await create_article(repository, alice, "Title", tags=["a", "b"])
+    article = await repository.articles.get(article_id)
+
+    await repository.articles.update(
+        article, schemas.ArticleInUpdate(body="new body", tagList=["b", "c"])  # type: ignore
+    )
+    summary = await repository.summaries.get_by_slug("title")
+    assert summary.body == "new body"
+    assert sorted(summary.tag_list) == ["b", "c"]
+    articles, _, _ = await repository.articles.get_all_with_count(tags=["a"])
+    assert articles == []
+
+    await repository.comments.create(
+        schemas.CommentInCreate(body="comment"), article_id, alice.id
+    )
+    await repository.articles.delete(article)  # type: ignore
+    assert await repository.articles.get_article_by_sluq("title") is None
+    assert await repository.comments.get_comments_from_an_article(article_id) == []
+    assert await repository.articles.get_all_with_count(tags=["c"]) == ([], 0, False)
+
+
+async def test_follow() -> None:
+    repository = memory_repository()
+    alice = await create_user(repository, "alice")
+    bob = await create_user(repository, "bob")
+
+    _, profile, changed = await repository.profiles.follow_by_username("alice", bob)
+    assert profile.following and changed
+    _, _, changed = await repository.profiles.follow_by_username("alice", bob)
+    assert not changed
+    assert await repository.profiles.is_following_user_id(alice.id, bob)
+    assert await repository.profiles.following_ids([alice.id, bob.id], bob) == {
+        alice.id
+    }
+    profiles = await repository.profiles.get_public_profiles([alice.id, 100])
+    assert [profile.username for profile in profiles.values()] == ["alice"]
+
+    _, profile, changed = await repository.profiles.unfollow_by_username("alice", bob)
+    assert not profile.following and changed
+    assert await repository.profiles.follow_by_username("nobody", bob) is None
@@ -0,0 +1,33 @@
+import datetime
+
+import pytest
+from asyncpg.exceptions import PostgresError
+from httpx import AsyncClient
+
+from app import db, schemas
+from app.crud import crud_partition
+from app.db import database
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_ensure_partitions(async_client: AsyncClient) -> None:
+    created = await crud_partition.ensure_partitions(months_ahead=24)
+    assert set(created) == set(crud_partition.PARTITIONED_TABLES)
+    assert await crud_partition.ensure_partitions(months_ahead=24) == {
+        "articles": 0,
+        "comments": 0,
+    }
+
+
+async def test_row_without_partition_rejected(
+    async_client: AsyncClient, test_user: schemas.UserDB
+) -> None:
+    query = db.articles.insert().values(
+        slug="without-partition",
+        author_id=test_user.id,
+        created_at=datetime.datetime(1990, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+    with pytest.raises(PostgresError):
+        async with database.transaction():
+            await database.execute(query=query)
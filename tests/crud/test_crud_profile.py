@@ -2,7 +2,7 @@ import pytest
 from httpx import AsyncClient
 
 from app import schemas
-from app.crud import crud_profile
+from app.crud import crud_profile, crud_user
 from tests.utils.profile import assert_profile_with_user
 
 pytestmark = pytest.mark.asyncio
@@ -59,3 +59,72 @@ async def test_follow_unfollow(
     assert await crud_profile.is_following(follower=other_user, follower_by=test_user)
     assert not await crud_profile.follow(follower=other_user, follower_by=test_user)
     assert await crud_profile.unfollow(follower=other_user, follower_by=test_user)
+
+
+async def test_follow_unfollow_by_username(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+) -> None:
+    assert not await crud_profile.follow_by_username(
+        username=other_user.username + "xxx", follower_by=test_user
+    )
+    user_id, profile, changed = await crud_profile.follow_by_username(
+        username=other_user.username, follower_by=test_user
+    )
+    assert user_id == other_user.id
+    assert_profile_with_user(profile, other_user)
+    assert profile.following
+    assert changed
+    assert await crud_profile.is_following(follower=other_user, follower_by=test_user)
+    _, _, changed = await crud_profile.follow_by_username(
+        username=other_user.username, follower_by=test_user
+    )
+    assert not changed
+
+    _, profile, changed = await crud_profile.unfollow_by_username(
+        username=other_user.username, follower_by=test_user
+    )
+    assert not profile.following
+    assert changed
+    _, _, changed = await crud_profile.unfollow_by_username(
+        username=other_user.username, follower_by=test_user
+    )
+    assert not changed
+
+    user_id, _, changed = await crud_profile.follow_by_username(
+        username=test_user.username, follower_by=test_user
+    )
+    assert user_id == test_user.id
+    assert not changed
+
+
+async def test_public_profiles_and_following_ids(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    other_user: schemas.UserDB,
+) -> None:
+    user_ids = [test_user.id, other_user.id, other_user.id + 100000]
+    profiles = await crud_profile.get_public_profiles(user_ids)
+    assert profiles.keys() == {test_user.id, other_user.id}
+    assert profiles[other_user.id].username == other_user.username
+
+    assert await crud_profile.following_ids(user_ids, test_user) == set()
+    assert await crud_profile.following_ids(user_ids, None) == set()
+    await crud_profile.follow(follower=other_user, follower_by=test_user)
+    assert await crud_profile.following_ids(user_ids, test_user) == {other_user.id}
+
+
+async def test_public_profile_cache_invalidated_on_update(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+) -> None:
+    await crud_profile.get_profile_by_username(username=test_user.username)
+    new_username = test_user.username + "xxx"
+    await crud_user.update(
+        test_user.id, schemas.UserUpdate(username=new_username, bio="new bio")
+    )
+    assert not await crud_profile.get_profile_by_username(username=test_user.username)
+    profile = await crud_profile.get_profile_by_user_id(user_id=test_user.id)
+    assert profile
+    assert (profile.username, profile.bio) == (new_username, "new bio")
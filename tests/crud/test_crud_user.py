@@ -5,6 +5,8 @@ from httpx import AsyncClient
 from pydantic import SecretStr
 
 from app import schemas
+from app.core import security
+from app.core.invalidation import bus
 from app.crud import crud_user
 from tests.utils.user import TEST_USER_PASSWORD
 
@@ -93,3 +95,48 @@ async def test_authentication_success(
     )
     assert actual
     assert actual == test_user
+
+
+async def test_authentication_rehashes_outdated_hash(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    rounds = security.get_pwd_context().handler().default_rounds
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_ROUNDS", rounds + 1)
+    security.get_pwd_context.cache_clear()
+    try:
+        actual = await crud_user.authenticate(
+            test_user.email, SecretStr(TEST_USER_PASSWORD)
+        )
+    finally:
+        monkeypatch.undo()
+        security.get_pwd_context.cache_clear()
+    assert actual
+    assert actual.hashed_password != test_user.hashed_password
+    assert actual == await crud_user.get(test_user.id)
+    assert security.verify_password(
+        SecretStr(TEST_USER_PASSWORD), actual.hashed_password
+    )
+
+
+async def test_user_cache(
+    async_client: AsyncClient,
+    test_user: schemas.UserDB,
+) -> None:
+    # A listener (re)connecting midway would flush the cache.
+    await bus.stop()
+    assert await crud_user.get(test_user.id) == test_user
+    hits = crud_user.users_cache.hits
+    assert await crud_user.get(test_user.id) == test_user
+    assert await crud_user.get_user_by_username(test_user.username) == test_user
+    assert crud_user.users_cache.hits == hits + 2
+
+    new_username = test_user.username + "xxx"
+    await crud_user.update(test_user.id, schemas.UserUpdate(username=new_username))
+    assert test_user.id not in crud_user.users_cache
+    assert await crud_user.get_user_by_username(test_user.username) is None
+    actual = await crud_user.get_user_by_username(new_username)
+    assert actual
+    assert actual.id == test_user.id
+    assert await crud_user.get(test_user.id) == actual
@@ -0,0 +1,117 @@
+import hashlib
+import pathlib
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.engine.url import URL, make_url
+from sqlalchemy.pool import NullPool
+
+from alembic import command
+from alembic.config import Config
+
+ROOT_DIR = pathlib.Path(__file__).absolute().parent.parent.parent
+
+
+def alembic_config(url: str) -> Config:
+    config = Config(str(ROOT_DIR.joinpath("alembic.ini")))
+    config.set_main_option("script_location", str(ROOT_DIR.joinpath("alembic")))
+    config.attributes["url"] = url
+    return config
+
+
+def migrations_fingerprint() -> str:
+    """Digest of the migration scripts: a template built from other
+    scripts is stale."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(ROOT_DIR.joinpath("alembic", "versions").glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def with_database(url: str, name: str) -> str:
+    return str(make_url(url).set(database=name))
+
+
+@contextmanager
+def _advisory_lock(connection: Connection, name: str) -> Iterator[None]:
+    key = {"name": name}
+    connection.execute(text("SELECT pg_advisory_lock(hashtext(:name))"), key)
+    try:
+        yield
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(hashtext(:name))"), key)
+
+
+def _admin_engine(url: URL) -> Engine:
+    """Engine on the maintenance database, to create and drop databases."""
+    return create_engine(
+        url.set(database="postgres"), isolation_level="AUTOCOMMIT", poolclass=NullPool
+    )
+
+
+def _comment(connection: Connection, name: str) -> Optional[str]:
+    query = text(
+        "SELECT shobj_description(oid, 'pg_database') "
+        "FROM pg_database WHERE datname = :name"
+    )
+    row = connection.execute(query, {"name": name}).first()
+    return None if row is None else (row[0] or "")
+
+
+def _drop(connection: Connection, name: str) -> None:
+    connection.execute(
+        text(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE datname = :name AND pid <> pg_backend_pid()"
+        ),
+        {"name": name},
+    )
+    if _comment(connection, name) is not None:
+        connection.execute(text(f'ALTER DATABASE "{name}" IS_TEMPLATE false'))
+    connection.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+
+
+def ensure_template(url: str) -> None:
+    """Create the migrated template database unless it is up to date.
+
+    Serialized with an advisory lock, so concurrent test sessions and
+    pytest-xdist workers build it once.
+    """
+    parsed = make_url(url)
+    name = parsed.database
+    fingerprint = migrations_fingerprint()
+    with _admin_engine(parsed).connect() as connection:
+        with _advisory_lock(connection, name):
+            if _comment(connection, name) == fingerprint:
+                return
+            _drop(connection, name)
+            connection.execute(text(f'CREATE DATABASE "{name}"'))
+            command.upgrade(alembic_config(url), "head")
+            connection.execute(
+                text(f"COMMENT ON DATABASE \"{name}\" IS '{fingerprint}'")
+            )
+            connection.execute(text(f'ALTER DATABASE "{name}" IS_TEMPLATE true'))
+
+
+def clone_database(template: str, url: str) -> None:
+    """(Re)create the database at ``url`` as a copy of ``template``.
+
+    Holds the template's lock: pytest-xdist workers clone it concurrently.
+    """
+    parsed = make_url(url)
+    template_name = make_url(template).database
+    with _admin_engine(parsed).connect() as connection:
+        with _advisory_lock(connection, template_name):
+            _drop(connection, parsed.database)
+            connection.execute(
+                text(f'CREATE DATABASE "{parsed.database}" TEMPLATE "{template_name}"')
+            )
+
+
+def drop_database(url: str) -> None:
+    parsed = make_url(url)
+    with _admin_engine(parsed).connect() as connection:
+        _drop(connection, parsed.database)
@@ -1,9 +1,8 @@
 from faker import Faker
 from pydantic import SecretStr
 
-from app import db, schemas
+from app import schemas
 from app.crud import crud_user
-from app.db import database
 
 TEST_USER_PASSWORD = "changeit"
 
@@ -26,5 +25,4 @@ async def get_test_user() -> schemas.UserDB:
 
 
 async def delete_user(user_db: schemas.UserDB) -> None:
-    query = db.users.delete().where(user_db.id == db.users.c.id)
-    await database.execute(query=query)
+    await crud_user.delete(user_db)